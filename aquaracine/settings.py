@@ -3,8 +3,11 @@ Django settings for Aqua-Racine project.
 """
 
 import os
+import tempfile
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -91,9 +94,70 @@ TEMPLATES = [
 WSGI_APPLICATION = 'aquaracine.wsgi.application'
 
 # Database
-# Use MySQL on PythonAnywhere if configured, otherwise SQLite
+# DATABASE_URL first (PostgreSQL on Render), then MySQL on PythonAnywhere
+# if configured, otherwise SQLite
+# Connections are kept open DB_CONN_MAX_AGE seconds (0: one per request)
+# and checked before being reused
+DB_CONN_MAX_AGE = int(os.environ.get('DB_CONN_MAX_AGE', 60))  # seconds
+
+# SQLite pragmas applied to every new connection (see core/database.py)
+SQLITE_JOURNAL_MODE = os.environ.get('SQLITE_JOURNAL_MODE', 'WAL')
+SQLITE_SYNCHRONOUS = os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL')
+SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000))
+SQLITE_MMAP_SIZE = int(os.environ.get('SQLITE_MMAP_SIZE', 128 * 1024 * 1024))  # bytes
+SQLITE_CACHE_SIZE_KB = int(os.environ.get('SQLITE_CACHE_SIZE_KB', 16 * 1024))
+
+# PostgreSQL
+# DB_POOL_MODE: persistent (one connection per worker, kept DB_CONN_MAX_AGE
+# seconds) or pgbouncer (behind a transaction-mode pooler such as PgBouncer
+# or Supavisor: no server-side cursors nor session parameters)
+DB_POOL_MODE = os.environ.get('DB_POOL_MODE', 'persistent')
+DB_STATEMENT_TIMEOUT_MS = int(os.environ.get('DB_STATEMENT_TIMEOUT_MS', 30000))
+DB_CONNECT_TIMEOUT = int(os.environ.get('DB_CONNECT_TIMEOUT', 10))  # seconds
+
+
+def get_postgres_options():
+    """libpq options of the PostgreSQL connections."""
+    options = {
+        'connect_timeout': DB_CONNECT_TIMEOUT,
+        'application_name': 'aquaracine',
+        # Détection des connexions persistantes coupées par le réseau
+        'keepalives': 1,
+        'keepalives_idle': 60,
+        'keepalives_interval': 10,
+        'keepalives_count': 3,
+    }
+    if DB_POOL_MODE != 'pgbouncer':
+        # Paramètres de session refusés par les pools en mode transaction :
+        # les définir sur le rôle (ALTER ROLE ... SET statement_timeout)
+        options['options'] = (
+            f'-c statement_timeout={DB_STATEMENT_TIMEOUT_MS} '
+            f'-c idle_in_transaction_session_timeout={DB_STATEMENT_TIMEOUT_MS * 2}'
+        )
+    return options
+
+
+def parse_database_url(url):
+    """Database settings of a DATABASE_URL-style URL."""
+    try:
+        import dj_database_url
+    except ImportError:
+        # Jamais de repli silencieux sur SQLite en production
+        raise ImproperlyConfigured("A database URL is set but dj-database-url is not installed")
+    config = dj_database_url.parse(url, conn_max_age=DB_CONN_MAX_AGE, conn_health_checks=True)
+    if config['ENGINE'] == 'django.db.backends.postgresql':
+        config['OPTIONS'] = {**get_postgres_options(), **config.get('OPTIONS', {})}
+        # Les curseurs nommés (QuerySet.iterator()) ne survivent pas à un pool en mode transaction
+        config['DISABLE_SERVER_SIDE_CURSORS'] = DB_POOL_MODE == 'pgbouncer'
+    return config
+
+
 def get_database_config():
     """Get database configuration with fallback to SQLite."""
+    database_url = os.environ.get('DATABASE_URL', '')
+    if database_url:
+        return {'default': parse_database_url(database_url)}
+
     # Check if MySQL credentials are provided
     db_name = os.environ.get('DB_NAME', '')
     db_user = os.environ.get('DB_USER', '')
@@ -115,6 +179,8 @@ def get_database_config():
                     'OPTIONS': {
                         'init_command': "SET sql_mode='STRICT_TRANS_TABLES'",
                     },
+                    'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+                    'CONN_HEALTH_CHECKS': True,
                 }
             }
         except ImportError:
@@ -125,11 +191,102 @@ def get_database_config():
         'default': {
             'ENGINE': 'django.db.backends.sqlite3',
             'NAME': BASE_DIR / 'db.sqlite3',
+            'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': True,
+            # Base de test sur fichier : les tests concurrents s'appuient sur
+            # WAL et busy_timeout, absents d'une base en mémoire partagée
+            'TEST': {'NAME': BASE_DIR / 'test_db.sqlite3'},
         }
     }
 
 DATABASES = get_database_config()
 
+# Read replicas (see core/routing.py): comma-separated database URLs, used
+# for the public GET requests. After a form submission the client reads
+# the primary for DB_REPLICA_PIN_SECONDS; PostgreSQL replicas further than
+# DB_REPLICA_MAX_LAG seconds behind are skipped
+DATABASE_REPLICA_URLS = [url.strip() for url in os.environ.get('DATABASE_REPLICA_URLS', '').split(',') if url.strip()]
+DB_REPLICA_PIN_SECONDS = int(os.environ.get('DB_REPLICA_PIN_SECONDS', 5))
+DB_REPLICA_MAX_LAG = int(os.environ.get('DB_REPLICA_MAX_LAG', 10))  # seconds
+
+for index, url in enumerate(DATABASE_REPLICA_URLS, 1):
+    DATABASES[f'replica{index}'] = {**parse_database_url(url), 'TEST': {'MIRROR': 'default'}}
+
+if DATABASE_REPLICA_URLS:
+    DATABASE_ROUTERS = ['core.routing.ReplicaRouter']
+    MIDDLEWARE.insert(MIDDLEWARE.index('django.middleware.security.SecurityMiddleware') + 1,
+                      'core.routing.ReplicaRoutingMiddleware')
+
+# Cache
+# CACHE_BACKEND: locmem (one cache per process, development default),
+# db (table created by "manage.py migrate", production default),
+# redis (any Redis-protocol server: Redis, Valkey, KeyDB...) or file.
+# The single-flight locks of core/caching.py and core/dashboard.py rely on
+# an atomic cache.add(): with the file cache they only hold per process.
+def get_cache_config():
+    """Get cache configuration from the environment."""
+    backend = os.environ.get('CACHE_BACKEND', 'locmem' if DEBUG else 'db').lower()
+    location = os.environ.get('CACHE_LOCATION', '')
+    common = {
+        'TIMEOUT': int(os.environ.get('CACHE_TIMEOUT', 300)),  # seconds
+        'KEY_PREFIX': os.environ.get('CACHE_KEY_PREFIX', 'aquaracine'),
+    }
+
+    if backend == 'redis':
+        try:
+            import redis  # noqa: F401
+            return {
+                'default': {
+                    'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+                    'LOCATION': location or 'redis://127.0.0.1:6379/1',
+                    **common,
+                }
+            }
+        except ImportError:
+            backend = 'db'  # Redis client not installed, fall back to the database cache
+
+    if backend == 'db':
+        return {
+            'default': {
+                'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+                'LOCATION': location or 'django_cache',
+                'OPTIONS': {'MAX_ENTRIES': 10000},
+                **common,
+            }
+        }
+
+    if backend == 'file':
+        return {
+            'default': {
+                'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+                'LOCATION': location or os.path.join(tempfile.gettempdir(), 'aquaracine_cache'),
+                'OPTIONS': {'MAX_ENTRIES': 10000},
+                **common,
+            }
+        }
+
+    return {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'aquaracine',
+            **common,
+        }
+    }
+
+CACHES = get_cache_config()
+
+# Per-worker LRU in front of the shared cache (see core/caching.py)
+LOCAL_CACHE_MAX_ENTRIES = int(os.environ.get('LOCAL_CACHE_MAX_ENTRIES', 500))
+LOCAL_CACHE_MAX_BYTES = int(os.environ.get('LOCAL_CACHE_MAX_BYTES', 16 * 1024 * 1024))
+LOCAL_CACHE_CHECK_INTERVAL_MS = int(os.environ.get('LOCAL_CACHE_CHECK_INTERVAL_MS', 1000))
+
+# Cache stampede protection (see core/caching.py): expired values are kept
+# GRACE more seconds to be served while a single worker rebuilds them
+CACHE_STALE_GRACE = int(os.environ.get('CACHE_STALE_GRACE', 300))  # seconds
+CACHE_SINGLE_FLIGHT_WAIT_MS = int(os.environ.get('CACHE_SINGLE_FLIGHT_WAIT_MS', 2000))
+CACHE_SINGLE_FLIGHT_LOCK_TIMEOUT = int(os.environ.get('CACHE_SINGLE_FLIGHT_LOCK_TIMEOUT', 30))  # seconds
+CACHE_XFETCH_BETA = float(os.environ.get('CACHE_XFETCH_BETA', 1.0))
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
@@ -156,6 +313,9 @@ STATICFILES_STORAGE = 'django.contrib.staticfiles.storage.StaticFilesStorage'
 MEDIA_URL = 'media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Admin preview thumbnails, generated on demand under MEDIA_ROOT (see core/thumbnails.py)
+THUMBNAIL_DIR = 'thumbs'
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
@@ -171,6 +331,47 @@ CORS_ALLOWED_ORIGINS = os.environ.get(
 ).split(',')
 CORS_ALLOW_ALL_ORIGINS = DEBUG
 
+# Allow the Idempotency-Key header on cross-origin form submissions
+try:
+    from corsheaders.defaults import default_headers
+    CORS_ALLOW_HEADERS = (*default_headers, 'idempotency-key')
+except ImportError:
+    pass
+
+# Idempotent form submissions (see core/idempotency.py)
+IDEMPOTENCY_KEY_TTL = int(os.environ.get('IDEMPOTENCY_KEY_TTL', 3600))  # seconds
+IDEMPOTENCY_LOCK_TIMEOUT = int(os.environ.get('IDEMPOTENCY_LOCK_TIMEOUT', 60))  # seconds
+
+# Rate limiting of the public write endpoints (see core/throttling.py)
+# Format "requêtes/période" par IP et par email/téléphone
+RATE_LIMIT_ENABLED = os.environ.get('RATE_LIMIT_ENABLED', 'True').lower() in ('true', '1', 'yes')
+RATE_LIMITS = {
+    'game-check': os.environ.get('RATE_LIMIT_GAME_CHECK', '20/min'),
+    'game-submit': os.environ.get('RATE_LIMIT_GAME_SUBMIT', '5/min'),
+    'promo': os.environ.get('RATE_LIMIT_PROMO', '10/min'),
+    'forms': os.environ.get('RATE_LIMIT_FORMS', '5/min'),
+}
+
+# Reverse proxies in front of the application (Render: 1). The client IP is
+# the X-Forwarded-For entry appended by the nearest of them, REMOTE_ADDR at 0
+TRUSTED_PROXY_COUNT = int(os.environ.get('TRUSTED_PROXY_COUNT', 0))
+
+# HTTP cache lifetime of the wheel segments / game boot data (see core/views.py)
+GAME_HTTP_CACHE_MAX_AGE = int(os.environ.get('GAME_HTTP_CACHE_MAX_AGE', 300))  # seconds
+
+# Cache of the admin changelist statistics (see core/admin_stats.py)
+ADMIN_STATS_CACHE_TIMEOUT = int(os.environ.get('ADMIN_STATS_CACHE_TIMEOUT', 30))  # seconds
+
+# Admin dashboard widgets (see core/dashboard.py): fresh for MAX_AGE seconds,
+# then served stale for up to STALE more seconds while being recomputed
+DASHBOARD_STATS_MAX_AGE = int(os.environ.get('DASHBOARD_STATS_MAX_AGE', 60))  # seconds
+DASHBOARD_STATS_STALE = int(os.environ.get('DASHBOARD_STATS_STALE', 600))  # seconds
+
+# Approximate counts of the large admin changelists (see core/paginator.py)
+ADMIN_APPROX_COUNT_THRESHOLD = int(os.environ.get('ADMIN_APPROX_COUNT_THRESHOLD', 10000))  # rows
+ADMIN_COUNT_TIMEOUT_MS = int(os.environ.get('ADMIN_COUNT_TIMEOUT_MS', 200))
+ADMIN_COUNT_CACHE_TIMEOUT = int(os.environ.get('ADMIN_COUNT_CACHE_TIMEOUT', 300))  # seconds
+
 # REST Framework Configuration
 REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
@@ -219,6 +420,8 @@ EMAIL_PORT = int(os.environ.get('EMAIL_PORT', 587))
 EMAIL_USE_TLS = os.environ.get('EMAIL_USE_TLS', 'True').lower() == 'true'
 EMAIL_HOST_USER = os.environ.get('EMAIL_HOST_USER', '')
 EMAIL_HOST_PASSWORD = os.environ.get('EMAIL_HOST_PASSWORD', '')
+# Un serveur SMTP muet ne doit pas bloquer un thread de worker indéfiniment
+EMAIL_TIMEOUT = int(os.environ.get('EMAIL_TIMEOUT', 10))  # seconds
 DEFAULT_FROM_EMAIL = os.environ.get('DEFAULT_FROM_EMAIL', 'noreply@aquaracine.ci')
 
 # Jazzmin Admin Theme Configuration (only if installed)
@@ -6,6 +6,7 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 
+from core.admin import dashboard_stats_view, thumbnail_view
 from core.views import (
     HomePageView, ProductListView, ProductDetailView,
     TeamPageView, BlogListView, BlogDetailView,
@@ -16,6 +17,8 @@ from core.views import (
 
 urlpatterns = [
     # Admin
+    path('admin/api/stats/', dashboard_stats_view, name='admin_dashboard_stats'),
+    path('admin/thumbnail/<int:width>x<int:height>/<path:name>', thumbnail_view, name='admin_thumbnail'),
     path('admin/', admin.site.urls),
 
     # API
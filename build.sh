@@ -6,14 +6,10 @@ pip install -r requirements.txt
 
 python manage.py collectstatic --no-input
 python manage.py migrate
+python manage.py createcachetable
 
-# Create superuser if it doesn't exist
-python manage.py shell << EOF
-from django.contrib.auth import get_user_model
-User = get_user_model()
-if not User.objects.filter(username='admin').exists():
-    User.objects.create_superuser('admin', 'admin@aquaracine.ci', 'AquaAdmin2025!')
-    print('Superuser created: admin / AquaAdmin2025!')
-else:
-    print('Superuser already exists')
-EOF
+# Superuser from DJANGO_SUPERUSER_USERNAME / DJANGO_SUPERUSER_EMAIL /
+# DJANGO_SUPERUSER_PASSWORD when they are set (never printed)
+if [ -n "$DJANGO_SUPERUSER_USERNAME" ] && [ -n "$DJANGO_SUPERUSER_PASSWORD" ]; then
+    python manage.py createsuperuser --noinput || echo "Superuser not created (username already taken?)"
+fi
@@ -1,13 +1,22 @@
 """
 Admin configuration for Aqua-Racine backoffice.
 """
+import time
+
+from django.conf import settings
 from django.contrib import admin
 from django.contrib.admin import AdminSite
+from django.http import Http404, HttpResponseForbidden, HttpResponseRedirect, JsonResponse
+from django.core.files.storage import default_storage
+from django.utils.cache import patch_cache_control
 from django.utils.html import format_html
-from django.db.models import Count, Sum, Avg, Q
+from django.db.models import Count, Sum, Avg, Q, Exists, OuterRef
 from django.utils import timezone
 from datetime import timedelta, date
 from django import forms
+from django.template.response import TemplateResponse
+from django.urls import path
+from PIL import Image
 from .models import (
     SiteSettings, PhoneNumber, HeroSlide, Service, ProductCategory, Product,
     TeamMember, BlogCategory, BlogPost, TimelineStep, GalleryImage,
@@ -16,6 +25,17 @@ from .models import (
     FishSpecies, CropType, BasinType, HydroSystemType, TrainingType,
     QuizQuestion, GamePrize, GameParticipation
 )
+from . import dashboard, thumbnails
+from .admin_stats import ChangelistStatsMixin, GroupBy, filled
+from .caching import invalidate_model
+from .paginator import ApproximateCountPaginator
+from . import rollups
+from .rollups import tracked_update
+from .game import get_prize_table, invalidate_prize_table, participant_filter_metrics
+from .simulation import (
+    SimulationError, simulate_wheel,
+    DEFAULT_AVERAGE_ORDER, DEFAULT_DELIVERY_FEE, DEFAULT_FREE_ITEM_VALUE,
+)
 
 
 # ============================================
@@ -101,7 +121,7 @@ class SiteSettingsAdmin(admin.ModelAdmin):
 # ============================================
 
 @admin.register(HeroSlide)
-class HeroSlideAdmin(admin.ModelAdmin):
+class HeroSlideAdmin(ChangelistStatsMixin, admin.ModelAdmin):
     """Admin for hero carousel slides."""
 
     list_display = ['title', 'image_preview', 'order', 'is_active', 'updated_at']
@@ -111,23 +131,15 @@ class HeroSlideAdmin(admin.ModelAdmin):
     ordering = ['order']
     change_list_template = 'admin/core/heroslide_changelist.html'
 
-    def changelist_view(self, request, extra_context=None):
-        extra_context = extra_context or {}
+    stats_counters = {
+        'total': Q(),
+        'active': Q(is_active=True),
+        'with_button': filled('button_text'),
+        'with_description': filled('description'),
+    }
 
-        total = HeroSlide.objects.count()
-        active = HeroSlide.objects.filter(is_active=True).count()
-        with_button = HeroSlide.objects.exclude(button_text='').exclude(button_text__isnull=True).count()
-        with_description = HeroSlide.objects.exclude(description='').exclude(description__isnull=True).count()
-        slides_preview = list(HeroSlide.objects.filter(is_active=True).order_by('order')[:6])
-
-        extra_context['kpi'] = {
-            'total': total,
-            'active': active,
-            'with_button': with_button,
-            'with_description': with_description,
-            'slides_preview': slides_preview,
-        }
-        return super().changelist_view(request, extra_context)
+    def get_extra_stats(self):
+        return {'slides_preview': list(HeroSlide.objects.filter(is_active=True).order_by('order')[:6])}
 
     fieldsets = (
         (None, {
@@ -142,9 +154,7 @@ class HeroSlideAdmin(admin.ModelAdmin):
     )
 
     def image_preview(self, obj):
-        if obj.image:
-            return format_html('<img src="{}" width="100" height="60" style="object-fit:cover;border-radius:4px;"/>', obj.image.url)
-        return "-"
+        return thumbnails.preview(obj.image, 100, 60)
     image_preview.short_description = "Aperçu"
 
 
@@ -153,7 +163,7 @@ class HeroSlideAdmin(admin.ModelAdmin):
 # ============================================
 
 @admin.register(Service)
-class ServiceAdmin(admin.ModelAdmin):
+class ServiceAdmin(ChangelistStatsMixin, admin.ModelAdmin):
     """Admin for services."""
 
     list_display = ['title', 'icon_preview', 'image_preview', 'order', 'is_active']
@@ -163,34 +173,23 @@ class ServiceAdmin(admin.ModelAdmin):
     ordering = ['order']
     change_list_template = 'admin/core/service_changelist.html'
 
-    def changelist_view(self, request, extra_context=None):
-        extra_context = extra_context or {}
-
-        total = Service.objects.count()
-        active = Service.objects.filter(is_active=True).count()
-        inactive = Service.objects.filter(is_active=False).count()
-        with_image = Service.objects.filter(is_active=True).exclude(image='').count()
+    stats_counters = {
+        'total_services': Q(),
+        'active_count': Q(is_active=True),
+        'inactive_count': Q(is_active=False),
+        'with_image_count': Q(is_active=True) & ~Q(image=''),
+    }
 
+    def get_extra_stats(self):
         # Aperçu services
-        services_preview = list(Service.objects.filter(is_active=True).order_by('order')[:6])
-
-        extra_context['kpi'] = {
-            'total_services': total,
-            'active_count': active,
-            'inactive_count': inactive,
-            'with_image_count': with_image,
-            'services_preview': services_preview,
-        }
-        return super().changelist_view(request, extra_context)
+        return {'services_preview': list(Service.objects.filter(is_active=True).order_by('order')[:6])}
 
     def icon_preview(self, obj):
         return format_html('<i class="{}" style="font-size:24px;"></i>', obj.icon)
     icon_preview.short_description = "Icône"
 
     def image_preview(self, obj):
-        if obj.image:
-            return format_html('<img src="{}" width="60" height="60" style="object-fit:cover;border-radius:4px;"/>', obj.image.url)
-        return "-"
+        return thumbnails.preview(obj.image, 60, 60)
     image_preview.short_description = "Image"
 
 
@@ -199,7 +198,7 @@ class ServiceAdmin(admin.ModelAdmin):
 # ============================================
 
 @admin.register(ProductCategory)
-class ProductCategoryAdmin(admin.ModelAdmin):
+class ProductCategoryAdmin(ChangelistStatsMixin, admin.ModelAdmin):
     """Admin for product categories."""
 
     list_display = ['name', 'slug', 'product_count', 'order', 'is_active']
@@ -210,33 +209,36 @@ class ProductCategoryAdmin(admin.ModelAdmin):
     ordering = ['order']
     change_list_template = 'admin/core/productcategory_changelist.html'
 
-    def changelist_view(self, request, extra_context=None):
-        extra_context = extra_context or {}
+    stats_counters = {
+        'total': Q(),
+        'active': Q(is_active=True),
+        'empty_categories': ~Exists(Product.objects.filter(category=OuterRef('pk'), is_active=True)),
+    }
+    stats_models = (ProductCategory, Product)
+
+    def get_extra_stats(self):
+        return {'total_products': Product.objects.filter(is_active=True).count()}
 
-        total = ProductCategory.objects.count()
-        active = ProductCategory.objects.filter(is_active=True).count()
-        total_products = Product.objects.filter(is_active=True).count()
-        avg_products = round(total_products / total) if total > 0 else 0
-        empty_categories = ProductCategory.objects.annotate(
-            prod_count=Count('products', filter=Q(products__is_active=True))
-        ).filter(prod_count=0).count()
-
-        extra_context['kpi'] = {
-            'total': total,
-            'active': active,
-            'total_products': total_products,
-            'avg_products': avg_products,
-            'empty_categories': empty_categories,
+    def get_kpi(self, stats):
+        total = stats['total']
+        return {
+            **stats,
+            'avg_products': round(stats['total_products'] / total) if total > 0 else 0,
         }
-        return super().changelist_view(request, extra_context)
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(
+            active_product_count=Count('products', filter=Q(products__is_active=True), distinct=True)
+        )
 
     def product_count(self, obj):
-        return obj.products.filter(is_active=True).count()
+        return obj.active_product_count
     product_count.short_description = "Produits"
+    product_count.admin_order_field = 'active_product_count'
 
 
 @admin.register(Product)
-class ProductAdmin(admin.ModelAdmin):
+class ProductAdmin(ChangelistStatsMixin, admin.ModelAdmin):
     """Admin for products."""
 
     list_display = ['image_preview', 'name', 'category', 'price_display', 'stock', 'is_featured', 'is_active']
@@ -263,46 +265,40 @@ class ProductAdmin(admin.ModelAdmin):
         }),
     )
 
-    def changelist_view(self, request, extra_context=None):
-        extra_context = extra_context or {}
-
-        total = Product.objects.count()
-        active = Product.objects.filter(is_active=True).count()
-        featured = Product.objects.filter(is_featured=True).count()
-        low_stock = Product.objects.filter(is_active=True, stock__gt=0, stock__lte=5).count()
-        out_of_stock = Product.objects.filter(is_active=True, stock=0).count()
-        on_sale = Product.objects.filter(old_price__isnull=False).exclude(old_price=0).count()
-        categories = ProductCategory.objects.count()
-
+    stats_counters = {
+        'total_products': Q(),
+        'active_count': Q(is_active=True),
+        'featured_count': Q(is_featured=True),
+        'low_stock_count': Q(is_active=True, stock__gt=0, stock__lte=5),
+        'out_of_stock_count': Q(is_active=True, stock=0),
+        'on_sale_count': Q(old_price__isnull=False) & ~Q(old_price=0),
+    }
+    stats_aggregates = {
         # Prix moyen
-        avg_price = Product.objects.filter(is_active=True).aggregate(avg=Avg('price'))['avg']
-        avg_price_str = f"{avg_price:,.0f}".replace(",", " ") if avg_price else None
-
+        'avg_price': Avg('price', filter=Q(is_active=True)),
+    }
+    stats_groups = {
         # Produits par catégorie
-        by_category = list(
-            ProductCategory.objects.annotate(count=Count('products'))
-            .filter(count__gt=0)
-            .values('name', 'count')
-            .order_by('-count')[:5]
-        )
+        'by_category': GroupBy('category__name', alias='name', filter=Q(category__isnull=False), limit=5),
+    }
+    stats_models = (Product, ProductCategory)
+
+    def get_queryset(self, request):
+        # Catégorie nullable : ignorée par le select_related() automatique de la liste
+        return super().get_queryset(request).select_related('category')
 
-        extra_context['kpi'] = {
-            'total_products': total,
-            'active_count': active,
-            'featured_count': featured,
-            'low_stock_count': low_stock,
-            'out_of_stock_count': out_of_stock,
-            'on_sale_count': on_sale,
-            'categories_count': categories,
-            'avg_price': avg_price_str,
-            'by_category': by_category,
+    def get_extra_stats(self):
+        return {'categories_count': ProductCategory.objects.count()}
+
+    def get_kpi(self, stats):
+        avg_price = stats['avg_price']
+        return {
+            **stats,
+            'avg_price': f"{avg_price:,.0f}".replace(",", " ") if avg_price else None,
         }
-        return super().changelist_view(request, extra_context)
 
     def image_preview(self, obj):
-        if obj.image:
-            return format_html('<img src="{}" width="50" height="50" style="object-fit:cover;border-radius:4px;"/>', obj.image.url)
-        return "-"
+        return thumbnails.preview(obj.image, 50, 50)
     image_preview.short_description = "Image"
 
     def price_display(self, obj):
@@ -317,7 +313,7 @@ class ProductAdmin(admin.ModelAdmin):
 # ============================================
 
 @admin.register(TeamMember)
-class TeamMemberAdmin(admin.ModelAdmin):
+class TeamMemberAdmin(ChangelistStatsMixin, admin.ModelAdmin):
     """Admin for team members."""
 
     list_display = ['photo_preview', 'name', 'role', 'email', 'order', 'is_active']
@@ -343,34 +339,24 @@ class TeamMemberAdmin(admin.ModelAdmin):
         }),
     )
 
-    def changelist_view(self, request, extra_context=None):
-        extra_context = extra_context or {}
-
-        total = TeamMember.objects.count()
-        active = TeamMember.objects.filter(is_active=True).count()
-        inactive = TeamMember.objects.filter(is_active=False).count()
-        with_photo = TeamMember.objects.filter(is_active=True).exclude(photo='').count()
-        with_social = TeamMember.objects.filter(is_active=True).filter(
-            Q(linkedin_url__isnull=False) | Q(facebook_url__isnull=False) | Q(twitter_url__isnull=False)
-        ).exclude(linkedin_url='').exclude(facebook_url='').exclude(twitter_url='').count()
+    stats_counters = {
+        'total_members': Q(),
+        'active_count': Q(is_active=True),
+        'inactive_count': Q(is_active=False),
+        'with_photo_count': Q(is_active=True) & ~Q(photo=''),
+        'with_social_count': (
+            Q(is_active=True)
+            & (Q(linkedin_url__isnull=False) | Q(facebook_url__isnull=False) | Q(twitter_url__isnull=False))
+            & ~Q(linkedin_url='') & ~Q(facebook_url='') & ~Q(twitter_url='')
+        ),
+    }
 
+    def get_extra_stats(self):
         # Aperçu équipe
-        team_preview = list(TeamMember.objects.filter(is_active=True).order_by('order')[:8])
-
-        extra_context['kpi'] = {
-            'total_members': total,
-            'active_count': active,
-            'inactive_count': inactive,
-            'with_photo_count': with_photo,
-            'with_social_count': with_social,
-            'team_preview': team_preview,
-        }
-        return super().changelist_view(request, extra_context)
+        return {'team_preview': list(TeamMember.objects.filter(is_active=True).order_by('order')[:8])}
 
     def photo_preview(self, obj):
-        if obj.photo:
-            return format_html('<img src="{}" width="50" height="50" style="object-fit:cover;border-radius:50%;"/>', obj.photo.url)
-        return "-"
+        return thumbnails.preview(obj.photo, 50, 50, radius='50%')
     photo_preview.short_description = "Photo"
 
 
@@ -379,7 +365,7 @@ class TeamMemberAdmin(admin.ModelAdmin):
 # ============================================
 
 @admin.register(BlogCategory)
-class BlogCategoryAdmin(admin.ModelAdmin):
+class BlogCategoryAdmin(ChangelistStatsMixin, admin.ModelAdmin):
     """Admin for blog categories."""
 
     list_display = ['name', 'slug', 'post_count']
@@ -387,29 +373,38 @@ class BlogCategoryAdmin(admin.ModelAdmin):
     prepopulated_fields = {'slug': ('name',)}
     change_list_template = 'admin/core/blogcategory_changelist.html'
 
-    def changelist_view(self, request, extra_context=None):
-        extra_context = extra_context or {}
+    stats_counters = {
+        'total': Q(),
+    }
+    stats_models = (BlogCategory, BlogPost)
 
-        total = BlogCategory.objects.count()
-        total_posts = BlogPost.objects.filter(is_published=True).count()
-        avg_posts = round(total_posts / total) if total > 0 else 0
-        total_views = BlogPost.objects.aggregate(total=Sum('views'))['total'] or 0
+    def get_extra_stats(self):
+        return BlogPost.objects.aggregate(
+            total_posts=Count('pk', filter=Q(is_published=True)),
+            total_views=Sum('views'),
+        )
 
-        extra_context['kpi'] = {
-            'total': total,
-            'total_posts': total_posts,
-            'avg_posts': avg_posts,
-            'total_views': total_views,
+    def get_kpi(self, stats):
+        total = stats['total']
+        return {
+            **stats,
+            'avg_posts': round(stats['total_posts'] / total) if total > 0 else 0,
+            'total_views': stats['total_views'] or 0,
         }
-        return super().changelist_view(request, extra_context)
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(
+            published_post_count=Count('posts', filter=Q(posts__is_published=True), distinct=True)
+        )
 
     def post_count(self, obj):
-        return obj.posts.filter(is_published=True).count()
+        return obj.published_post_count
     post_count.short_description = "Articles"
+    post_count.admin_order_field = 'published_post_count'
 
 
 @admin.register(BlogPost)
-class BlogPostAdmin(admin.ModelAdmin):
+class BlogPostAdmin(ChangelistStatsMixin, admin.ModelAdmin):
     """Admin for blog posts."""
 
     list_display = ['image_preview', 'title', 'category', 'author_name', 'views', 'is_featured', 'is_published', 'published_date']
@@ -436,47 +431,38 @@ class BlogPostAdmin(admin.ModelAdmin):
 
     readonly_fields = ['views']
 
-    def changelist_view(self, request, extra_context=None):
-        extra_context = extra_context or {}
-        now = timezone.now()
-        month_ago = now - timedelta(days=30)
-
-        total = BlogPost.objects.count()
-        published = BlogPost.objects.filter(is_published=True).count()
-        draft = BlogPost.objects.filter(is_published=False).count()
-        featured = BlogPost.objects.filter(is_featured=True).count()
-        categories = BlogCategory.objects.count()
-        total_views = BlogPost.objects.aggregate(total=Sum('views'))['total'] or 0
-        this_month = BlogPost.objects.filter(published_date__gte=month_ago).count()
-
+    stats_counters = {
+        'total_posts': Q(),
+        'published_count': Q(is_published=True),
+        'draft_count': Q(is_published=False),
+        'featured_count': Q(is_featured=True),
+        'this_month_count': lambda: Q(published_date__gte=timezone.now() - timedelta(days=30)),
+    }
+    stats_aggregates = {
+        'total_views': Sum('views'),
+    }
+    stats_groups = {
         # Par catégorie
-        by_category = list(
-            BlogCategory.objects.annotate(count=Count('posts'))
-            .filter(count__gt=0)
-            .values('name', 'count')
-            .order_by('-count')[:5]
-        )
+        'by_category': GroupBy('category__name', alias='name', filter=Q(category__isnull=False), limit=5),
+    }
+    stats_models = (BlogPost, BlogCategory)
+
+    def get_queryset(self, request):
+        # Catégorie nullable : ignorée par le select_related() automatique de la liste
+        return super().get_queryset(request).select_related('category')
 
-        # Top articles
-        top_articles = list(BlogPost.objects.filter(is_published=True).order_by('-views')[:5])
-
-        extra_context['kpi'] = {
-            'total_posts': total,
-            'published_count': published,
-            'draft_count': draft,
-            'featured_count': featured,
-            'categories_count': categories,
-            'total_views': total_views,
-            'this_month_count': this_month,
-            'by_category': by_category,
-            'top_articles': top_articles,
+    def get_extra_stats(self):
+        return {
+            'categories_count': BlogCategory.objects.count(),
+            # Top articles
+            'top_articles': list(BlogPost.objects.filter(is_published=True).order_by('-views')[:5]),
         }
-        return super().changelist_view(request, extra_context)
+
+    def get_kpi(self, stats):
+        return {**stats, 'total_views': stats['total_views'] or 0}
 
     def image_preview(self, obj):
-        if obj.image:
-            return format_html('<img src="{}" width="80" height="50" style="object-fit:cover;border-radius:4px;"/>', obj.image.url)
-        return "-"
+        return thumbnails.preview(obj.image, 80, 50)
     image_preview.short_description = "Image"
 
 
@@ -485,7 +471,7 @@ class BlogPostAdmin(admin.ModelAdmin):
 # ============================================
 
 @admin.register(TimelineStep)
-class TimelineStepAdmin(admin.ModelAdmin):
+class TimelineStepAdmin(ChangelistStatsMixin, admin.ModelAdmin):
     """Admin for timeline/process steps."""
 
     list_display = ['order', 'title', 'has_image', 'has_video', 'is_active']
@@ -495,21 +481,12 @@ class TimelineStepAdmin(admin.ModelAdmin):
     ordering = ['order']
     change_list_template = 'admin/core/timelinestep_changelist.html'
 
-    def changelist_view(self, request, extra_context=None):
-        extra_context = extra_context or {}
-
-        total = TimelineStep.objects.count()
-        active = TimelineStep.objects.filter(is_active=True).count()
-        with_image = TimelineStep.objects.exclude(image='').exclude(image__isnull=True).count()
-        with_video = TimelineStep.objects.exclude(video_url='').exclude(video_url__isnull=True).count()
-
-        extra_context['kpi'] = {
-            'total': total,
-            'active': active,
-            'with_image': with_image,
-            'with_video': with_video,
-        }
-        return super().changelist_view(request, extra_context)
+    stats_counters = {
+        'total': Q(),
+        'active': Q(is_active=True),
+        'with_image': filled('image'),
+        'with_video': filled('video_url'),
+    }
 
     def has_image(self, obj):
         return bool(obj.image)
@@ -527,7 +504,7 @@ class TimelineStepAdmin(admin.ModelAdmin):
 # ============================================
 
 @admin.register(GalleryImage)
-class GalleryImageAdmin(admin.ModelAdmin):
+class GalleryImageAdmin(ChangelistStatsMixin, admin.ModelAdmin):
     """Admin for gallery images."""
 
     list_display = ['image_preview', 'title', 'category', 'order', 'is_active']
@@ -537,44 +514,27 @@ class GalleryImageAdmin(admin.ModelAdmin):
     ordering = ['order']
     change_list_template = 'admin/core/galleryimage_changelist.html'
 
-    def changelist_view(self, request, extra_context=None):
-        extra_context = extra_context or {}
-        now = timezone.now()
-        month_ago = now - timedelta(days=30)
-
-        total = GalleryImage.objects.count()
-        active = GalleryImage.objects.filter(is_active=True).count()
-        inactive = GalleryImage.objects.filter(is_active=False).count()
-        recent = GalleryImage.objects.filter(created_at__gte=month_ago).count() if hasattr(GalleryImage, 'created_at') else 0
-
-        # Par catégorie
-        by_category = list(
-            GalleryImage.objects.values('category')
-            .annotate(count=Count('id'))
-            .order_by('-count')[:5]
-        )
-
+    stats_counters = {
+        'total_images': Q(),
+        'active_count': Q(is_active=True),
+        'inactive_count': Q(is_active=False),
+        'recent_count': lambda: Q(created_at__gte=timezone.now() - timedelta(days=30)),
+    }
+    stats_aggregates = {
         # Nombre de catégories uniques
-        categories_count = GalleryImage.objects.values('category').distinct().count()
+        'categories_count': Count('category', distinct=True),
+    }
+    stats_groups = {
+        # Par catégorie
+        'by_category': GroupBy('category', limit=5),
+    }
 
+    def get_extra_stats(self):
         # Aperçu galerie
-        gallery_preview = list(GalleryImage.objects.filter(is_active=True).order_by('-id')[:12])
-
-        extra_context['kpi'] = {
-            'total_images': total,
-            'active_count': active,
-            'inactive_count': inactive,
-            'recent_count': recent,
-            'categories_count': categories_count,
-            'by_category': by_category,
-            'gallery_preview': gallery_preview,
-        }
-        return super().changelist_view(request, extra_context)
+        return {'gallery_preview': list(GalleryImage.objects.filter(is_active=True).order_by('-id')[:12])}
 
     def image_preview(self, obj):
-        if obj.image:
-            return format_html('<img src="{}" width="80" height="60" style="object-fit:cover;border-radius:4px;"/>', obj.image.url)
-        return "-"
+        return thumbnails.preview(obj.image, 80, 60)
     image_preview.short_description = "Aperçu"
 
 
@@ -583,7 +543,7 @@ class GalleryImageAdmin(admin.ModelAdmin):
 # ============================================
 
 @admin.register(Advantage)
-class AdvantageAdmin(admin.ModelAdmin):
+class AdvantageAdmin(ChangelistStatsMixin, admin.ModelAdmin):
     """Admin for advantages with percentage."""
 
     list_display = ['title', 'percentage_display', 'icon', 'order', 'is_active']
@@ -593,21 +553,17 @@ class AdvantageAdmin(admin.ModelAdmin):
     ordering = ['order']
     change_list_template = 'admin/core/advantage_changelist.html'
 
-    def changelist_view(self, request, extra_context=None):
-        extra_context = extra_context or {}
-
-        total = Advantage.objects.count()
-        active = Advantage.objects.filter(is_active=True).count()
-        avg_percentage = Advantage.objects.filter(is_active=True).aggregate(avg=Avg('percentage'))['avg'] or 0
-        with_icon = Advantage.objects.exclude(icon='').exclude(icon__isnull=True).count()
+    stats_counters = {
+        'total': Q(),
+        'active': Q(is_active=True),
+        'with_icon': filled('icon'),
+    }
+    stats_aggregates = {
+        'avg_percentage': Avg('percentage', filter=Q(is_active=True)),
+    }
 
-        extra_context['kpi'] = {
-            'total': total,
-            'active': active,
-            'avg_percentage': round(avg_percentage),
-            'with_icon': with_icon,
-        }
-        return super().changelist_view(request, extra_context)
+    def get_kpi(self, stats):
+        return {**stats, 'avg_percentage': round(stats['avg_percentage'] or 0)}
 
     def percentage_display(self, obj):
         color = obj.color or '#4CAF50'
@@ -625,7 +581,7 @@ class AdvantageAdmin(admin.ModelAdmin):
 # ============================================
 
 @admin.register(Testimonial)
-class TestimonialAdmin(admin.ModelAdmin):
+class TestimonialAdmin(ChangelistStatsMixin, admin.ModelAdmin):
     """Admin for testimonials."""
 
     list_display = ['photo_preview', 'name', 'role', 'rating_stars', 'order', 'is_active']
@@ -635,28 +591,21 @@ class TestimonialAdmin(admin.ModelAdmin):
     ordering = ['order']
     change_list_template = 'admin/core/testimonial_changelist.html'
 
-    def changelist_view(self, request, extra_context=None):
-        extra_context = extra_context or {}
+    stats_counters = {
+        'total': Q(),
+        'active': Q(is_active=True),
+        'five_stars': Q(rating=5),
+        'with_photo': filled('photo'),
+    }
+    stats_aggregates = {
+        'avg_rating': Avg('rating', filter=Q(is_active=True)),
+    }
 
-        total = Testimonial.objects.count()
-        active = Testimonial.objects.filter(is_active=True).count()
-        avg_rating = Testimonial.objects.filter(is_active=True).aggregate(avg=Avg('rating'))['avg'] or 0
-        five_stars = Testimonial.objects.filter(rating=5).count()
-        with_photo = Testimonial.objects.exclude(photo='').exclude(photo__isnull=True).count()
-
-        extra_context['kpi'] = {
-            'total': total,
-            'active': active,
-            'avg_rating': round(avg_rating, 1),
-            'five_stars': five_stars,
-            'with_photo': with_photo,
-        }
-        return super().changelist_view(request, extra_context)
+    def get_kpi(self, stats):
+        return {**stats, 'avg_rating': round(stats['avg_rating'] or 0, 1)}
 
     def photo_preview(self, obj):
-        if obj.photo:
-            return format_html('<img src="{}" width="40" height="40" style="object-fit:cover;border-radius:50%;"/>', obj.photo.url)
-        return "-"
+        return thumbnails.preview(obj.photo, 40, 40, radius='50%')
     photo_preview.short_description = "Photo"
 
     def rating_stars(self, obj):
@@ -670,7 +619,7 @@ class TestimonialAdmin(admin.ModelAdmin):
 # ============================================
 
 @admin.register(FAQ)
-class FAQAdmin(admin.ModelAdmin):
+class FAQAdmin(ChangelistStatsMixin, admin.ModelAdmin):
     """Admin for FAQs."""
 
     list_display = ['question_short', 'category', 'order', 'is_active']
@@ -680,21 +629,20 @@ class FAQAdmin(admin.ModelAdmin):
     ordering = ['order']
     change_list_template = 'admin/core/faq_changelist.html'
 
-    def changelist_view(self, request, extra_context=None):
-        extra_context = extra_context or {}
-
-        total = FAQ.objects.count()
-        active = FAQ.objects.filter(is_active=True).count()
-        categories = FAQ.objects.values('category').distinct().count()
-        avg_per_category = round(total / categories) if categories > 0 else 0
+    stats_counters = {
+        'total': Q(),
+        'active': Q(is_active=True),
+    }
+    stats_aggregates = {
+        'categories': Count('category', distinct=True),
+    }
 
-        extra_context['kpi'] = {
-            'total': total,
-            'active': active,
-            'categories': categories,
-            'avg_per_category': avg_per_category,
+    def get_kpi(self, stats):
+        categories = stats['categories']
+        return {
+            **stats,
+            'avg_per_category': round(stats['total'] / categories) if categories > 0 else 0,
         }
-        return super().changelist_view(request, extra_context)
 
     def question_short(self, obj):
         return obj.question[:80] + '...' if len(obj.question) > 80 else obj.question
@@ -706,7 +654,7 @@ class FAQAdmin(admin.ModelAdmin):
 # ============================================
 
 @admin.register(InstallationType)
-class InstallationTypeAdmin(admin.ModelAdmin):
+class InstallationTypeAdmin(ChangelistStatsMixin, admin.ModelAdmin):
     """Admin for installation types."""
 
     list_display = ['name', 'base_price_display', 'icon', 'quote_count', 'order', 'is_active']
@@ -716,21 +664,20 @@ class InstallationTypeAdmin(admin.ModelAdmin):
     ordering = ['order']
     change_list_template = 'admin/core/installationtype_changelist.html'
 
-    def changelist_view(self, request, extra_context=None):
-        extra_context = extra_context or {}
+    stats_counters = {
+        'total': Q(),
+        'active': Q(is_active=True),
+    }
+    stats_aggregates = {
+        'avg_price': Avg('base_price'),
+    }
+    stats_models = (InstallationType, QuoteRequest)
 
-        total = InstallationType.objects.count()
-        active = InstallationType.objects.filter(is_active=True).count()
-        total_quotes = QuoteRequest.objects.count()
-        avg_price = InstallationType.objects.filter(base_price__isnull=False).aggregate(avg=Avg('base_price'))['avg'] or 0
+    def get_extra_stats(self):
+        return {'total_quotes': rollups.summary(['quotes']).get('quotes')}
 
-        extra_context['kpi'] = {
-            'total': total,
-            'active': active,
-            'total_quotes': total_quotes,
-            'avg_price': f"{avg_price:,.0f}".replace(",", " "),
-        }
-        return super().changelist_view(request, extra_context)
+    def get_kpi(self, stats):
+        return {**stats, 'avg_price': f"{stats['avg_price'] or 0:,.0f}".replace(",", " ")}
 
     def base_price_display(self, obj):
         if obj.base_price:
@@ -738,9 +685,13 @@ class InstallationTypeAdmin(admin.ModelAdmin):
         return "-"
     base_price_display.short_description = "Prix de base"
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(quote_request_count=Count('quote_requests', distinct=True))
+
     def quote_count(self, obj):
-        return obj.quote_requests.count()
+        return obj.quote_request_count
     quote_count.short_description = "Demandes"
+    quote_count.admin_order_field = 'quote_request_count'
 
 
 # ============================================
@@ -748,7 +699,7 @@ class InstallationTypeAdmin(admin.ModelAdmin):
 # ============================================
 
 @admin.register(QuoteRequest)
-class QuoteRequestAdmin(admin.ModelAdmin):
+class QuoteRequestAdmin(ChangelistStatsMixin, admin.ModelAdmin):
     """Admin for quote requests."""
 
     list_display = ['id', 'full_name', 'email', 'phone', 'city', 'installation_list', 'project_size', 'status_badge', 'created_at']
@@ -759,6 +710,9 @@ class QuoteRequestAdmin(admin.ModelAdmin):
     ordering = ['-created_at']
     filter_horizontal = ['installation_types']
     change_list_template = 'admin/core/quoterequest_changelist.html'
+    # Tables volumineuses : comptage approché (core/paginator.py)
+    paginator = ApproximateCountPaginator
+    show_full_result_count = False
 
     fieldsets = (
         ('Contact', {
@@ -786,22 +740,17 @@ class QuoteRequestAdmin(admin.ModelAdmin):
         }),
     )
 
-    def changelist_view(self, request, extra_context=None):
-        extra_context = extra_context or {}
-        now = timezone.now()
-        today = now.replace(hour=0, minute=0, second=0, microsecond=0)
-        week_ago = now - timedelta(days=7)
-        last_week = week_ago - timedelta(days=7)
-        month_ago = now - timedelta(days=30)
-
-        total = QuoteRequest.objects.count()
-        pending = QuoteRequest.objects.filter(status='pending').count()
-        today_count = QuoteRequest.objects.filter(created_at__gte=today).count()
-        week_count = QuoteRequest.objects.filter(created_at__gte=week_ago).count()
-        last_week_count = QuoteRequest.objects.filter(created_at__gte=last_week, created_at__lt=week_ago).count()
-        month_count = QuoteRequest.objects.filter(created_at__gte=month_ago).count()
-        accepted = QuoteRequest.objects.filter(status='accepted').count()
-        completed = QuoteRequest.objects.filter(status='completed').count()
+    def get_extra_stats(self):
+        stats = rollups.summary(['quotes', 'quotes.status', 'quotes.amount'])
+
+        total = stats.get('quotes')
+        pending = stats.get('quotes.status', 'pending')
+        today_count = stats.get('quotes', window='today')
+        week_count = stats.get('quotes', window='week')
+        last_week_count = stats.get('quotes', window='last_week')
+        month_count = stats.get('quotes', window='month')
+        accepted = stats.get('quotes.status', 'accepted')
+        completed = stats.get('quotes.status', 'completed')
 
         week_growth = 0
         if last_week_count > 0:
@@ -810,9 +759,7 @@ class QuoteRequestAdmin(admin.ModelAdmin):
         conversion_rate = round(((accepted + completed) / total * 100)) if total > 0 else 0
 
         # Montant estimé des devis acceptés
-        estimated = QuoteRequest.objects.filter(status__in=['accepted', 'completed']).aggregate(
-            total=Sum('estimated_amount')
-        )['total'] or 0
+        estimated = stats.get('quotes.amount', 'accepted') + stats.get('quotes.amount', 'completed')
         estimated_str = f"{estimated:,.0f}".replace(",", " ") if estimated else None
 
         # Répartition par statut
@@ -827,11 +774,11 @@ class QuoteRequestAdmin(admin.ModelAdmin):
         }
         status_breakdown = []
         for status, label in status_labels.items():
-            count = QuoteRequest.objects.filter(status=status).count()
+            count = stats.get('quotes.status', status)
             if count > 0:
                 status_breakdown.append({'status': status, 'label': label, 'count': count})
 
-        extra_context['kpi'] = {
+        return {
             'total_quotes': total,
             'pending_count': pending,
             'today_count': today_count,
@@ -843,16 +790,19 @@ class QuoteRequestAdmin(admin.ModelAdmin):
             'estimated_revenue': estimated_str,
             'status_breakdown': status_breakdown,
         }
-        return super().changelist_view(request, extra_context)
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).prefetch_related('installation_types')
 
     def full_name(self, obj):
         return obj.full_name
     full_name.short_description = "Nom"
 
     def installation_list(self, obj):
-        types = obj.installation_types.all()[:3]
-        names = [t.name for t in types]
-        if obj.installation_types.count() > 3:
+        # Lit les types préchargés (all() sans slicing ni count())
+        types = list(obj.installation_types.all())
+        names = [t.name for t in types[:3]]
+        if len(types) > 3:
             names.append('...')
         return ', '.join(names)
     installation_list.short_description = "Types"
@@ -877,15 +827,15 @@ class QuoteRequestAdmin(admin.ModelAdmin):
     actions = ['mark_contacted', 'mark_in_progress', 'mark_quoted']
 
     def mark_contacted(self, request, queryset):
-        queryset.update(status='contacted')
+        tracked_update(queryset, status='contacted')
     mark_contacted.short_description = "Marquer comme contacté"
 
     def mark_in_progress(self, request, queryset):
-        queryset.update(status='in_progress')
+        tracked_update(queryset, status='in_progress')
     mark_in_progress.short_description = "Marquer en cours de traitement"
 
     def mark_quoted(self, request, queryset):
-        queryset.update(status='quoted')
+        tracked_update(queryset, status='quoted')
     mark_quoted.short_description = "Marquer comme devis envoyé"
 
 
@@ -894,7 +844,7 @@ class QuoteRequestAdmin(admin.ModelAdmin):
 # ============================================
 
 @admin.register(ContactMessage)
-class ContactMessageAdmin(admin.ModelAdmin):
+class ContactMessageAdmin(ChangelistStatsMixin, admin.ModelAdmin):
     """Admin for contact messages."""
 
     list_display = ['name', 'email', 'subject_short', 'status_badge', 'created_at']
@@ -904,6 +854,9 @@ class ContactMessageAdmin(admin.ModelAdmin):
     date_hierarchy = 'created_at'
     ordering = ['-created_at']
     change_list_template = 'admin/core/contactmessage_changelist.html'
+    # Tables volumineuses : comptage approché (core/paginator.py)
+    paginator = ApproximateCountPaginator
+    show_full_result_count = False
 
     fieldsets = (
         ('Message', {
@@ -918,22 +871,19 @@ class ContactMessageAdmin(admin.ModelAdmin):
         }),
     )
 
-    def changelist_view(self, request, extra_context=None):
-        extra_context = extra_context or {}
-        now = timezone.now()
-        today = now.replace(hour=0, minute=0, second=0, microsecond=0)
-        week_ago = now - timedelta(days=7)
+    def get_extra_stats(self):
+        stats = rollups.summary(['messages', 'messages.status'])
 
-        total = ContactMessage.objects.count()
-        new_count = ContactMessage.objects.filter(status='new').count()
-        today_count = ContactMessage.objects.filter(created_at__gte=today).count()
-        week_count = ContactMessage.objects.filter(created_at__gte=week_ago).count()
-        replied_count = ContactMessage.objects.filter(status='replied').count()
-        archived_count = ContactMessage.objects.filter(status='archived').count()
+        total = stats.get('messages')
+        new_count = stats.get('messages.status', 'new')
+        today_count = stats.get('messages', window='today')
+        week_count = stats.get('messages', window='week')
+        replied_count = stats.get('messages.status', 'replied')
+        archived_count = stats.get('messages.status', 'archived')
 
         response_rate = round((replied_count / total * 100)) if total > 0 else 0
 
-        extra_context['kpi'] = {
+        return {
             'total_messages': total,
             'new_count': new_count,
             'today_count': today_count,
@@ -942,7 +892,6 @@ class ContactMessageAdmin(admin.ModelAdmin):
             'archived_count': archived_count,
             'response_rate': response_rate,
         }
-        return super().changelist_view(request, extra_context)
 
     def subject_short(self, obj):
         return obj.subject[:50] + '...' if obj.subject and len(obj.subject) > 50 else (obj.subject or 'Sans sujet')
@@ -965,15 +914,15 @@ class ContactMessageAdmin(admin.ModelAdmin):
     actions = ['mark_read', 'mark_replied', 'mark_archived']
 
     def mark_read(self, request, queryset):
-        queryset.update(status='read')
+        tracked_update(queryset, status='read')
     mark_read.short_description = "Marquer comme lu"
 
     def mark_replied(self, request, queryset):
-        queryset.update(status='replied')
+        tracked_update(queryset, status='replied')
     mark_replied.short_description = "Marquer comme répondu"
 
     def mark_archived(self, request, queryset):
-        queryset.update(status='archived')
+        tracked_update(queryset, status='archived')
     mark_archived.short_description = "Archiver"
 
 
@@ -982,7 +931,7 @@ class ContactMessageAdmin(admin.ModelAdmin):
 # ============================================
 
 @admin.register(Newsletter)
-class NewsletterAdmin(admin.ModelAdmin):
+class NewsletterAdmin(ChangelistStatsMixin, admin.ModelAdmin):
     """Admin for newsletter subscribers."""
 
     list_display = ['email', 'is_active', 'created_at']
@@ -992,24 +941,22 @@ class NewsletterAdmin(admin.ModelAdmin):
     ordering = ['-created_at']
     date_hierarchy = 'created_at'
     change_list_template = 'admin/core/newsletter_changelist.html'
+    # Tables volumineuses : comptage approché (core/paginator.py)
+    paginator = ApproximateCountPaginator
+    show_full_result_count = False
 
     actions = ['export_emails', 'deactivate', 'activate']
 
-    def changelist_view(self, request, extra_context=None):
-        extra_context = extra_context or {}
-        now = timezone.now()
-        today = now.replace(hour=0, minute=0, second=0, microsecond=0)
-        week_ago = now - timedelta(days=7)
-        month_ago = now - timedelta(days=30)
-        last_week = week_ago - timedelta(days=7)
-
-        total = Newsletter.objects.filter(is_active=True).count()
-        total_all = Newsletter.objects.count()
-        today_count = Newsletter.objects.filter(created_at__gte=today).count()
-        week_count = Newsletter.objects.filter(created_at__gte=week_ago).count()
-        last_week_count = Newsletter.objects.filter(created_at__gte=last_week, created_at__lt=week_ago).count()
-        month_count = Newsletter.objects.filter(created_at__gte=month_ago).count()
-        inactive_count = Newsletter.objects.filter(is_active=False).count()
+    def get_extra_stats(self):
+        stats = rollups.summary(['subscribers', 'subscribers.active'])
+
+        total = stats.get('subscribers.active')
+        total_all = stats.get('subscribers')
+        today_count = stats.get('subscribers', window='today')
+        week_count = stats.get('subscribers', window='week')
+        last_week_count = stats.get('subscribers', window='last_week')
+        month_count = stats.get('subscribers', window='month')
+        inactive_count = total_all - total
 
         week_growth = 0
         if last_week_count > 0:
@@ -1017,7 +964,7 @@ class NewsletterAdmin(admin.ModelAdmin):
 
         active_rate = round((total / total_all * 100)) if total_all > 0 else 0
 
-        extra_context['kpi'] = {
+        return {
             'total_subscribers': total,
             'today_count': today_count,
             'week_count': week_count,
@@ -1026,7 +973,6 @@ class NewsletterAdmin(admin.ModelAdmin):
             'week_growth': week_growth,
             'active_rate': active_rate,
         }
-        return super().changelist_view(request, extra_context)
 
     def export_emails(self, request, queryset):
         # This would export emails - just a placeholder action
@@ -1034,11 +980,11 @@ class NewsletterAdmin(admin.ModelAdmin):
     export_emails.short_description = "Exporter les emails"
 
     def deactivate(self, request, queryset):
-        queryset.update(is_active=False)
+        tracked_update(queryset, is_active=False)
     deactivate.short_description = "Désactiver"
 
     def activate(self, request, queryset):
-        queryset.update(is_active=True)
+        tracked_update(queryset, is_active=True)
     activate.short_description = "Activer"
 
 
@@ -1047,7 +993,7 @@ class NewsletterAdmin(admin.ModelAdmin):
 # ============================================
 
 @admin.register(SystemModel)
-class SystemModelAdmin(admin.ModelAdmin):
+class SystemModelAdmin(ChangelistStatsMixin, admin.ModelAdmin):
     """Admin for pre-defined system models."""
 
     list_display = ['image_preview', 'name', 'system_type', 'dimensions_display', 'price_display', 'target_audience', 'is_featured', 'is_active', 'order']
@@ -1058,25 +1004,21 @@ class SystemModelAdmin(admin.ModelAdmin):
     ordering = ['order', '-created_at']
     change_list_template = 'admin/core/systemmodel_changelist.html'
 
-    def changelist_view(self, request, extra_context=None):
-        extra_context = extra_context or {}
+    stats_counters = {
+        'total': Q(),
+        'active': Q(is_active=True),
+        'featured': Q(is_featured=True),
+    }
+    stats_aggregates = {
+        'avg_price': Avg('price', filter=Q(is_active=True)),
+        'types_count': Count('system_type', distinct=True),
+    }
+    stats_groups = {
+        'by_type': GroupBy('system_type'),
+    }
 
-        total = SystemModel.objects.count()
-        active = SystemModel.objects.filter(is_active=True).count()
-        featured = SystemModel.objects.filter(is_featured=True).count()
-        avg_price = SystemModel.objects.filter(is_active=True).aggregate(avg=Avg('price'))['avg'] or 0
-        types_count = SystemModel.objects.values('system_type').distinct().count()
-        by_type = list(SystemModel.objects.values('system_type').annotate(count=Count('id')).order_by('-count'))
-
-        extra_context['kpi'] = {
-            'total': total,
-            'active': active,
-            'featured': featured,
-            'avg_price': f"{avg_price:,.0f}".replace(",", " "),
-            'types_count': types_count,
-            'by_type': by_type,
-        }
-        return super().changelist_view(request, extra_context)
+    def get_kpi(self, stats):
+        return {**stats, 'avg_price': f"{stats['avg_price'] or 0:,.0f}".replace(",", " ")}
 
     fieldsets = (
         ('Informations principales', {
@@ -1105,9 +1047,7 @@ class SystemModelAdmin(admin.ModelAdmin):
     )
 
     def image_preview(self, obj):
-        if obj.image:
-            return format_html('<img src="{}" width="60" height="60" style="object-fit:cover;border-radius:8px;"/>', obj.image.url)
-        return "-"
+        return thumbnails.preview(obj.image, 60, 60, radius='8px')
     image_preview.short_description = "Image"
 
     def dimensions_display(self, obj):
@@ -1129,7 +1069,7 @@ class SystemModelAdmin(admin.ModelAdmin):
 # ============================================
 
 @admin.register(Award)
-class AwardAdmin(admin.ModelAdmin):
+class AwardAdmin(ChangelistStatsMixin, admin.ModelAdmin):
     """Admin for awards and distinctions."""
 
     list_display = ['image_preview', 'title', 'organization', 'year', 'order', 'is_active']
@@ -1151,39 +1091,23 @@ class AwardAdmin(admin.ModelAdmin):
         }),
     )
 
-    def changelist_view(self, request, extra_context=None):
-        extra_context = extra_context or {}
-        current_year = date.today().year
-
-        total = Award.objects.count()
-        active = Award.objects.filter(is_active=True).count()
-        this_year = Award.objects.filter(year=current_year).count()
-        with_image = Award.objects.exclude(image='').count()
-
+    stats_counters = {
+        'total_awards': Q(),
+        'active_count': Q(is_active=True),
+        'this_year_count': lambda: Q(year=date.today().year),
+        'with_image_count': ~Q(image=''),
+    }
+    stats_aggregates = {
         # Organisations uniques
-        organizations = Award.objects.values('organization').distinct().count()
-
+        'organizations_count': Count('organization', distinct=True),
+    }
+    stats_groups = {
         # Par année
-        by_year = list(
-            Award.objects.values('year')
-            .annotate(count=Count('id'))
-            .order_by('-year')[:5]
-        )
-
-        extra_context['kpi'] = {
-            'total_awards': total,
-            'active_count': active,
-            'this_year_count': this_year,
-            'with_image_count': with_image,
-            'organizations_count': organizations,
-            'by_year': by_year,
-        }
-        return super().changelist_view(request, extra_context)
+        'by_year': GroupBy('year', order_by=('-year',), limit=5),
+    }
 
     def image_preview(self, obj):
-        if obj.image:
-            return format_html('<img src="{}" width="50" height="50" style="object-fit:cover;border-radius:8px;"/>', obj.image.url)
-        return "-"
+        return thumbnails.preview(obj.image, 50, 50, radius='8px')
     image_preview.short_description = "Image"
 
 
@@ -1192,7 +1116,7 @@ class AwardAdmin(admin.ModelAdmin):
 # ============================================
 
 @admin.register(QuizQuestion)
-class QuizQuestionAdmin(admin.ModelAdmin):
+class QuizQuestionAdmin(ChangelistStatsMixin, admin.ModelAdmin):
     """Admin for quiz questions - CRUD from backoffice."""
 
     list_display = ['question_short', 'correct_answer_preview', 'order', 'is_active', 'created_at']
@@ -1202,28 +1126,20 @@ class QuizQuestionAdmin(admin.ModelAdmin):
     ordering = ['order', '-created_at']
     change_list_template = 'admin/core/quizquestion_changelist.html'
 
-    def changelist_view(self, request, extra_context=None):
-        extra_context = extra_context or {}
-
-        total = QuizQuestion.objects.count()
-        active = QuizQuestion.objects.filter(is_active=True).count()
-        total_participations = GameParticipation.objects.count()
+    stats_counters = {
+        'total': Q(),
+        'active': Q(is_active=True),
+    }
+    stats_models = (QuizQuestion, GameParticipation)
 
+    def get_extra_stats(self):
+        stats = rollups.summary(['game.participations', 'game.quizzes', 'game.quiz_percent'])
         # Calculer score moyen
-        participations_with_score = GameParticipation.objects.filter(quiz_total__gt=0)
-        if participations_with_score.exists():
-            scores = [p.quiz_score / p.quiz_total * 100 for p in participations_with_score]
-            avg_score = round(sum(scores) / len(scores)) if scores else 0
-        else:
-            avg_score = 0
-
-        extra_context['kpi'] = {
-            'total': total,
-            'active': active,
-            'total_participations': total_participations,
-            'avg_score': avg_score,
+        quizzes = stats.get('game.quizzes')
+        return {
+            'total_participations': stats.get('game.participations'),
+            'avg_score': round(stats.get('game.quiz_percent') / quizzes) if quizzes else 0,
         }
-        return super().changelist_view(request, extra_context)
 
     fieldsets = (
         ('Question', {
@@ -1265,55 +1181,112 @@ class QuizQuestionAdmin(admin.ModelAdmin):
 
     def activate_questions(self, request, queryset):
         queryset.update(is_active=True)
+        # QuerySet.update() n'envoie aucun signal : banque de questions à recharger
+        invalidate_model(QuizQuestion)
         self.message_user(request, f"{queryset.count()} question(s) activée(s)")
     activate_questions.short_description = "Activer les questions sélectionnées"
 
     def deactivate_questions(self, request, queryset):
         queryset.update(is_active=False)
+        invalidate_model(QuizQuestion)
         self.message_user(request, f"{queryset.count()} question(s) désactivée(s)")
     deactivate_questions.short_description = "Désactiver les questions sélectionnées"
 
 
+class WheelSimulationForm(forms.Form):
+    """Parameters of a wheel campaign simulation."""
+    MAX_SPINS = 20_000_000
+
+    participants = forms.IntegerField(min_value=1, max_value=1_000_000, initial=1000,
+                                      label="Participants attendus")
+    runs = forms.IntegerField(min_value=1, max_value=10_000, initial=1000,
+                              label="Campagnes simulées")
+    average_order = forms.IntegerField(min_value=0, initial=DEFAULT_AVERAGE_ORDER,
+                                       label="Panier moyen (FCFA)")
+    delivery_fee = forms.IntegerField(min_value=0, initial=DEFAULT_DELIVERY_FEE,
+                                      label="Coût livraison offerte (FCFA)")
+    free_item_value = forms.IntegerField(min_value=0, initial=DEFAULT_FREE_ITEM_VALUE,
+                                         label="Valeur article offert (FCFA)")
+    redemption_rate = forms.FloatField(min_value=0, max_value=1, initial=1.0,
+                                       label="Taux d'utilisation des codes (0 à 1)")
+
+    def clean(self):
+        cleaned_data = super().clean()
+        participants = cleaned_data.get('participants') or 0
+        runs = cleaned_data.get('runs') or 0
+        if participants * runs > self.MAX_SPINS:
+            raise forms.ValidationError(
+                f"Simulation trop grande : {self.MAX_SPINS:,} tirages maximum (participants x campagnes).".replace(",", " ")
+            )
+        return cleaned_data
+
+
 @admin.register(GamePrize)
-class GamePrizeAdmin(admin.ModelAdmin):
+class GamePrizeAdmin(ChangelistStatsMixin, admin.ModelAdmin):
     """Admin for wheel prizes - CRUD from backoffice."""
 
-    list_display = ['color_preview', 'name', 'prize_type_badge', 'discount_display', 'is_winning_prize', 'applies_to_fresh_products_only', 'order', 'is_active']
+    list_display = ['color_preview', 'name', 'prize_type_badge', 'discount_display', 'is_winning_prize', 'applies_to_fresh_products_only', 'probability', 'chance_display', 'stock_display', 'order', 'is_active']
     list_filter = ['prize_type', 'is_winning_prize', 'applies_to_fresh_products_only', 'is_active']
-    list_editable = ['order', 'is_active']
+    list_editable = ['probability', 'order', 'is_active']
     search_fields = ['name', 'description']  # Required for autocomplete
     ordering = ['order']
     change_list_template = 'admin/core/gameprize_changelist.html'
 
-    def changelist_view(self, request, extra_context=None):
-        extra_context = extra_context or {}
+    stats_counters = {
+        'total': Q(),
+        'active': Q(is_active=True),
+        'winning': Q(is_winning_prize=True),
+        'losing': Q(is_winning_prize=False),
+    }
+    stats_groups = {
+        # Répartition par type
+        'by_type': GroupBy('prize_type'),
+    }
+    stats_models = (GamePrize, GameParticipation)
 
-        total = GamePrize.objects.count()
-        active = GamePrize.objects.filter(is_active=True).count()
-        winning = GamePrize.objects.filter(is_winning_prize=True).count()
-        losing = GamePrize.objects.filter(is_winning_prize=False).count()
-        total_won = GameParticipation.objects.filter(prize__is_winning_prize=True).count()
+    def get_extra_stats(self):
+        return {'total_won': sum(dashboard.winning_prize_counts(rollups.summary(['game.prize'])).values())}
 
-        # Répartition par type
-        by_type = list(GamePrize.objects.values('prize_type').annotate(count=Count('id')).order_by('-count'))
+    def get_kpi(self, stats):
         prize_types = {
             'discount': 'Réduction',
             'free_delivery': 'Livraison gratuite',
             'free_item': 'Article offert',
             'lost': 'Perdu',
         }
-        for item in by_type:
-            item['prize_type_display'] = prize_types.get(item['prize_type'], item['prize_type'])
-
-        extra_context['kpi'] = {
-            'total': total,
-            'active': active,
-            'winning': winning,
-            'losing': losing,
-            'total_won': total_won,
-            'by_type': by_type,
+        by_type = [
+            {**item, 'prize_type_display': prize_types.get(item['prize_type'], item['prize_type'])}
+            for item in stats['by_type']
+        ]
+        return {**stats, 'by_type': by_type}
+
+    def get_urls(self):
+        custom_urls = [
+            path('simulation/', self.admin_site.admin_view(self.simulation_view),
+                 name='core_gameprize_simulation'),
+        ]
+        return custom_urls + super().get_urls()
+
+    def simulation_view(self, request):
+        """Monte Carlo simulation of a campaign with the current prize table."""
+        form = WheelSimulationForm(request.GET or None)
+        report = None
+        error = None
+        if form.is_valid():
+            try:
+                report = simulate_wheel(**form.cleaned_data)
+            except SimulationError as e:
+                error = str(e)
+
+        context = {
+            **self.admin_site.each_context(request),
+            'title': "Simulation d'une campagne",
+            'opts': self.model._meta,
+            'form': form,
+            'report': report,
+            'error': error,
         }
-        return super().changelist_view(request, extra_context)
+        return TemplateResponse(request, 'admin/core/gameprize_simulation.html', context)
 
     fieldsets = (
         ('Informations du prix', {
@@ -1328,10 +1301,19 @@ class GamePrizeAdmin(admin.ModelAdmin):
             'fields': ('applies_to_fresh_products_only', 'is_winning_prize'),
             'description': 'Décochez "Est un prix gagnant" pour les cases "Pas de chance"'
         }),
+        ('Probabilité', {
+            'fields': ('probability',),
+            'description': 'Poids relatif du prix lors du tirage de la roue'
+        }),
+        ('Stock', {
+            'fields': ('total_quota', 'daily_quota', 'awarded_count', 'awarded_today', 'awarded_date'),
+            'description': 'Un prix épuisé n\'est plus tiré : la probabilité se reporte sur les autres cases'
+        }),
         ('Options', {
             'fields': ('is_active',)
         }),
     )
+    readonly_fields = ['awarded_count', 'awarded_today', 'awarded_date']
 
     def color_preview(self, obj):
         return format_html(
@@ -1360,21 +1342,52 @@ class GamePrizeAdmin(admin.ModelAdmin):
         return "-"
     discount_display.short_description = "Réduction"
 
-    actions = ['activate_prizes', 'deactivate_prizes']
+    def chance_display(self, obj):
+        if not obj.is_active or not obj.probability:
+            return "-"
+        table = get_prize_table()
+        total = sum(table.weights)
+        if not total:
+            return "-"
+        return f"{obj.probability / total * 100:.1f} %"
+    chance_display.short_description = "Chance"
+
+    def stock_display(self, obj):
+        if not obj.has_quota:
+            return "Illimité"
+        parts = []
+        if obj.total_quota is not None:
+            parts.append(f"{obj.awarded_count}/{obj.total_quota}")
+        if obj.daily_quota is not None:
+            today_count = obj.awarded_today if obj.awarded_date == timezone.localdate() else 0
+            parts.append(f"{today_count}/{obj.daily_quota} auj.")
+        color = '#f44336' if obj.is_exhausted() else '#4caf50'
+        return format_html('<span style="color:{};font-weight:600;">{}</span>', color, ' · '.join(parts))
+    stock_display.short_description = "Stock"
+
+    actions = ['activate_prizes', 'deactivate_prizes', 'reset_quota_counters']
 
     def activate_prizes(self, request, queryset):
         queryset.update(is_active=True)
+        invalidate_prize_table()
         self.message_user(request, f"{queryset.count()} prix activé(s)")
     activate_prizes.short_description = "Activer les prix sélectionnés"
 
     def deactivate_prizes(self, request, queryset):
         queryset.update(is_active=False)
+        invalidate_prize_table()
         self.message_user(request, f"{queryset.count()} prix désactivé(s)")
     deactivate_prizes.short_description = "Désactiver les prix sélectionnés"
 
+    def reset_quota_counters(self, request, queryset):
+        count = queryset.update(awarded_count=0, awarded_today=0, awarded_date=None)
+        invalidate_prize_table()
+        self.message_user(request, f"Compteurs de {count} prix réinitialisés")
+    reset_quota_counters.short_description = "Réinitialiser les compteurs de stock"
+
 
 @admin.register(GameParticipation)
-class GameParticipationAdmin(admin.ModelAdmin):
+class GameParticipationAdmin(ChangelistStatsMixin, admin.ModelAdmin):
     """Admin for game participations (quiz + wheel)."""
 
     list_display = ['name', 'email', 'phone', 'quiz_score_display', 'prize_display', 'promo_code_display', 'promo_status', 'created_at']
@@ -1385,6 +1398,9 @@ class GameParticipationAdmin(admin.ModelAdmin):
     autocomplete_fields = ['prize']
     date_hierarchy = 'created_at'
     change_list_template = 'admin/core/gameparticipation_changelist.html'
+    # Tables volumineuses : comptage approché (core/paginator.py)
+    paginator = ApproximateCountPaginator
+    show_full_result_count = False
 
     fieldsets = (
         ('Participant', {
@@ -1403,42 +1419,38 @@ class GameParticipationAdmin(admin.ModelAdmin):
         }),
     )
 
-    def changelist_view(self, request, extra_context=None):
-        extra_context = extra_context or {}
-        now = timezone.now()
-        today = now.replace(hour=0, minute=0, second=0, microsecond=0)
-        week_ago = now - timedelta(days=7)
-
-        total = GameParticipation.objects.count()
-        today_count = GameParticipation.objects.filter(created_at__gte=today).count()
-        week_count = GameParticipation.objects.filter(created_at__gte=week_ago).count()
-        winners = GameParticipation.objects.filter(prize__is_winning_prize=True).count()
-        losers = GameParticipation.objects.filter(prize__is_winning_prize=False).count()
-        codes_used = GameParticipation.objects.filter(has_used_prize=True).count()
-        codes_pending = GameParticipation.objects.filter(
-            has_used_prize=False,
-            promo_code__isnull=False
-        ).exclude(promo_code='').count()
+    stats_models = (GameParticipation, GamePrize)
+
+    def get_extra_stats(self):
+        stats = rollups.summary(['game.participations', 'game.prize', 'game.codes', 'game.quiz_score'])
+
+        total = stats.get('game.participations')
+        today_count = stats.get('game.participations', window='today')
+        week_count = stats.get('game.participations', window='week')
+        prize_counts = stats.by_dimension('game.prize')
+        prizes = GamePrize.objects.filter(pk__in=[int(pk) for pk in prize_counts if pk])
+        winning_prizes = [prize for prize in prizes if prize.is_winning_prize]
+        winners = sum(prize_counts[str(prize.pk)] for prize in winning_prizes)
+        losers = sum(prize_counts[str(prize.pk)] for prize in prizes if not prize.is_winning_prize)
+        codes_used = stats.get('game.codes', 'used')
+        codes_pending = stats.get('game.codes', 'pending')
 
         win_rate = round((winners / total * 100)) if total > 0 else 0
 
         # Score moyen quiz
-        avg_score = GameParticipation.objects.aggregate(avg=Avg('quiz_score'))['avg']
+        avg_score = stats.get('game.quiz_score') / total if total else None
         quiz_total = 5  # Valeur par défaut
 
         # Répartition des prix
-        prizes_breakdown = list(
-            GameParticipation.objects.filter(prize__is_winning_prize=True)
-            .values('prize__name', 'prize__color')
-            .annotate(count=Count('id'))
-            .order_by('-count')[:5]
-        )
-        prizes_formatted = [
-            {'name': p['prize__name'], 'color': p['prize__color'], 'count': p['count']}
-            for p in prizes_breakdown
-        ]
-
-        extra_context['kpi'] = {
+        prizes_formatted = sorted(
+            [
+                {'name': prize.name, 'color': prize.color, 'count': prize_counts[str(prize.pk)]}
+                for prize in winning_prizes
+            ],
+            key=lambda p: p['count'], reverse=True
+        )[:5]
+
+        return {
             'total_participations': total,
             'today_count': today_count,
             'week_count': week_count,
@@ -1451,6 +1463,15 @@ class GameParticipationAdmin(admin.ModelAdmin):
             'quiz_total': quiz_total,
             'prizes_breakdown': prizes_formatted,
         }
+
+    def get_queryset(self, request):
+        # Prix nullable : ignoré par le select_related() automatique de la liste
+        return super().get_queryset(request).select_related('prize')
+
+    def changelist_view(self, request, extra_context=None):
+        extra_context = extra_context or {}
+        # Filtre de Bloom d'éligibilité (métriques du worker courant)
+        extra_context['participant_filter'] = participant_filter_metrics()
         return super().changelist_view(request, extra_context)
 
     def quiz_score_display(self, obj):
@@ -1490,12 +1511,12 @@ class GameParticipationAdmin(admin.ModelAdmin):
     actions = ['mark_as_used', 'mark_as_unused']
 
     def mark_as_used(self, request, queryset):
-        updated = queryset.filter(promo_code__isnull=False).exclude(promo_code='').update(has_used_prize=True)
+        updated = tracked_update(queryset.filter(promo_code__isnull=False).exclude(promo_code=''), has_used_prize=True)
         self.message_user(request, f"{updated} code(s) promo marqué(s) comme utilisé(s)")
     mark_as_used.short_description = "Marquer les codes comme utilisés"
 
     def mark_as_unused(self, request, queryset):
-        updated = queryset.update(has_used_prize=False)
+        updated = tracked_update(queryset, has_used_prize=False)
         self.message_user(request, f"{updated} code(s) promo marqué(s) comme non utilisé(s)")
     mark_as_unused.short_description = "Marquer les codes comme non utilisés"
 
@@ -1505,7 +1526,7 @@ class GameParticipationAdmin(admin.ModelAdmin):
 # ============================================
 
 @admin.register(FishSpecies)
-class FishSpeciesAdmin(admin.ModelAdmin):
+class FishSpeciesAdmin(ChangelistStatsMixin, admin.ModelAdmin):
     """Admin pour les espèces de poissons."""
     list_display = ['image_preview', 'name', 'order', 'is_active']
     list_filter = ['is_active']
@@ -1514,29 +1535,19 @@ class FishSpeciesAdmin(admin.ModelAdmin):
     ordering = ['order', 'name']
     change_list_template = 'admin/core/fishspecies_changelist.html'
 
-    def changelist_view(self, request, extra_context=None):
-        extra_context = extra_context or {}
-
-        total = FishSpecies.objects.count()
-        active = FishSpecies.objects.filter(is_active=True).count()
-        with_image = FishSpecies.objects.exclude(image='').exclude(image__isnull=True).count()
-
-        extra_context['kpi'] = {
-            'total': total,
-            'active': active,
-            'with_image': with_image,
-        }
-        return super().changelist_view(request, extra_context)
+    stats_counters = {
+        'total': Q(),
+        'active': Q(is_active=True),
+        'with_image': filled('image'),
+    }
 
     def image_preview(self, obj):
-        if obj.image:
-            return format_html('<img src="{}" width="50" height="50" style="object-fit:cover;border-radius:8px;"/>', obj.image.url)
-        return "-"
+        return thumbnails.preview(obj.image, 50, 50, radius='8px')
     image_preview.short_description = "Image"
 
 
 @admin.register(CropType)
-class CropTypeAdmin(admin.ModelAdmin):
+class CropTypeAdmin(ChangelistStatsMixin, admin.ModelAdmin):
     """Admin pour les types de cultures."""
     list_display = ['image_preview', 'name', 'category', 'order', 'is_active']
     list_filter = ['category', 'is_active']
@@ -1545,33 +1556,25 @@ class CropTypeAdmin(admin.ModelAdmin):
     ordering = ['order', 'name']
     change_list_template = 'admin/core/croptype_changelist.html'
 
-    def changelist_view(self, request, extra_context=None):
-        extra_context = extra_context or {}
-
-        total = CropType.objects.count()
-        active = CropType.objects.filter(is_active=True).count()
-        categories = CropType.objects.values('category').distinct().count()
-        with_image = CropType.objects.exclude(image='').exclude(image__isnull=True).count()
-        by_category = list(CropType.objects.values('category').annotate(count=Count('id')).order_by('-count'))
-
-        extra_context['kpi'] = {
-            'total': total,
-            'active': active,
-            'categories': categories,
-            'with_image': with_image,
-            'by_category': by_category,
-        }
-        return super().changelist_view(request, extra_context)
+    stats_counters = {
+        'total': Q(),
+        'active': Q(is_active=True),
+        'with_image': filled('image'),
+    }
+    stats_aggregates = {
+        'categories': Count('category', distinct=True),
+    }
+    stats_groups = {
+        'by_category': GroupBy('category'),
+    }
 
     def image_preview(self, obj):
-        if obj.image:
-            return format_html('<img src="{}" width="50" height="50" style="object-fit:cover;border-radius:8px;"/>', obj.image.url)
-        return "-"
+        return thumbnails.preview(obj.image, 50, 50, radius='8px')
     image_preview.short_description = "Image"
 
 
 @admin.register(BasinType)
-class BasinTypeAdmin(admin.ModelAdmin):
+class BasinTypeAdmin(ChangelistStatsMixin, admin.ModelAdmin):
     """Admin pour les types de bassins."""
     list_display = ['image_preview', 'name', 'order', 'is_active']
     list_filter = ['is_active']
@@ -1580,29 +1583,19 @@ class BasinTypeAdmin(admin.ModelAdmin):
     ordering = ['order', 'name']
     change_list_template = 'admin/core/basintype_changelist.html'
 
-    def changelist_view(self, request, extra_context=None):
-        extra_context = extra_context or {}
-
-        total = BasinType.objects.count()
-        active = BasinType.objects.filter(is_active=True).count()
-        with_image = BasinType.objects.exclude(image='').exclude(image__isnull=True).count()
-
-        extra_context['kpi'] = {
-            'total': total,
-            'active': active,
-            'with_image': with_image,
-        }
-        return super().changelist_view(request, extra_context)
+    stats_counters = {
+        'total': Q(),
+        'active': Q(is_active=True),
+        'with_image': filled('image'),
+    }
 
     def image_preview(self, obj):
-        if obj.image:
-            return format_html('<img src="{}" width="50" height="50" style="object-fit:cover;border-radius:8px;"/>', obj.image.url)
-        return "-"
+        return thumbnails.preview(obj.image, 50, 50, radius='8px')
     image_preview.short_description = "Image"
 
 
 @admin.register(HydroSystemType)
-class HydroSystemTypeAdmin(admin.ModelAdmin):
+class HydroSystemTypeAdmin(ChangelistStatsMixin, admin.ModelAdmin):
     """Admin pour les types de systèmes hydroponiques."""
     list_display = ['image_preview', 'name', 'code', 'order', 'is_active']
     list_filter = ['is_active']
@@ -1611,31 +1604,20 @@ class HydroSystemTypeAdmin(admin.ModelAdmin):
     ordering = ['order', 'name']
     change_list_template = 'admin/core/hydrosystemtype_changelist.html'
 
-    def changelist_view(self, request, extra_context=None):
-        extra_context = extra_context or {}
-
-        total = HydroSystemType.objects.count()
-        active = HydroSystemType.objects.filter(is_active=True).count()
-        with_code = HydroSystemType.objects.exclude(code='').exclude(code__isnull=True).count()
-        with_image = HydroSystemType.objects.exclude(image='').exclude(image__isnull=True).count()
-
-        extra_context['kpi'] = {
-            'total': total,
-            'active': active,
-            'with_code': with_code,
-            'with_image': with_image,
-        }
-        return super().changelist_view(request, extra_context)
+    stats_counters = {
+        'total': Q(),
+        'active': Q(is_active=True),
+        'with_code': filled('code'),
+        'with_image': filled('image'),
+    }
 
     def image_preview(self, obj):
-        if obj.image:
-            return format_html('<img src="{}" width="50" height="50" style="object-fit:cover;border-radius:8px;"/>', obj.image.url)
-        return "-"
+        return thumbnails.preview(obj.image, 50, 50, radius='8px')
     image_preview.short_description = "Image"
 
 
 @admin.register(TrainingType)
-class TrainingTypeAdmin(admin.ModelAdmin):
+class TrainingTypeAdmin(ChangelistStatsMixin, admin.ModelAdmin):
     """Admin pour les types de formations."""
     list_display = ['name', 'category', 'duration', 'price_display', 'order', 'is_active']
     list_filter = ['category', 'is_active']
@@ -1644,23 +1626,20 @@ class TrainingTypeAdmin(admin.ModelAdmin):
     ordering = ['order', 'name']
     change_list_template = 'admin/core/trainingtype_changelist.html'
 
-    def changelist_view(self, request, extra_context=None):
-        extra_context = extra_context or {}
+    stats_counters = {
+        'total': Q(),
+        'active': Q(is_active=True),
+    }
+    stats_aggregates = {
+        'avg_price': Avg('price'),
+        'categories': Count('category', distinct=True),
+    }
+    stats_groups = {
+        'by_category': GroupBy('category'),
+    }
 
-        total = TrainingType.objects.count()
-        active = TrainingType.objects.filter(is_active=True).count()
-        avg_price = TrainingType.objects.filter(price__isnull=False).aggregate(avg=Avg('price'))['avg'] or 0
-        categories = TrainingType.objects.values('category').distinct().count()
-        by_category = list(TrainingType.objects.values('category').annotate(count=Count('id')).order_by('-count'))
-
-        extra_context['kpi'] = {
-            'total': total,
-            'active': active,
-            'avg_price': f"{avg_price:,.0f}".replace(",", " "),
-            'categories': categories,
-            'by_category': by_category,
-        }
-        return super().changelist_view(request, extra_context)
+    def get_kpi(self, stats):
+        return {**stats, 'avg_price': f"{stats['avg_price'] or 0:,.0f}".replace(",", " ")}
 
     def price_display(self, obj):
         if obj.price:
@@ -1681,63 +1660,9 @@ class AquaRacineAdminSite(AdminSite):
     index_title = "Tableau de bord"
 
     def index(self, request, extra_context=None):
-        """Override index to add dashboard statistics."""
+        """Override index to add the latest items (statistics are loaded by the browser)."""
         extra_context = extra_context or {}
-
-        # Calculate date ranges
-        now = timezone.now()
-        week_ago = now - timedelta(days=7)
-        month_ago = now - timedelta(days=30)
-
-        # Main KPIs
-        quote_requests_count = QuoteRequest.objects.count()
-        contact_messages_count = ContactMessage.objects.count()
-        newsletter_subscribers_count = Newsletter.objects.filter(is_active=True).count()
-        products_count = Product.objects.filter(is_active=True).count()
-
-        # Weekly stats
-        quotes_this_week = QuoteRequest.objects.filter(created_at__gte=week_ago).count()
-        quotes_last_week = QuoteRequest.objects.filter(
-            created_at__gte=week_ago - timedelta(days=7),
-            created_at__lt=week_ago
-        ).count()
-
-        # Calculate percentage for progress bar (max 100%)
-        quotes_week_percent = min(quotes_this_week * 10, 100) if quotes_this_week else 0
-
-        # Pending quotes
-        pending_quotes = QuoteRequest.objects.filter(status='pending').count()
-
-        # Other counts
-        team_members_count = TeamMember.objects.filter(is_active=True).count()
-        gallery_images_count = GalleryImage.objects.filter(is_active=True).count()
-
-        # Recent items for dashboard lists
-        recent_quotes = QuoteRequest.objects.select_related().prefetch_related('installation_types').order_by('-created_at')[:5]
-        recent_messages = ContactMessage.objects.order_by('-created_at')[:5]
-        recent_subscribers = Newsletter.objects.filter(is_active=True).order_by('-created_at')[:5]
-        recent_game_participations = GameParticipation.objects.select_related('prize').order_by('-created_at')[:5]
-
-        # Build stats dictionary
-        extra_context['stats'] = {
-            'quote_requests_count': quote_requests_count,
-            'contact_messages_count': contact_messages_count,
-            'newsletter_subscribers_count': newsletter_subscribers_count,
-            'products_count': products_count,
-            'quotes_this_week': quotes_this_week,
-            'quotes_last_week': quotes_last_week,
-            'quotes_week_percent': quotes_week_percent,
-            'pending_quotes': pending_quotes,
-            'team_members_count': team_members_count,
-            'gallery_images_count': gallery_images_count,
-        }
-
-        # Recent items
-        extra_context['recent_quotes'] = recent_quotes
-        extra_context['recent_messages'] = recent_messages
-        extra_context['recent_subscribers'] = recent_subscribers
-        extra_context['recent_game_participations'] = recent_game_participations
-
+        extra_context.update(dashboard.get_recent_items())
         return super().index(request, extra_context=extra_context)
 
 
@@ -1752,146 +1677,61 @@ admin.site.index_title = "Tableau de bord"
 
 def get_dashboard_stats():
     """Helper function to get dashboard statistics for default admin."""
-    now = timezone.now()
-    week_ago = now - timedelta(days=7)
-
-    return {
-        'quote_requests_count': QuoteRequest.objects.count(),
-        'contact_messages_count': ContactMessage.objects.count(),
-        'newsletter_subscribers_count': Newsletter.objects.filter(is_active=True).count(),
-        'products_count': Product.objects.filter(is_active=True).count(),
-        'quotes_this_week': QuoteRequest.objects.filter(created_at__gte=week_ago).count(),
-        'pending_quotes': QuoteRequest.objects.filter(status='pending').count(),
-        'team_members_count': TeamMember.objects.filter(is_active=True).count(),
-        'gallery_images_count': GalleryImage.objects.filter(is_active=True).count(),
-    }
+    return dashboard.get_dashboard_stats()
 
 
 # Override default admin index
 original_index = admin.site.index
 
 def custom_admin_index(request, extra_context=None):
-    """Override default admin index to include stats."""
+    """Override default admin index to include the latest items."""
     extra_context = extra_context or {}
+    extra_context.update(dashboard.get_recent_items())
+    return original_index(request, extra_context=extra_context)
 
-    now = timezone.now()
-    week_ago = now - timedelta(days=7)
-    month_ago = now - timedelta(days=30)
-
-    # Comptages de base
-    total_quotes = QuoteRequest.objects.count()
-    pending_quotes = QuoteRequest.objects.filter(status='pending').count()
-    processed_quotes = QuoteRequest.objects.filter(status='processed').count()
-    quotes_this_week = QuoteRequest.objects.filter(created_at__gte=week_ago).count()
-    quotes_this_month = QuoteRequest.objects.filter(created_at__gte=month_ago).count()
+admin.site.index = custom_admin_index
 
-    # Taux de conversion (devis traités / total)
-    conversion_rate = round((processed_quotes / total_quotes * 100), 1) if total_quotes > 0 else 0
 
-    # Messages non lus (on considère les messages récents comme "non lus")
-    unread_messages = ContactMessage.objects.filter(created_at__gte=week_ago).count()
-    total_messages = ContactMessage.objects.count()
+def dashboard_stats_view(request):
+    """
+    Dashboard widgets as JSON, for the admin home page (staff only).
 
-    # Newsletter stats
-    total_subscribers = Newsletter.objects.filter(is_active=True).count()
-    new_subscribers_week = Newsletter.objects.filter(is_active=True, created_at__gte=week_ago).count()
-    new_subscribers_month = Newsletter.objects.filter(is_active=True, created_at__gte=month_ago).count()
+    ``?widget=kpis&widget=charts`` selects the widgets, all by default.
+    """
+    if not (request.user.is_active and request.user.is_staff):
+        return JsonResponse({'detail': "Accès réservé à l'équipe."}, status=403)
 
-    # Devis par type d'installation
-    quotes_by_type = []
-    try:
-        from django.db.models import Count
-        quotes_by_type = list(
-            QuoteRequest.objects.values('installation_types__name')
-            .annotate(count=Count('id'))
-            .order_by('-count')[:5]
-        )
-    except Exception:
-        pass
+    names = request.GET.getlist('widget') or list(dashboard.WIDGETS)
+    unknown = [name for name in names if name not in dashboard.WIDGETS]
+    if unknown:
+        return JsonResponse({'detail': f"Widget inconnu : {', '.join(unknown)}"}, status=400)
 
-    # Devis par ville/région
-    quotes_by_city = []
-    try:
-        quotes_by_city = list(
-            QuoteRequest.objects.exclude(city__isnull=True).exclude(city='')
-            .values('city')
-            .annotate(count=Count('id'))
-            .order_by('-count')[:5]
-        )
-    except Exception:
-        pass
-
-    # Données mensuelles pour graphiques (12 derniers mois)
-    monthly_quotes = []
-    monthly_messages = []
-    monthly_labels = []
-    for i in range(11, -1, -1):
-        month_start = (now - timedelta(days=i*30)).replace(day=1)
-        if i > 0:
-            month_end = (now - timedelta(days=(i-1)*30)).replace(day=1)
-        else:
-            month_end = now
-
-        monthly_labels.append(month_start.strftime('%b'))
-        monthly_quotes.append(QuoteRequest.objects.filter(
-            created_at__gte=month_start, created_at__lt=month_end
-        ).count())
-        monthly_messages.append(ContactMessage.objects.filter(
-            created_at__gte=month_start, created_at__lt=month_end
-        ).count())
-
-    # Participations au jeu
-    game_participations_count = GameParticipation.objects.count()
-    game_winners_count = GameParticipation.objects.filter(prize__is_winning_prize=True).count()
-
-    # Stats complètes
-    extra_context['stats'] = {
-        # KPIs principaux
-        'quote_requests_count': total_quotes,
-        'pending_quotes': pending_quotes,
-        'processed_quotes': processed_quotes,
-        'conversion_rate': conversion_rate,
-
-        # Messages
-        'contact_messages_count': total_messages,
-        'unread_messages': unread_messages,
-
-        # Newsletter
-        'newsletter_subscribers_count': total_subscribers,
-        'new_subscribers_week': new_subscribers_week,
-        'new_subscribers_month': new_subscribers_month,
-
-        # Tendances
-        'quotes_this_week': quotes_this_week,
-        'quotes_this_month': quotes_this_month,
-        'quotes_week_percent': min(quotes_this_week * 10, 100),
-
-        # Contenu
-        'products_count': Product.objects.filter(is_active=True).count(),
-        'categories_count': ProductCategory.objects.count() if 'ProductCategory' in dir() else 0,
-        'team_members_count': TeamMember.objects.filter(is_active=True).count(),
-        'gallery_images_count': GalleryImage.objects.filter(is_active=True).count(),
-        'services_count': Service.objects.filter(is_active=True).count(),
-        'blog_posts_count': BlogPost.objects.filter(is_published=True).count() if hasattr(BlogPost, 'is_published') else BlogPost.objects.count(),
-
-        # Jeu
-        'game_participations_count': game_participations_count,
-        'game_winners_count': game_winners_count,
-
-        # Données pour graphiques
-        'quotes_by_type': quotes_by_type,
-        'quotes_by_city': quotes_by_city,
-        'monthly_quotes': monthly_quotes,
-        'monthly_messages': monthly_messages,
-        'monthly_labels': monthly_labels,
-    }
+    now = time.time()
+    widgets = {}
+    for name in names:
+        entry = dashboard.get_widget(name)
+        widgets[name] = {'data': entry['data'], 'age': int(now - entry['computed_at'])}
 
-    # Recent items
-    extra_context['recent_quotes'] = QuoteRequest.objects.select_related().prefetch_related('installation_types').order_by('-created_at')[:5]
-    extra_context['recent_messages'] = ContactMessage.objects.order_by('-created_at')[:5]
-    extra_context['recent_subscribers'] = Newsletter.objects.filter(is_active=True).order_by('-created_at')[:5]
-    extra_context['recent_game_participations'] = GameParticipation.objects.select_related('prize').order_by('-created_at')[:5]
+    response = JsonResponse({'widgets': widgets})
+    patch_cache_control(
+        response, private=True,
+        max_age=settings.DASHBOARD_STATS_MAX_AGE,
+        stale_while_revalidate=settings.DASHBOARD_STATS_STALE,
+    )
+    return response
 
-    return original_index(request, extra_context=extra_context)
 
-admin.site.index = custom_admin_index
+def thumbnail_view(request, width, height, name):
+    """Generate the thumbnail of an uploaded image and redirect to it (staff only)."""
+    if not (request.user.is_active and request.user.is_staff):
+        return HttpResponseForbidden()
+    if not (0 < width <= thumbnails.MAX_SIZE and 0 < height <= thumbnails.MAX_SIZE):
+        raise Http404
+    try:
+        thumbnails.generate_thumbnail(name, width, height)
+    except FileNotFoundError:
+        raise Http404
+    except (OSError, Image.DecompressionBombError):
+        # Fichier illisible comme image (ou trop grand) : afficher l'original
+        return HttpResponseRedirect(default_storage.url(name))
+    return HttpResponseRedirect(default_storage.url(thumbnails.thumbnail_name(name, width, height)))
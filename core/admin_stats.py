@@ -0,0 +1,127 @@
+"""
+Declarative statistics for the admin changelists.
+
+Each ModelAdmin declares its KPIs instead of running its own queries:
+
+    stats_counters = {'total': Q(), 'active': Q(is_active=True)}
+    stats_aggregates = {'avg_price': Avg('price', filter=Q(is_active=True))}
+    stats_groups = {'by_category': GroupBy('category', limit=5)}
+
+Counters and aggregates are computed by one conditional-aggregation query,
+each group-by by one GROUP BY query. A counter may be a callable returning
+its condition (for date windows). Results are cached for
+``ADMIN_STATS_CACHE_TIMEOUT`` seconds under the cache namespaces of the
+models listed in ``stats_models`` (see core/caching.py), so saving or
+deleting one of them invalidates them. The time spent is reported in a
+``Server-Timing`` header and on the ``core.admin_stats`` logger.
+"""
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q
+
+from .caching import invalidate_model, make_key, model_namespace
+
+logger = logging.getLogger(__name__)
+
+
+def filled(field):
+    """Condition "field is neither NULL nor empty"."""
+    return Q(**{f'{field}__isnull': False}) & ~Q(**{field: ''})
+
+
+class GroupBy:
+    """Row count per value of ``field`` (list of dicts ``{key: value, 'count': n}``)."""
+
+    def __init__(self, field, alias=None, filter=None, order_by=('-count',), limit=None):
+        self.field = field
+        self.alias = alias
+        self.filter = filter
+        self.order_by = order_by
+        self.limit = limit
+
+    def evaluate(self, queryset):
+        if self.filter is not None:
+            queryset = queryset.filter(self.filter)
+        rows = queryset.values(self.field).annotate(count=Count('pk')).order_by(*self.order_by)
+        rows = rows[:self.limit] if self.limit else rows
+        key = self.alias or self.field
+        return [{key: row[self.field], 'count': row['count']} for row in rows]
+
+
+def compute_stats(queryset, counters=None, aggregates=None, groups=None):
+    """Evaluate a stats spec: one aggregate query plus one query per group-by."""
+    expressions = {}
+    for name, condition in (counters or {}).items():
+        if callable(condition):
+            condition = condition()
+        expressions[name] = Count('pk', filter=condition) if condition else Count('pk')
+    expressions.update(aggregates or {})
+
+    stats = queryset.aggregate(**expressions) if expressions else {}
+    for name, group in (groups or {}).items():
+        stats[name] = group.evaluate(queryset)
+    return stats
+
+
+class ChangelistStatsMixin:
+    """
+    ModelAdmin mixin computing ``kpi`` for the changelist template.
+
+    Override ``get_extra_stats()`` for values coming from other tables and
+    ``get_kpi()`` to derive the template values from the raw statistics.
+    """
+    stats_counters = {}
+    stats_aggregates = {}
+    stats_groups = {}
+    # Modèles dont une modification invalide le cache (par défaut : le modèle)
+    stats_models = ()
+
+    def get_stats_cache_key(self):
+        namespaces = [model_namespace(model) for model in self.stats_models or (self.model,)]
+        return make_key(f'admin_stats:{self.model._meta.label_lower}', namespaces)
+
+    def get_stats_queryset(self):
+        return self.model._default_manager.all()
+
+    def get_extra_stats(self):
+        return {}
+
+    def get_kpi(self, stats):
+        return stats
+
+    def get_changelist_stats(self):
+        """Statistics of the changelist and the time spent, from the cache when possible."""
+        started = time.perf_counter()
+        key = self.get_stats_cache_key()
+        stats = cache.get(key)
+        cached = stats is not None
+        if not cached:
+            stats = compute_stats(
+                self.get_stats_queryset(), self.stats_counters, self.stats_aggregates, self.stats_groups
+            )
+            stats.update(self.get_extra_stats())
+            cache.set(key, stats, getattr(settings, 'ADMIN_STATS_CACHE_TIMEOUT', 30))
+        timing = {'elapsed_ms': (time.perf_counter() - started) * 1000, 'cached': cached}
+        logger.debug("Statistiques %s : %.1f ms (%s)", self.model._meta.label,
+                     timing['elapsed_ms'], 'cache' if cached else 'base')
+        return stats, timing
+
+    def response_action(self, request, queryset):
+        # Les actions groupées utilisent souvent QuerySet.update() (aucun signal)
+        response = super().response_action(request, queryset)
+        invalidate_model(self.model)
+        return response
+
+    def changelist_view(self, request, extra_context=None):
+        extra_context = extra_context or {}
+        stats, timing = self.get_changelist_stats()
+        extra_context['kpi'] = self.get_kpi(stats)
+        extra_context['stats_timing'] = timing
+        response = super().changelist_view(request, extra_context)
+        response['Server-Timing'] = 'stats;dur={:.1f};desc="{}"'.format(
+            timing['elapsed_ms'], 'cache' if timing['cached'] else 'db'
+        )
+        return response
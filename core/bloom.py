@@ -0,0 +1,55 @@
+"""
+Bloom filter used as an in-memory pre-check before database lookups.
+
+A negative answer is definitive (the key was never added); a positive answer
+only means "probably", and must be confirmed by the database.
+"""
+import hashlib
+import math
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter sized for ``capacity`` keys at ``error_rate``."""
+
+    def __init__(self, capacity, error_rate=0.01):
+        self.capacity = max(int(capacity), 1)
+        self.error_rate = error_rate
+        # Taille optimale : m = -n ln(p) / ln(2)², k = m/n ln(2)
+        self.size = max(int(math.ceil(-self.capacity * math.log(error_rate) / math.log(2) ** 2)), 8)
+        self.hash_count = max(int(round(self.size / self.capacity * math.log(2))), 1)
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key):
+        # Double hachage (Kirsch-Mitzenmacher) à partir d'un seul condensé
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hash_count)]
+
+    def add(self, key):
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key):
+        return all(
+            self.bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(key)
+        )
+
+    def __len__(self):
+        return self.count
+
+    @property
+    def is_full(self):
+        return self.count > self.capacity
+
+    @property
+    def memory_bytes(self):
+        return len(self.bits)
+
+    @property
+    def false_positive_rate(self):
+        """Estimated false positive rate for the keys added so far."""
+        return (1 - math.exp(-self.hash_count * self.count / self.size)) ** self.hash_count
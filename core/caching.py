@@ -0,0 +1,410 @@
+"""
+Cache namespaces of Aqua-Racine.
+
+Every cached value belongs to one or more namespaces (``site``, ``home``,
+``site-data``...). ``MODEL_NAMESPACES`` lists, for each model of
+``core.models``, the namespaces its rows appear in; each model also has its
+own namespace (``model:<app>.<model>``).
+
+A namespace has a version stored in the shared cache and the versions of
+its namespaces are part of every key. Saving or deleting a row (see
+``core/signals.py``) replaces the versions of the model's namespaces, so
+the old entries are simply no longer read and expire on their own: no key
+has to be tracked or deleted.
+
+    data = cached('site-data', ['site-data'], build_site_data)
+
+``hot_cached()`` adds a second tier for the small values read by most
+requests (site settings, categories, wheel segments): a bounded LRU in
+each worker, checked against the shared namespace versions at most once
+every ``LOCAL_CACHE_CHECK_INTERVAL_MS``. Its values are shared by the
+threads of the worker and must be treated as read-only.
+
+Rebuilds are single-flight: one thread per worker (in-process coalescing)
+and one worker per cluster (lock taken with ``cache.add()`` in the shared
+cache; per process only with the file cache) recomputes a value,
+the others get the previous value, even from an older namespace version,
+or wait for the new one. Hot entries are recomputed before they expire
+with probabilistic early expiration (XFetch). They read the primary
+database, never a read replica (see core/routing.py).
+
+Bulk ``QuerySet.update()`` bypasses the signals: call ``invalidate_model()``.
+"""
+import math
+import pickle
+import random
+import secrets
+import threading
+import time
+from collections import OrderedDict
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.core.checks import Warning, register
+from django.db import transaction
+
+from .routing import primary
+
+# Namespaces affectés par chaque modèle (en plus du sien)
+MODEL_NAMESPACES = {
+    'SiteSettings': ('site', 'site-data'),
+    'PhoneNumber': ('site',),
+    'HeroSlide': ('home', 'site-data'),
+    'Service': ('home', 'site-data'),
+    'ProductCategory': ('home', 'site-data', 'catalog'),
+    'Product': ('home', 'site-data'),
+    'TeamMember': ('home', 'site-data'),
+    'BlogCategory': ('site-data', 'blog'),
+    'BlogPost': ('site-data',),
+    'TimelineStep': ('site-data',),
+    'GalleryImage': ('home', 'site-data'),
+    'Advantage': ('home', 'site-data'),
+    'Testimonial': ('home', 'site-data'),
+    'FAQ': ('site-data',),
+    'InstallationType': ('site', 'site-data'),
+    'SystemModel': ('home', 'quote-options'),
+    'Award': ('home',),
+    'FishSpecies': ('quote-options',),
+    'CropType': ('quote-options',),
+    'BasinType': ('quote-options',),
+    'HydroSystemType': ('quote-options',),
+    'TrainingType': ('quote-options',),
+    'GamePrize': ('game.prizes',),
+    'QuizQuestion': ('game.quiz',),
+    # Soumissions : seules les statistiques de l'admin en dépendent
+    'QuoteRequest': (),
+    'ContactMessage': (),
+    'Newsletter': (),
+    'GameParticipation': (),
+    'IdempotencyKey': (),
+    'DailyStat': (),
+    'RateLimitCounter': (),
+}
+
+# Durée de vie par défaut des entrées (les versions, elles, n'expirent pas)
+DEFAULT_TIMEOUT = 3600
+
+_MISSING = object()
+
+
+def version_key(namespace):
+    return f'ns:{namespace}:version'
+
+
+def model_namespace(model):
+    return f'model:{model._meta.label_lower}'
+
+
+def namespaces_for(model):
+    """Namespaces invalidated by a change of ``model`` (its own one first)."""
+    return (model_namespace(model),) + MODEL_NAMESPACES.get(model.__name__, ())
+
+
+def get_versions(namespaces):
+    """Current version of each namespace (one cache round trip)."""
+    keys = [version_key(namespace) for namespace in namespaces]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            # Version aléatoire : jamais celle d'anciennes entrées encore en cache
+            cache.add(key, secrets.token_hex(4), None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def versioned_key(key, versions):
+    return f"{key}:{'.'.join(map(str, versions))}"
+
+
+def make_key(key, namespaces):
+    """Cache key of ``key`` under the current versions of ``namespaces``."""
+    return versioned_key(key, get_versions(namespaces))
+
+
+def cached(key, namespaces, build, timeout=DEFAULT_TIMEOUT):
+    """Value of ``key`` from the cache, built with ``build()`` when missing."""
+    value, _ = fetch(key, get_versions(namespaces), build, timeout)
+    return value
+
+
+def invalidate(*namespaces):
+    """Give ``namespaces`` new versions once the current transaction is committed."""
+    def bump():
+        cache.set_many({version_key(namespace): secrets.token_hex(4) for namespace in namespaces}, None)
+        # Les autres workers le verront à leur prochaine vérification
+        local_cache.drop(namespaces)
+    transaction.on_commit(bump)
+
+
+def invalidate_model(model):
+    """Invalidate every namespace depending on ``model``."""
+    invalidate(*namespaces_for(model))
+
+
+# =============================================================================
+# SINGLE-FLIGHT ET EXPIRATION ANTICIPEE (XFETCH)
+# =============================================================================
+
+class SharedEntry:
+    """Value of the shared cache with its build time and logical expiry."""
+    __slots__ = ('value', 'delta', 'expires_at')
+
+    def __init__(self, value, delta, expires_at):
+        self.value = value
+        self.delta = delta
+        self.expires_at = expires_at
+
+    def should_refresh(self, now):
+        """
+        XFetch: expired, or randomly early, more likely as expiry gets
+        closer and the value gets longer to build.
+        """
+        gap = -self.delta * settings.CACHE_XFETCH_BETA * math.log(1.0 - random.random())
+        return now + gap >= self.expires_at
+
+
+class Flight:
+    """Rebuild in progress in this worker, awaited by the other threads."""
+    __slots__ = ('done', 'value', 'failed')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = _MISSING
+        self.failed = False
+
+
+_flights = {}
+_flights_lock = threading.Lock()
+
+
+def _entry(value):
+    return value if isinstance(value, SharedEntry) else None
+
+
+def _previous(stale, entry):
+    """Status of a previous value: still valid if it is the current entry before expiry."""
+    return 'fresh' if stale is entry and time.time() < entry.expires_at else 'stale'
+
+
+def _build(full_key, stale_key, build, timeout):
+    started = time.time()
+    # Jamais depuis un réplica en retard : la valeur resterait en cache
+    with primary():
+        value = build()
+    now = time.time()
+    entry = SharedEntry(value, now - started, now + timeout)
+    # La copie "stale" survit aux changements de version : servie pendant les recalculs
+    cache.set_many({full_key: entry, stale_key: entry}, timeout + settings.CACHE_STALE_GRACE)
+    return value
+
+
+def _wait_for(full_key):
+    """Poll the shared cache for the value another worker is building."""
+    deadline = time.monotonic() + settings.CACHE_SINGLE_FLIGHT_WAIT_MS / 1000
+    while time.monotonic() < deadline:
+        time.sleep(0.05)
+        entry = _entry(cache.get(full_key))
+        if entry is not None:
+            return entry.value
+    return _MISSING
+
+
+def fetch(key, versions, build, timeout):
+    """
+    Single-flight read-through of the shared cache.
+
+    Returns ``(value, status)``: ``'built'`` if this call ran ``build()``,
+    ``'stale'`` for a previous value served during a rebuild, else
+    ``'fresh'``.
+    """
+    full_key = versioned_key(key, versions)
+    stale_key = f'{key}:stale'
+    entries = cache.get_many([full_key, stale_key])
+    entry = _entry(entries.get(full_key))
+    if entry is not None and not entry.should_refresh(time.time()):
+        return entry.value, 'fresh'
+    stale = entry or _entry(entries.get(stale_key))
+
+    with _flights_lock:
+        flight = _flights.get(full_key)
+        leader = flight is None
+        if leader:
+            flight = _flights[full_key] = Flight()
+
+    if not leader:
+        if stale is not None:
+            return stale.value, _previous(stale, entry)
+        flight.done.wait(settings.CACHE_SINGLE_FLIGHT_WAIT_MS / 1000)
+        if flight.value is not _MISSING:
+            return flight.value, 'fresh'
+        # Recalcul en échec ou trop long : le faire soi-même
+        with primary():
+            return build(), 'built'
+
+    try:
+        lock_key = full_key + ':lock'
+        if cache.add(lock_key, 1, settings.CACHE_SINGLE_FLIGHT_LOCK_TIMEOUT):
+            try:
+                value, status = _build(full_key, stale_key, build, timeout), 'built'
+            finally:
+                cache.delete(lock_key)
+        elif stale is not None:
+            value, status = stale.value, _previous(stale, entry)
+        else:
+            value, status = _wait_for(full_key), 'fresh'
+            if value is _MISSING:
+                value, status = _build(full_key, stale_key, build, timeout), 'built'
+        if status != 'stale':
+            flight.value = value
+        return value, status
+    finally:
+        flight.done.set()
+        with _flights_lock:
+            _flights.pop(full_key, None)
+
+
+# =============================================================================
+# CACHE LOCAL (DEUXIEME NIVEAU)
+# =============================================================================
+
+class LocalEntry:
+    __slots__ = ('value', 'namespaces', 'versions', 'expires_at', 'checked_at', 'size')
+
+    def __init__(self, value, namespaces, versions, expires_at, checked_at, size):
+        self.value = value
+        self.namespaces = namespaces
+        self.versions = versions
+        self.expires_at = expires_at
+        self.checked_at = checked_at
+        self.size = size
+
+
+class LocalCache:
+    """
+    Per-worker LRU in front of the shared cache.
+
+    Entries expire after their timeout; beyond ``max_entries`` entries or
+    ``max_bytes`` (pickled size) the least recently used ones are evicted.
+    An entry is served without any round trip for ``check_interval``
+    seconds, then its namespace versions are compared with the shared ones.
+    """
+
+    def __init__(self, max_entries, max_bytes, check_interval):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.check_interval = check_interval
+        self.entries = OrderedDict()
+        self.size = 0
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.validations = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, namespaces, build, timeout):
+        now = time.monotonic()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry.expires_at <= now:
+                self._remove(key)
+                entry = None
+            if entry is not None:
+                self.entries.move_to_end(key)
+                if now - entry.checked_at < self.check_interval:
+                    self.hits += 1
+                    return entry.value
+
+        versions = get_versions(namespaces)
+        if entry is not None and entry.versions == versions:
+            entry.checked_at = now
+            with self.lock:
+                self.validations += 1
+            return entry.value
+
+        value, status = fetch(key, versions, build, timeout)
+        with self.lock:
+            if status == 'built':
+                self.misses += 1
+            else:
+                self.shared_hits += 1
+        if status != 'stale':
+            # Une valeur périmée n'est pas gardée : relue à la prochaine requête
+            self._store(key, LocalEntry(value, tuple(namespaces), versions, now + timeout, now, 0))
+        return value
+
+    def _store(self, key, entry):
+        entry.size = len(pickle.dumps(entry.value, pickle.HIGHEST_PROTOCOL))
+        if entry.size > self.max_bytes:
+            return
+        with self.lock:
+            if key in self.entries:
+                self._remove(key)
+            self.entries[key] = entry
+            self.size += entry.size
+            while len(self.entries) > self.max_entries or self.size > self.max_bytes:
+                self._remove(next(iter(self.entries)))
+                self.evictions += 1
+
+    def _remove(self, key):
+        self.size -= self.entries.pop(key).size
+
+    def drop(self, namespaces):
+        """Remove the entries depending on ``namespaces``."""
+        namespaces = set(namespaces)
+        with self.lock:
+            for key in [key for key, entry in self.entries.items() if namespaces.intersection(entry.namespaces)]:
+                self._remove(key)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+
+    def stats(self):
+        """Counters of this worker since it started."""
+        with self.lock:
+            local = self.hits + self.validations
+            total = local + self.shared_hits + self.misses
+            return {
+                'hits': self.hits,
+                'validations': self.validations,
+                'shared_hits': self.shared_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(self.entries),
+                'bytes': self.size,
+                'hit_rate': round(local / total * 100, 1) if total else None,
+            }
+
+
+local_cache = LocalCache(
+    settings.LOCAL_CACHE_MAX_ENTRIES,
+    settings.LOCAL_CACHE_MAX_BYTES,
+    settings.LOCAL_CACHE_CHECK_INTERVAL_MS / 1000,
+)
+
+
+def hot_cached(key, namespaces, build, timeout=DEFAULT_TIMEOUT):
+    """Like ``cached()``, with the worker's LRU in front of the shared cache."""
+    return local_cache.get(key, namespaces, build, timeout)
+
+
+def cache_stats():
+    """Hit/miss counters of the worker's local cache."""
+    return local_cache.stats()
+
+
+@register('caches')
+def check_model_namespaces(app_configs, **kwargs):
+    """Every model of ``core`` must be listed in ``MODEL_NAMESPACES``."""
+    return [
+        Warning(
+            f"{model.__name__} n'est pas déclaré dans MODEL_NAMESPACES.",
+            hint="Ajoutez-le dans core/caching.py avec les namespaces de cache qu'il affecte.",
+            obj=model, id='core.W001',
+        )
+        for model in apps.get_app_config('core').get_models()
+        if model.__name__ not in MODEL_NAMESPACES
+    ]
@@ -0,0 +1,206 @@
+"""
+Dashboard statistics for the Aqua-Racine admin.
+
+The home page is split into widgets loaded separately by the browser from
+``/admin/api/stats/?widget=<name>``, so a slow widget does not delay the
+others. Quote, message, newsletter and game statistics are read from the
+daily rollups (``core/rollups.py``), on calendar days in the site timezone
+(Africa/Abidjan), whatever the size of the raw tables.
+
+Widgets are cached with stale-while-revalidate: a fresh entry is served as
+is, a stale one is served immediately while one background thread
+recomputes it, and only a missing entry is computed during the request.
+"""
+import threading
+import time
+from datetime import datetime
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.utils import timezone
+
+from . import rollups
+from .models import (
+    Service, ProductCategory, Product, TeamMember, BlogPost, GalleryImage, FAQ,
+    QuoteRequest, ContactMessage, Newsletter, GameParticipation, GamePrize, InstallationType
+)
+
+MONTH_LABELS = ['Jan', 'Fév', 'Mar', 'Avr', 'Mai', 'Juin', 'Juil', 'Août', 'Sep', 'Oct', 'Nov', 'Déc']
+
+
+def month_starts(count=12, now=None):
+    """First instant of the last ``count`` calendar months, oldest first (site timezone)."""
+    now = timezone.localtime(now or timezone.now())
+    year, month = now.year, now.month
+    starts = []
+    for _ in range(count):
+        starts.append(timezone.make_aware(datetime(year, month, 1)))
+        year, month = (year, month - 1) if month > 1 else (year - 1, 12)
+    return starts[::-1]
+
+
+def winning_prize_counts(stats):
+    """{GamePrize: participations} of the winning prizes, from the ``game.prize`` rollup."""
+    counts = stats.by_dimension('game.prize')
+    prizes = GamePrize.objects.filter(is_winning_prize=True, pk__in=[int(pk) for pk in counts if pk])
+    return {prize: counts[str(prize.pk)] for prize in prizes}
+
+
+def top_dimensions(counts, limit=5):
+    return sorted(counts.items(), key=lambda item: item[1], reverse=True)[:limit]
+
+
+def quotes_by_type(stats, limit=5):
+    counts = stats.by_dimension(rollups.QUOTE_TYPE_METRIC)
+    names = dict(InstallationType.objects.filter(pk__in=[int(pk) for pk in counts]).values_list('pk', 'name'))
+    counts = {names[int(pk)]: count for pk, count in counts.items() if int(pk) in names}
+    return [{'name': name, 'count': count} for name, count in top_dimensions(counts, limit)]
+
+
+# =============================================================================
+# WIDGETS
+# =============================================================================
+
+def kpi_widget(now):
+    """Quote, message, newsletter and game KPIs (rollups)."""
+    stats = rollups.summary(
+        ['quotes', 'quotes.status', 'messages', 'subscribers.active', 'game.participations', 'game.prize'],
+        timezone.localdate(now)
+    )
+    quotes_total = stats.get('quotes')
+    processed = stats.get('quotes.status', 'processed')
+    quotes_week = stats.get('quotes', window='week')
+
+    return {
+        # KPIs principaux
+        'quote_requests_count': quotes_total,
+        'pending_quotes': stats.get('quotes.status', 'pending'),
+        'processed_quotes': processed,
+        'conversion_rate': round(processed / quotes_total * 100, 1) if quotes_total else 0,
+
+        # Messages
+        'contact_messages_count': stats.get('messages'),
+        # Messages récents considérés comme "non lus"
+        'unread_messages': stats.get('messages', window='week'),
+
+        # Newsletter
+        'newsletter_subscribers_count': stats.get('subscribers.active'),
+        'new_subscribers_week': stats.get('subscribers.active', window='week'),
+        'new_subscribers_month': stats.get('subscribers.active', window='month'),
+        'newsletter_growth': stats.get('subscribers.active', window='month'),
+
+        # Tendances
+        'quotes_this_week': quotes_week,
+        'quotes_last_week': stats.get('quotes', window='last_week'),
+        'quotes_this_month': stats.get('quotes', window='month'),
+        'quotes_week_percent': min(quotes_week * 10, 100),
+
+        # Jeu
+        'game_participations_count': stats.get('game.participations'),
+        'game_winners_count': sum(winning_prize_counts(stats).values()),
+    }
+
+
+def content_widget(now):
+    """Published content counts."""
+    return {
+        'products_count': Product.objects.filter(is_active=True).count(),
+        'categories_count': ProductCategory.objects.count(),
+        'team_members_count': TeamMember.objects.filter(is_active=True).count(),
+        'gallery_images_count': GalleryImage.objects.filter(is_active=True).count(),
+        'services_count': Service.objects.filter(is_active=True).count(),
+        'blog_posts_count': BlogPost.objects.filter(is_published=True).count(),
+        'faq_count': FAQ.objects.filter(is_active=True).count(),
+    }
+
+
+def chart_widget(now):
+    """Monthly series and quotes per installation type."""
+    starts = month_starts(12, now)
+    series = rollups.monthly(['quotes', 'messages'], starts)
+    return {
+        'monthly_quotes': series['quotes'],
+        'monthly_messages': series['messages'],
+        'month_labels': [MONTH_LABELS[start.month - 1] for start in starts],
+        'quotes_by_type': quotes_by_type(rollups.summary([rollups.QUOTE_TYPE_METRIC])),
+    }
+
+
+def city_widget(now):
+    """Quotes per city."""
+    stats = rollups.summary(['quotes', 'quotes.city'])
+    return {
+        'quote_requests_count': stats.get('quotes'),
+        'quotes_by_city': [
+            {'city': city, 'count': count}
+            for city, count in top_dimensions(stats.by_dimension('quotes.city'))
+        ],
+    }
+
+
+WIDGETS = {
+    'kpis': kpi_widget,
+    'content': content_widget,
+    'charts': chart_widget,
+    'cities': city_widget,
+}
+
+
+def get_dashboard_stats(now=None):
+    """All statistics of the admin home page (computed, not cached)."""
+    now = now or timezone.now()
+    stats = {}
+    for widget in WIDGETS.values():
+        stats.update(widget(now))
+    return stats
+
+
+# =============================================================================
+# CACHE (STALE-WHILE-REVALIDATE)
+# =============================================================================
+
+def widget_cache_key(name):
+    return f'dashboard:widget:{name}'
+
+
+def refresh_widget(name):
+    """Compute a widget and store it in the cache."""
+    entry = {'data': WIDGETS[name](timezone.now()), 'computed_at': time.time()}
+    max_age = settings.DASHBOARD_STATS_MAX_AGE
+    cache.set(widget_cache_key(name), entry, max_age + settings.DASHBOARD_STATS_STALE)
+    return entry
+
+
+def _refresh_in_background(name):
+    try:
+        refresh_widget(name)
+    finally:
+        cache.delete(widget_cache_key(name) + ':lock')
+        connection.close()
+
+
+def get_widget(name):
+    """
+    Cached widget entry ``{'data', 'computed_at'}``.
+
+    Stale entries are returned as is while a single background thread
+    (guarded by a cache lock) recomputes them.
+    """
+    entry = cache.get(widget_cache_key(name))
+    if entry is None:
+        return refresh_widget(name)
+    age = time.time() - entry['computed_at']
+    if age > settings.DASHBOARD_STATS_MAX_AGE and cache.add(widget_cache_key(name) + ':lock', 1, 60):
+        threading.Thread(target=_refresh_in_background, args=(name,), daemon=True).start()
+    return entry
+
+
+def get_recent_items():
+    """Latest quotes, messages, subscribers and game participations."""
+    return {
+        'recent_quotes': QuoteRequest.objects.prefetch_related('installation_types').order_by('-created_at')[:5],
+        'recent_messages': ContactMessage.objects.order_by('-created_at')[:5],
+        'recent_subscribers': Newsletter.objects.filter(is_active=True).order_by('-created_at')[:5],
+        'recent_game_participations': GameParticipation.objects.select_related('prize').order_by('-created_at')[:5],
+    }
@@ -0,0 +1,164 @@
+"""
+Database connection tuning.
+
+Connections are persistent (``CONN_MAX_AGE`` = ``DB_CONN_MAX_AGE``) and
+checked before being reused (``CONN_HEALTH_CHECKS``). SQLite connections
+get these pragmas as soon as they are opened:
+
+- ``journal_mode=WAL``: readers no longer wait for a writer (nor the other
+  way round), only writers are serialized;
+- ``synchronous=NORMAL``: durable with WAL, syncs at checkpoints only;
+- ``busy_timeout``: a writer waits for the lock instead of failing with
+  "database is locked";
+- ``mmap_size`` and ``cache_size``: reads from a memory map and a larger
+  page cache instead of read() calls.
+
+PostgreSQL connections (``DATABASE_URL``) get their statement timeout,
+keepalives and pooling mode from the settings (``get_postgres_options()``).
+
+WAL needs a local filesystem (shared memory index): on a network volume,
+set ``SQLITE_JOURNAL_MODE=DELETE``. ``benchmark_sqlite()`` (command
+``manage.py benchmark_sqlite``) compares both setups under mixed load.
+"""
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+
+# Réglages par défaut de Django / sqlite3 (mode journal "rollback")
+DEFAULT_PRAGMAS = [('journal_mode', 'DELETE'), ('synchronous', 'FULL'), ('busy_timeout', 5000)]
+
+
+def sqlite_pragmas():
+    """Pragmas of the SQLite connections, from the settings."""
+    return [
+        ('journal_mode', settings.SQLITE_JOURNAL_MODE),
+        ('synchronous', settings.SQLITE_SYNCHRONOUS),
+        ('busy_timeout', settings.SQLITE_BUSY_TIMEOUT_MS),
+        ('mmap_size', settings.SQLITE_MMAP_SIZE),
+        # Valeur négative : taille en KiB et non en pages
+        ('cache_size', -settings.SQLITE_CACHE_SIZE_KB),
+    ]
+
+
+def apply_pragmas(db, pragmas):
+    """Run ``PRAGMA name = value`` on a DB-API connection."""
+    for name, value in pragmas:
+        db.execute(f'PRAGMA {name} = {value}')
+
+
+def configure_connection(connection):
+    """Tune a connection just opened by Django (``connection_created``)."""
+    if connection.vendor == 'sqlite':
+        apply_pragmas(connection.connection, sqlite_pragmas())
+
+
+# =============================================================================
+# BENCHMARK
+# =============================================================================
+
+def _percentile(values, percent):
+    if not values:
+        return 0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * percent / 100))]
+
+
+def _run_load(path, pragmas, readers, duration, rows, write_pause):
+    """Readers and one writer on ``path`` for ``duration`` seconds."""
+    latencies = [[] for _ in range(readers)]
+    counters = {'writes': 0, 'errors': 0}
+    stop = threading.Event()
+    timeout = dict(pragmas).get('busy_timeout', 5000) / 1000
+
+    def connect():
+        db = sqlite3.connect(path, timeout=timeout, isolation_level=None)
+        apply_pragmas(db, pragmas)
+        return db
+
+    def read(index):
+        db = connect()
+        rng = random.Random(index)
+        while not stop.is_set():
+            started = time.perf_counter()
+            try:
+                # Lecture type "article + articles récents de la catégorie"
+                post = rng.randint(1, rows)
+                db.execute("SELECT title, views FROM post WHERE id = ?", [post]).fetchone()
+                db.execute(
+                    "SELECT id, title FROM post WHERE category = ? ORDER BY id DESC LIMIT 10", [post % 20]
+                ).fetchall()
+            except sqlite3.OperationalError:
+                counters['errors'] += 1
+                continue
+            latencies[index].append(time.perf_counter() - started)
+        db.close()
+
+    def write():
+        db = connect()
+        rng = random.Random(-1)
+        while not stop.is_set():
+            try:
+                # Compteur de vues + insertion d'un formulaire, dans une transaction
+                db.execute("BEGIN IMMEDIATE")
+                db.execute("UPDATE post SET views = views + 1 WHERE id = ?", [rng.randint(1, rows)])
+                db.execute("INSERT INTO message (body) VALUES (?)", ['x' * 200])
+                db.execute("COMMIT")
+                counters['writes'] += 1
+            except sqlite3.OperationalError:
+                counters['errors'] += 1
+                if db.in_transaction:
+                    db.execute("ROLLBACK")
+            time.sleep(write_pause)
+        db.close()
+
+    threads = [threading.Thread(target=read, args=(i,)) for i in range(readers)]
+    threads.append(threading.Thread(target=write))
+    for thread in threads:
+        thread.start()
+    time.sleep(duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    reads = [latency for reader in latencies for latency in reader]
+    return {
+        'reads_per_second': len(reads) / duration,
+        'writes_per_second': counters['writes'] / duration,
+        'read_p50_ms': _percentile(reads, 50) * 1000,
+        'read_p99_ms': _percentile(reads, 99) * 1000,
+        'read_max_ms': max(reads, default=0) * 1000,
+        'errors': counters['errors'],
+    }
+
+
+def benchmark_sqlite(readers=8, duration=5.0, rows=20000, write_pause=0.002, directory=None):
+    """
+    Mixed read/write load on a scratch database, with Django's default
+    pragmas then with ``sqlite_pragmas()``.
+
+    Returns ``{'default': report, 'tuned': report}``.
+    """
+    results = {}
+    for label, pragmas in (('default', DEFAULT_PRAGMAS), ('tuned', sqlite_pragmas())):
+        with tempfile.TemporaryDirectory(dir=directory) as tmp:
+            path = os.path.join(tmp, 'bench.sqlite3')
+            db = sqlite3.connect(path, isolation_level=None)
+            apply_pragmas(db, pragmas)
+            db.execute("CREATE TABLE post (id INTEGER PRIMARY KEY, category INTEGER, title TEXT, views INTEGER)")
+            db.execute("CREATE INDEX post_category ON post (category)")
+            db.execute("CREATE TABLE message (id INTEGER PRIMARY KEY, body TEXT)")
+            db.execute("BEGIN")
+            db.executemany(
+                "INSERT INTO post (id, category, title, views) VALUES (?, ?, ?, 0)",
+                ((i, i % 20, f'Article {i}') for i in range(1, rows + 1))
+            )
+            db.execute("COMMIT")
+            db.close()
+            results[label] = _run_load(path, pragmas, readers, duration, rows, write_pause)
+            results[label]['journal_mode'] = dict(pragmas)['journal_mode']
+    return results
@@ -0,0 +1,466 @@
+"""
+Game engine for the quiz & wheel game.
+
+Active GamePrize rows are loaded once per worker into a PrizeTable and drawn
+with Walker's alias method: a spin costs O(1), uses a cryptographically
+secure RNG and runs no database query. Prizes whose stock is exhausted are
+dropped from the table. Active QuizQuestion rows are cached the
+same way in a QuizBank, so serving and grading a quiz runs no query either.
+Both are rebuilt after any change, through their cache namespaces
+(see core/caching.py).
+
+Eligibility checks go through a per-worker Bloom filter of the players that
+already participated: only probable positives are confirmed by the database.
+"""
+import secrets
+import threading
+import time
+
+from django.core import signing
+from django.db.models import Q
+from django.utils import timezone
+
+from .bloom import BloomFilter
+from .caching import get_versions, hot_cached, invalidate
+from .models import GameParticipation, GamePrize, QuizQuestion, normalize_email, normalize_phone
+
+# NumPy est optionnel - utilisé uniquement pour les simulations de campagne
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    np = None
+    HAS_NUMPY = False
+
+# Namespaces de cache : nouvelle version à chaque modification d'un prix / d'une question
+PRIZES_NAMESPACE = 'game.prizes'
+WHEEL_SEGMENTS_KEY = 'game:wheel_segments'
+WHEEL_SEGMENTS_TIMEOUT = 24 * 3600
+QUIZ_NAMESPACE = 'game.quiz'
+
+# Jeton de quiz : questions servies, signées, valables 1 heure
+QUIZ_TOKEN_SALT = 'core.game.quiz'
+QUIZ_TOKEN_MAX_AGE = 3600
+QUIZ_SIZE = 4
+
+_rng = secrets.SystemRandom()
+_lock = threading.Lock()
+# Filtre de Bloom des participants : taux de faux positifs visé et rafraîchissement
+PARTICIPANT_FILTER_ERROR_RATE = 0.001
+PARTICIPANT_FILTER_MIN_CAPACITY = 10000
+PARTICIPANT_FILTER_REFRESH_SECONDS = 10
+# Trous de la séquence des pk relus pendant ce délai (validations dans le désordre)
+PARTICIPANT_FILTER_LATE_COMMIT_SECONDS = 120
+PARTICIPANT_FILTER_MAX_GAPS = 100
+
+_prize_table = None
+_quiz_bank = None
+_participant_filter = None
+# Construction du filtre des participants (distinct de _lock, qui sert aux lectures du jeu)
+_participant_filter_lock = threading.Lock()
+
+
+def build_alias_table(weights):
+    """
+    Build Walker's alias table for the given positive weights (Vose's method).
+
+    Returns ``(prob, alias)``: draw a column ``i`` uniformly, keep it with
+    probability ``prob[i]``, otherwise take ``alias[i]``.
+    """
+    n = len(weights)
+    total = float(sum(weights))
+    scaled = [w * n / total for w in weights]
+    prob = [0.0] * n
+    alias = list(range(n))
+
+    small = [i for i, p in enumerate(scaled) if p < 1.0]
+    large = [i for i, p in enumerate(scaled) if p >= 1.0]
+    while small and large:
+        s = small.pop()
+        g = large.pop()
+        prob[s] = scaled[s]
+        alias[s] = g
+        scaled[g] = (scaled[g] + scaled[s]) - 1.0
+        if scaled[g] < 1.0:
+            small.append(g)
+        else:
+            large.append(g)
+
+    # Restes dus aux arrondis : probabilité 1
+    for i in large + small:
+        prob[i] = 1.0
+    return prob, alias
+
+
+class PrizeTable:
+    """Immutable weighted table of prizes, sampled in O(1)."""
+
+    def __init__(self, items, weights, version=None, expires_on=None, dropped=()):
+        pairs = [(item, weight) for item, weight in zip(items, weights) if weight > 0]
+        self.items = [item for item, _ in pairs]
+        self.weights = [weight for _, weight in pairs]
+        self.version = version
+        # Date après laquelle la table doit être reconstruite (quotas journaliers)
+        self.expires_on = expires_on
+        # Prix retirés car leur stock est épuisé
+        self.dropped = tuple(dropped)
+        if self.items:
+            self.prob, self.alias = build_alias_table(self.weights)
+        else:
+            self.prob, self.alias = [], []
+
+    def __len__(self):
+        return len(self.items)
+
+    def __bool__(self):
+        return bool(self.items)
+
+    @property
+    def probabilities(self):
+        """Exact probability of each item."""
+        total = sum(self.weights)
+        return [weight / total for weight in self.weights]
+
+    def sample_index(self, rng=_rng):
+        """Draw the index of one item."""
+        i = rng.randrange(len(self.items))
+        if rng.random() < self.prob[i]:
+            return i
+        return self.alias[i]
+
+    def sample(self, rng=_rng):
+        """Draw one item."""
+        return self.items[self.sample_index(rng)]
+
+    def without(self, item):
+        """Copy of the table without ``item`` (no reload, same version)."""
+        pairs = [(i, w) for i, w in zip(self.items, self.weights) if i != item]
+        return PrizeTable(
+            [i for i, _ in pairs], [w for _, w in pairs], version=self.version,
+            expires_on=self.expires_on, dropped=self.dropped + (item,)
+        )
+
+    def sample_many(self, size, rng=None):
+        """
+        Draw ``size`` item indices at once with NumPy.
+
+        Same alias table and same draw as ``sample_index``, vectorized.
+        """
+        if rng is None:
+            rng = np.random.default_rng(secrets.randbits(128))
+        prob = np.asarray(self.prob)
+        alias = np.asarray(self.alias, dtype=np.int64)
+        columns = rng.integers(0, len(self.items), size)
+        return np.where(rng.random(size) < prob[columns], columns, alias[columns])
+
+
+def get_prize_table():
+    """Return the worker's table of active prizes, rebuilding it if stale."""
+    global _prize_table
+    version, = get_versions([PRIZES_NAMESPACE])
+    today = timezone.localdate()
+    table = _prize_table
+    if table is not None and table.version == version and table.expires_on in (None, today):
+        return table
+
+    with _lock:
+        table = _prize_table
+        if table is None or table.version != version or table.expires_on not in (None, today):
+            prizes = list(GamePrize.objects.filter(is_active=True).order_by('order'))
+            available = [prize for prize in prizes if not prize.is_exhausted(today)]
+            has_daily_quota = any(prize.daily_quota is not None for prize in prizes)
+            table = PrizeTable(
+                available, [prize.probability for prize in available], version=version,
+                expires_on=today if has_daily_quota else None,
+                dropped=[prize for prize in prizes if prize not in available],
+            )
+            _prize_table = table
+    return table
+
+
+def get_wheel_segments():
+    """
+    Display segments of the active prizes, in wheel order.
+
+    Kept in the worker's local cache and shared through the Django cache
+    under the prize table version, so the list is built with one query per
+    GamePrize change for all workers.
+    """
+    return hot_cached(WHEEL_SEGMENTS_KEY, [PRIZES_NAMESPACE], lambda: [
+        {
+            'label': prize.display_name,
+            'color': prize.color,
+            'icon': prize.icon,
+            'prize_type': prize.prize_type,
+            'is_winning': prize.is_winning_prize,
+        }
+        for prize in GamePrize.objects.filter(is_active=True).order_by('order')
+    ], WHEEL_SEGMENTS_TIMEOUT)
+
+
+def drop_prize(table, prize):
+    """
+    Remove an exhausted prize from the worker's table without reloading it.
+
+    Returns the reduced table to keep drawing from.
+    """
+    global _prize_table
+    reduced = table.without(prize)
+    with _lock:
+        if _prize_table is table:
+            _prize_table = reduced
+    return reduced
+
+
+def invalidate_prize_table():
+    """Drop the cached prize table in every worker."""
+    global _prize_table
+    _prize_table = None
+    invalidate(PRIZES_NAMESPACE)
+
+
+# =============================================================================
+# QUIZ
+# =============================================================================
+
+class InvalidQuizToken(Exception):
+    """Raised when a quiz token is forged or expired."""
+
+
+class QuizBank:
+    """
+    Immutable set of quiz questions with their answer key.
+
+    ``questions`` are dicts with ``id``, ``question``, ``options`` and
+    ``correct`` (0-based index), the format of the hardcoded QUIZ_QUESTIONS.
+    """
+
+    def __init__(self, questions, version=None):
+        self.ids = tuple(q['id'] for q in questions)
+        self.questions = {
+            q['id']: {'id': q['id'], 'question': q['question'], 'options': q['options']}
+            for q in questions
+        }
+        self.answer_key = {str(q['id']): q['correct'] for q in questions}
+        self.version = version
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __bool__(self):
+        return bool(self.ids)
+
+    def sample(self, k=QUIZ_SIZE, rng=_rng):
+        """Pick ``k`` random questions in their client format (no answers)."""
+        ids = rng.sample(self.ids, min(k, len(self.ids)))
+        return [self.questions[question_id] for question_id in ids]
+
+    def grade(self, answers, question_ids=None):
+        """
+        Return ``(score, total)`` for ``{question_id: selected_index}`` answers.
+
+        With ``question_ids`` (the questions actually served) every served
+        question counts, answered or not; otherwise only known answered
+        questions are counted.
+        """
+        if question_ids is None:
+            question_ids = [q_id for q_id in answers if str(q_id) in self.answer_key]
+        score = 0
+        for q_id in question_ids:
+            q_id = str(q_id)
+            if q_id in self.answer_key and answers.get(q_id) == self.answer_key[q_id]:
+                score += 1
+        return score, len(question_ids)
+
+
+def make_quiz_token(questions):
+    """Signed token listing the questions served to a player."""
+    return signing.dumps([q['id'] for q in questions], salt=QUIZ_TOKEN_SALT, compress=True)
+
+
+def read_quiz_token(token):
+    """Return the question ids of a quiz token."""
+    if not isinstance(token, str) or not token:
+        raise InvalidQuizToken(token)
+    try:
+        ids = signing.loads(token, salt=QUIZ_TOKEN_SALT, max_age=QUIZ_TOKEN_MAX_AGE)
+    except signing.BadSignature:
+        raise InvalidQuizToken(token)
+    if not isinstance(ids, list):
+        raise InvalidQuizToken(token)
+    return ids
+
+
+def get_quiz_bank():
+    """Return the worker's bank of active questions, rebuilding it if stale."""
+    global _quiz_bank
+    version, = get_versions([QUIZ_NAMESPACE])
+    bank = _quiz_bank
+    if bank is not None and bank.version == version:
+        return bank
+
+    with _lock:
+        bank = _quiz_bank
+        if bank is None or bank.version != version:
+            bank = QuizBank([
+                {'id': q.pk, 'question': q.question, 'options': q.options, 'correct': q.correct_index}
+                for q in QuizQuestion.objects.filter(is_active=True)
+            ], version=version)
+            _quiz_bank = bank
+    return bank
+
+
+def invalidate_quiz_bank():
+    """Drop the cached quiz bank in every worker."""
+    global _quiz_bank
+    _quiz_bank = None
+    invalidate(QUIZ_NAMESPACE)
+
+
+# =============================================================================
+# ELIGIBILITY
+# =============================================================================
+
+class ParticipantFilter:
+    """
+    Bloom filter of the normalized emails and phones that already played.
+
+    Built from GameParticipation, completed on insert in this worker (see
+    core/signals.py) and with rows inserted by other workers every
+    PARTICIPANT_FILTER_REFRESH_SECONDS. Rows are read by increasing pk; the
+    gaps of the sequence (rows not committed yet, or rolled back) are read
+    again for PARTICIPANT_FILTER_LATE_COMMIT_SECONDS, so a transaction that
+    commits after a higher pk is not missed. The unique indexes of
+    GameParticipation remain the final check.
+    """
+
+    def __init__(self, capacity):
+        self.bloom = BloomFilter(capacity, PARTICIPANT_FILTER_ERROR_RATE)
+        self.last_pk = 0
+        self.gaps = []  # [(premier pk, dernier pk, vu à)]
+        self.refreshed_at = 0.0
+        self.lock = threading.Lock()
+        self.refresh_lock = threading.Lock()
+        self.stats = {'checks': 0, 'db_skipped': 0, 'db_confirmed': 0, 'false_positives': 0}
+
+    def add(self, email_normalized, phone_e164):
+        with self.lock:
+            self._add(email_normalized, phone_e164)
+
+    def _add(self, email_normalized, phone_e164):
+        if email_normalized:
+            self.bloom.add('e:' + email_normalized)
+        if phone_e164:
+            self.bloom.add('p:' + phone_e164)
+
+    def count(self, *names):
+        with self.lock:
+            for name in names:
+                self.stats[name] += 1
+
+    def refresh(self):
+        """Add the participations committed since the last refresh (one query, no lock held)."""
+        now = time.monotonic()
+        gaps = [gap for gap in self.gaps if now - gap[2] < PARTICIPANT_FILTER_LATE_COMMIT_SECONDS]
+        condition = Q(pk__gt=self.last_pk)
+        for low, high, _ in gaps:
+            condition |= Q(pk__range=(low, high))
+        rows = list(GameParticipation.objects.filter(condition).order_by('pk').values_list(
+            'pk', 'email_normalized', 'phone_e164'
+        ))
+
+        last_pk = self.last_pk
+        for pk, _, _ in rows:
+            if pk > last_pk:
+                if pk > last_pk + 1:
+                    gaps.append((last_pk + 1, pk - 1, now))
+                last_pk = pk
+        if len(gaps) > PARTICIPANT_FILTER_MAX_GAPS:
+            # Trop de trous : un seul intervalle les couvre tous
+            gaps = [(min(gap[0] for gap in gaps), max(gap[1] for gap in gaps), now)]
+
+        with self.lock:
+            for _, email, phone in rows:
+                self._add(email, phone)
+            self.last_pk = last_pk
+            self.gaps = gaps
+            self.refreshed_at = now
+
+    def refresh_if_due(self):
+        """Refresh when due, unless another thread already does."""
+        if time.monotonic() - self.refreshed_at < PARTICIPANT_FILTER_REFRESH_SECONDS:
+            return
+        if self.refresh_lock.acquire(blocking=False):
+            try:
+                self.refresh()
+            finally:
+                self.refresh_lock.release()
+
+    def might_contain(self, email, phone):
+        email = normalize_email(email)
+        phone = normalize_phone(phone)
+        return bool(
+            (email and 'e:' + email in self.bloom) or (phone and 'p:' + phone in self.bloom)
+        )
+
+    def metrics(self):
+        with self.lock:
+            stats = dict(self.stats)
+        checks_with_db = stats['db_confirmed'] + stats['false_positives']
+        return {
+            **stats,
+            'keys': len(self.bloom),
+            'capacity': self.bloom.capacity,
+            'memory_bytes': self.bloom.memory_bytes,
+            'hash_count': self.bloom.hash_count,
+            'estimated_false_positive_rate': self.bloom.false_positive_rate,
+            'observed_false_positive_rate': (
+                stats['false_positives'] / checks_with_db if checks_with_db else 0.0
+            ),
+        }
+
+
+def get_participant_filter():
+    """Return the worker's participant filter, building or refreshing it if needed."""
+    global _participant_filter
+    participant_filter = _participant_filter
+    if participant_filter is None or participant_filter.bloom.is_full:
+        with _participant_filter_lock:
+            participant_filter = _participant_filter
+            if participant_filter is None or participant_filter.bloom.is_full:
+                # Deux clés (email, téléphone) par participation, avec de la marge
+                capacity = max(GameParticipation.objects.count() * 4, PARTICIPANT_FILTER_MIN_CAPACITY)
+                participant_filter = ParticipantFilter(capacity)
+                participant_filter.refresh()
+                _participant_filter = participant_filter
+        return participant_filter
+
+    participant_filter.refresh_if_due()
+    return participant_filter
+
+
+def remember_participant(participation):
+    """Add a new participation to this worker's filter, if it is loaded."""
+    participant_filter = _participant_filter
+    if participant_filter is not None:
+        participant_filter.add(participation.email_normalized, participation.phone_e164)
+
+
+def has_already_played(email=None, phone=None):
+    """
+    Eligibility check: a negative from the Bloom filter skips the database,
+    a probable positive is confirmed with one indexed query.
+    """
+    participant_filter = get_participant_filter()
+    if not participant_filter.might_contain(email, phone):
+        participant_filter.count('checks', 'db_skipped')
+        return False
+
+    played = GameParticipation.has_already_played(email=email, phone=phone)
+    participant_filter.count('checks', 'db_confirmed' if played else 'false_positives')
+    return played
+
+
+def participant_filter_metrics():
+    """Memory, false positive rate and hit counters of this worker's filter."""
+    return get_participant_filter().metrics()
@@ -0,0 +1,214 @@
+"""
+Idempotent form submissions for Aqua-Racine.
+
+Clients send an ``Idempotency-Key`` header (or an ``idempotency_key`` hidden
+form field). The first request with a given key is processed normally and its
+response is stored; retries with the same key get the stored response back
+without creating new rows or sending emails again.
+
+Keys are scoped to the client (IP and submitted email/phone): a key reused
+by another client is a new key and never replays someone else's response.
+"""
+import hashlib
+import json
+import random
+from datetime import timedelta
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.http import HttpResponse, JsonResponse
+from django.utils import timezone
+
+from .models import IdempotencyKey
+from .throttling import get_client_ip, get_identity_keys
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+IDEMPOTENCY_FIELD = 'idempotency_key'
+MAX_KEY_LENGTH = 128
+
+FORM_CONTENT_TYPES = ('application/x-www-form-urlencoded', 'multipart/form-data')
+
+
+def get_key_ttl():
+    """Lifetime of a stored response."""
+    return timedelta(seconds=getattr(settings, 'IDEMPOTENCY_KEY_TTL', 3600))
+
+
+def get_lock_timeout():
+    """Delay after which an unfinished reservation is considered abandoned."""
+    return timedelta(seconds=getattr(settings, 'IDEMPOTENCY_LOCK_TIMEOUT', 60))
+
+
+def get_idempotency_key(request):
+    """Return the client supplied key from the header or the form field."""
+    key = request.headers.get(IDEMPOTENCY_HEADER, '')
+    if not key and request.content_type in FORM_CONTENT_TYPES:
+        key = request.POST.get(IDEMPOTENCY_FIELD, '')
+    return key.strip()
+
+
+def get_client_fingerprint(request):
+    """Short hash of the client IP and of the email/phone of the submission."""
+    if request.content_type in FORM_CONTENT_TYPES:
+        data = request.POST
+    else:
+        try:
+            data = json.loads(request.body or b'{}')
+        except ValueError:
+            data = {}
+    if not isinstance(data, dict):
+        data = {}
+    identity = {field: data.get(field) for field in ('email', 'phone') if isinstance(data.get(field), str)}
+    parts = [get_client_ip(request) or ''] + get_identity_keys(identity)
+    return hashlib.sha256('|'.join(parts).encode('utf-8')).hexdigest()[:16]
+
+
+def make_full_key(scope, request, key):
+    """Stored key: scope, client fingerprint and client supplied key."""
+    return f"{scope}:{get_client_fingerprint(request)}:{key}"
+
+
+def _cache_key(full_key):
+    return 'idempotency:' + hashlib.sha256(full_key.encode('utf-8')).hexdigest()
+
+
+def reserve_key(full_key):
+    """
+    Reserve a key for processing.
+
+    Returns ``(record, is_owner)``. The unique index on ``IdempotencyKey.key``
+    guarantees that only one concurrent request becomes the owner.
+    """
+    now = timezone.now()
+
+    # Purge des clés expirées (de temps en temps seulement)
+    if random.random() < 0.01:
+        IdempotencyKey.objects.filter(expires_at__lt=now).delete()
+
+    try:
+        with transaction.atomic():
+            record = IdempotencyKey.objects.create(
+                key=full_key, created_at=now, expires_at=now + get_key_ttl()
+            )
+        return record, True
+    except IntegrityError:
+        pass
+
+    record = IdempotencyKey.objects.filter(key=full_key).first()
+    if record is None:
+        # Supprimée entre-temps par la purge : on retente une fois
+        return reserve_key(full_key)
+
+    if record.expires_at <= now or (
+        not record.is_complete and record.created_at <= now - get_lock_timeout()
+    ):
+        # Reprise atomique d'une clé expirée ou abandonnée
+        taken = IdempotencyKey.objects.filter(
+            pk=record.pk, created_at=record.created_at
+        ).update(
+            is_complete=False, status_code=None, content_type='', location='',
+            response_body=b'', created_at=now, expires_at=now + get_key_ttl()
+        )
+        if taken:
+            record.refresh_from_db()
+            return record, True
+
+    return record, False
+
+
+def store_response(record, response):
+    """Save the final response on the reservation and in the cache."""
+    record.is_complete = True
+    record.status_code = response.status_code
+    record.content_type = response.get('Content-Type', '')
+    record.location = response.get('Location', '')
+    record.response_body = response.content
+    record.save(update_fields=['is_complete', 'status_code', 'content_type', 'location', 'response_body'])
+
+    timeout = max(int((record.expires_at - timezone.now()).total_seconds()), 1)
+    cache.set(_cache_key(record.key), _serialize(record), timeout)
+
+
+def _serialize(record):
+    return {
+        'status_code': record.status_code,
+        'content_type': record.content_type,
+        'location': record.location,
+        'body': bytes(record.response_body),
+    }
+
+
+def _replay(stored):
+    response = HttpResponse(
+        stored['body'],
+        status=stored['status_code'],
+        content_type=stored['content_type'] or None,
+    )
+    if stored['location']:
+        response['Location'] = stored['location']
+    response['Idempotent-Replayed'] = 'true'
+    return response
+
+
+def idempotent(scope):
+    """
+    View decorator making POST submissions idempotent.
+
+    Use with ``method_decorator(idempotent('scope'), name='dispatch')``.
+    Requests without a key are processed as before.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def _wrapped_view(request, *args, **kwargs):
+            if request.method != 'POST':
+                return view_func(request, *args, **kwargs)
+
+            key = get_idempotency_key(request)
+            if not key:
+                return view_func(request, *args, **kwargs)
+            if len(key) > MAX_KEY_LENGTH:
+                return JsonResponse({
+                    'success': False,
+                    'message': "Clé d'idempotence invalide."
+                }, status=400)
+
+            full_key = make_full_key(scope, request, key)
+
+            # Chemin rapide : réponse déjà en cache, aucune requête SQL
+            stored = cache.get(_cache_key(full_key))
+            if stored is not None:
+                return _replay(stored)
+
+            record, is_owner = reserve_key(full_key)
+            if not is_owner:
+                if record.is_complete:
+                    stored = _serialize(record)
+                    cache.set(_cache_key(full_key), stored, int(get_key_ttl().total_seconds()))
+                    return _replay(stored)
+                response = JsonResponse({
+                    'success': False,
+                    'message': 'Votre demande est déjà en cours de traitement.'
+                }, status=409)
+                response['Retry-After'] = '1'
+                return response
+
+            try:
+                response = view_func(request, *args, **kwargs)
+                if hasattr(response, 'render') and callable(response.render):
+                    response = response.render()
+            except Exception:
+                record.delete()
+                raise
+
+            if response.status_code >= 400 or response.streaming:
+                # Erreur : on libère la clé pour permettre un nouvel essai corrigé
+                record.delete()
+                return response
+
+            store_response(record, response)
+            return response
+
+        return _wrapped_view
+    return decorator
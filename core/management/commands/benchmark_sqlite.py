@@ -0,0 +1,51 @@
+"""
+Compare SQLite read concurrency with the default and the tuned pragmas.
+
+    python manage.py benchmark_sqlite --readers 8 --duration 5
+"""
+from django.core.management.base import BaseCommand
+
+from core.database import benchmark_sqlite
+
+
+class Command(BaseCommand):
+    help = "Charge mixte lecture/écriture sur une base SQLite temporaire, réglages par défaut puis optimisés."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=8,
+                            help="Nombre de threads lecteurs")
+        parser.add_argument('--duration', type=float, default=5.0,
+                            help="Durée de chaque mesure en secondes")
+        parser.add_argument('--rows', type=int, default=20000,
+                            help="Nombre de lignes de la table lue")
+        parser.add_argument('--write-pause-ms', type=float, default=2.0,
+                            help="Pause de l'écrivain entre deux transactions (ms)")
+        parser.add_argument('--directory', default=None,
+                            help="Dossier de la base temporaire (même disque que la base réelle)")
+
+    def handle(self, *args, **options):
+        results = benchmark_sqlite(
+            readers=options['readers'],
+            duration=options['duration'],
+            rows=options['rows'],
+            write_pause=options['write_pause_ms'] / 1000,
+            directory=options['directory'],
+        )
+
+        self.stdout.write(
+            f"{'Réglages':<20}{'Lectures/s':>12}{'Écritures/s':>13}{'p50 ms':>9}{'p99 ms':>9}{'max ms':>9}{'Erreurs':>9}"
+        )
+        for label, report in results.items():
+            name = f"{label} ({report['journal_mode']})"
+            self.stdout.write(
+                f"{name:<20}{report['reads_per_second']:>12.0f}{report['writes_per_second']:>13.0f}"
+                f"{report['read_p50_ms']:>9.2f}{report['read_p99_ms']:>9.2f}{report['read_max_ms']:>9.1f}"
+                f"{report['errors']:>9}"
+            )
+
+        default, tuned = results['default'], results['tuned']
+        if default['reads_per_second']:
+            self.stdout.write(self.style.SUCCESS(
+                f"Lectures : x{tuned['reads_per_second'] / default['reads_per_second']:.1f}, "
+                f"p99 : {default['read_p99_ms']:.2f} -> {tuned['read_p99_ms']:.2f} ms"
+            ))
@@ -0,0 +1,115 @@
+"""
+HTTP load test of a running server (compare server configurations).
+
+    python manage.py load_test http://127.0.0.1:8000 --concurrency 16 --duration 20 \\
+        --url / --url /api/site-data/ --url /blog/ \\
+        --post /api/contact/ '{"name": "Test", "email": "test@example.com", ...}' --post-concurrency 2
+"""
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+def percentile(values, percent):
+    if not values:
+        return 0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * percent / 100))]
+
+
+class Command(BaseCommand):
+    help = "Test de charge HTTP : clients concurrents en boucle, débit et latences par URL."
+
+    def add_arguments(self, parser):
+        parser.add_argument('base_url', help="URL du serveur testé, ex. http://127.0.0.1:8000")
+        parser.add_argument('--url', action='append', default=[],
+                            help="Chemin lu en GET (option répétable, parcourus à tour de rôle)")
+        parser.add_argument('--concurrency', type=int, default=16,
+                            help="Nombre de clients GET simultanés")
+        parser.add_argument('--duration', type=float, default=20.0,
+                            help="Durée du test en secondes")
+        parser.add_argument('--post', nargs=2, metavar=('PATH', 'JSON'), default=None,
+                            help="Requête POST JSON envoyée en parallèle (ex. formulaire avec e-mail)")
+        parser.add_argument('--post-concurrency', type=int, default=1,
+                            help="Nombre de clients POST simultanés")
+        parser.add_argument('--timeout', type=float, default=30.0,
+                            help="Délai maximum d'une requête en secondes")
+
+    def handle(self, *args, **options):
+        base_url = options['base_url'].rstrip('/')
+        paths = options['url'] or ['/']
+        timeout = options['timeout']
+        results = {}
+        lock = threading.Lock()
+        stop = threading.Event()
+
+        def record(name, elapsed, ok):
+            with lock:
+                result = results.setdefault(name, {'latencies': [], 'errors': 0})
+                if ok:
+                    result['latencies'].append(elapsed)
+                else:
+                    result['errors'] += 1
+
+        def request(name, req):
+            started = time.perf_counter()
+            try:
+                with urllib.request.urlopen(req, timeout=timeout) as response:
+                    response.read()
+                ok = True
+            except (urllib.error.URLError, OSError):
+                ok = False
+            record(name, time.perf_counter() - started, ok)
+
+        def get_client(offset):
+            index = offset
+            while not stop.is_set():
+                path = paths[index % len(paths)]
+                request(f'GET {path}', base_url + path)
+                index += 1
+
+        def post_client(path, body):
+            while not stop.is_set():
+                req = urllib.request.Request(
+                    base_url + path, data=body, method='POST', headers={'Content-Type': 'application/json'}
+                )
+                request(f'POST {path}', req)
+
+        threads = [threading.Thread(target=get_client, args=(i,)) for i in range(options['concurrency'])]
+        if options['post']:
+            path, body = options['post']
+            try:
+                body = json.dumps(json.loads(body)).encode()
+            except ValueError:
+                raise CommandError("--post : le corps doit être du JSON valide")
+            threads += [threading.Thread(target=post_client, args=(path, body))
+                        for _ in range(options['post_concurrency'])]
+
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        time.sleep(options['duration'])
+        stop.set()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(f"{'Requête':<32}{'Req/s':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'Erreurs':>9}")
+        total, errors = [], 0
+        for name, result in sorted(results.items()):
+            latencies = result['latencies']
+            total += latencies
+            errors += result['errors']
+            self.stdout.write(
+                f"{name[:31]:<32}{len(latencies) / elapsed:>8.1f}{percentile(latencies, 50) * 1000:>9.0f}"
+                f"{percentile(latencies, 95) * 1000:>9.0f}{percentile(latencies, 99) * 1000:>9.0f}"
+                f"{result['errors']:>9}"
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f"Total : {len(total) / elapsed:.1f} req/s, p50 {percentile(total, 50) * 1000:.0f} ms, "
+            f"p99 {percentile(total, 99) * 1000:.0f} ms, {errors} erreurs"
+        ))
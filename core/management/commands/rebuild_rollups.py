@@ -0,0 +1,43 @@
+"""
+Rebuild the daily statistics (DailyStat) from the raw tables.
+
+    python manage.py rebuild_rollups
+    python manage.py rebuild_rollups --model game --since 2026-01-01
+
+Submissions saved while the command runs may be counted twice or missed:
+run it during a quiet period.
+"""
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.rollups import rebuild
+
+MODELS = {
+    'quotes': 'core.QuoteRequest',
+    'messages': 'core.ContactMessage',
+    'newsletter': 'core.Newsletter',
+    'game': 'core.GameParticipation',
+}
+
+
+class Command(BaseCommand):
+    help = "Recalcule les statistiques journalières du tableau de bord à partir des tables brutes."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--model', action='append', choices=sorted(MODELS),
+                            help="Données à recalculer (toutes par défaut, option répétable)")
+        parser.add_argument('--since', default=None,
+                            help="Premier jour à recalculer (AAAA-MM-JJ), tout l'historique par défaut")
+
+    def handle(self, *args, **options):
+        since = None
+        if options['since']:
+            try:
+                since = date.fromisoformat(options['since'])
+            except ValueError:
+                raise CommandError("Date invalide, format attendu : AAAA-MM-JJ")
+        models = [MODELS[name] for name in options['model'] or []]
+
+        written = rebuild(models=models or None, since=since)
+        self.stdout.write(self.style.SUCCESS(f"{written} statistiques journalières recalculées."))
@@ -0,0 +1,73 @@
+"""
+Simulate a wheel campaign before launching it.
+
+    python manage.py simulate_wheel --participants 5000 --runs 1000
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from core.simulation import (
+    SimulationError, simulate_wheel,
+    DEFAULT_AVERAGE_ORDER, DEFAULT_DELIVERY_FEE, DEFAULT_FREE_ITEM_VALUE,
+)
+
+
+def fcfa(amount):
+    return f"{amount:,.0f}".replace(",", " ") + " FCFA"
+
+
+class Command(BaseCommand):
+    help = "Simulation Monte Carlo des gains de la roue pour une campagne de jeu."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--participants', type=int, default=1000,
+                            help="Nombre de participants attendus par campagne")
+        parser.add_argument('--runs', type=int, default=1000,
+                            help="Nombre de campagnes simulées")
+        parser.add_argument('--average-order', type=float, default=DEFAULT_AVERAGE_ORDER,
+                            help="Panier moyen en FCFA (coût des réductions)")
+        parser.add_argument('--delivery-fee', type=float, default=DEFAULT_DELIVERY_FEE,
+                            help="Coût d'une livraison offerte en FCFA")
+        parser.add_argument('--free-item-value', type=float, default=DEFAULT_FREE_ITEM_VALUE,
+                            help="Valeur d'un article offert en FCFA")
+        parser.add_argument('--redemption-rate', type=float, default=1.0,
+                            help="Part des codes promo réellement utilisés (0 à 1)")
+        parser.add_argument('--seed', type=int, default=None,
+                            help="Graine aléatoire (résultats reproductibles)")
+
+    def handle(self, *args, **options):
+        try:
+            report = simulate_wheel(
+                participants=options['participants'],
+                runs=options['runs'],
+                average_order=options['average_order'],
+                delivery_fee=options['delivery_fee'],
+                free_item_value=options['free_item_value'],
+                redemption_rate=options['redemption_rate'],
+                seed=options['seed'],
+            )
+        except SimulationError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(
+            f"{report['total_spins']:,} tirages simulés "
+            f"({report['runs']} campagnes x {report['participants']} participants) "
+            f"en {report['elapsed']:.2f}s\n".replace(",", " ")
+        )
+        self.stdout.write(f"{'Prix':<28}{'Proba':>8}{'Gagnants':>12}{'IC 95%':>16}{'Coût moyen':>20}")
+        for row in report['prizes']:
+            interval = f"{row['low']}-{row['high']}"
+            self.stdout.write(
+                f"{row['name'][:27]:<28}{row['probability']:>7.1f}%{row['mean']:>12.1f}"
+                f"{interval:>16}{fcfa(row['expected_cost']):>20}"
+            )
+
+        winners = report['winners']
+        liability = report['liability']
+        self.stdout.write("")
+        self.stdout.write(
+            f"Gagnants par campagne : {winners['mean']:.1f} (IC 95% {winners['low']}-{winners['high']})"
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Coût promo attendu : {fcfa(liability['mean'])} "
+            f"(IC 95% {fcfa(liability['low'])} - {fcfa(liability['high'])})"
+        ))
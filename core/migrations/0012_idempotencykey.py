@@ -0,0 +1,31 @@
+# Generated by Django 4.2.30 on 2026-10-19 04:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_userprofile'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IdempotencyKey',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=200, unique=True, verbose_name='Clé')),
+                ('is_complete', models.BooleanField(default=False, verbose_name='Traitement terminé')),
+                ('status_code', models.PositiveSmallIntegerField(blank=True, null=True, verbose_name='Code HTTP')),
+                ('content_type', models.CharField(blank=True, max_length=100, verbose_name='Type de contenu')),
+                ('location', models.CharField(blank=True, max_length=500, verbose_name='Redirection')),
+                ('response_body', models.BinaryField(blank=True, default=b'', verbose_name='Réponse')),
+                ('created_at', models.DateTimeField(verbose_name='Date de création')),
+                ('expires_at', models.DateTimeField(db_index=True, verbose_name='Expiration')),
+            ],
+            options={
+                'verbose_name': "Clé d'idempotence",
+                'verbose_name_plural': "Clés d'idempotence",
+            },
+        ),
+    ]
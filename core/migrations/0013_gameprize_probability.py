@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-19 04:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_idempotencykey'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='gameprize',
+            name='probability',
+            field=models.PositiveIntegerField(default=1, help_text="Poids relatif du prix : un prix de poids 20 sort deux fois plus souvent qu'un prix de poids 10. 0 = jamais tiré.", verbose_name='Probabilité (poids)'),
+        ),
+    ]
@@ -0,0 +1,80 @@
+# Generated by Django 4.2.30 on 2026-10-19 04:33
+
+import re
+
+from django.db import migrations, models
+
+
+# Copies de core.models.normalize_email / normalize_phone au moment de la
+# migration : elle ne doit pas dépendre du code actuel du modèle
+def normalize_email(email):
+    return (email or '').strip().casefold()
+
+
+def normalize_phone(phone):
+    phone = (phone or '').strip()
+    digits = re.sub(r'\D', '', phone)
+    if not digits:
+        return ''
+    if digits.startswith('00'):
+        return '+' + digits[2:]
+    if phone.startswith('+'):
+        return '+' + digits
+    if digits.startswith('225') and len(digits) in (11, 13):
+        return '+' + digits
+    return '+225' + digits
+
+
+def backfill_identity(apps, schema_editor):
+    """
+    Fill the normalized columns of existing participations.
+
+    Only the oldest participation of a given email/phone keeps the value:
+    later duplicates stay NULL so the unique indexes can be created.
+    """
+    GameParticipation = apps.get_model('core', 'GameParticipation')
+    seen_emails = set()
+    seen_phones = set()
+    for participation in GameParticipation.objects.order_by('created_at', 'pk').iterator():
+        email = normalize_email(participation.email) or None
+        phone = normalize_phone(participation.phone) or None
+        if email in seen_emails:
+            email = None
+        if phone in seen_phones:
+            phone = None
+        seen_emails.add(email)
+        seen_phones.add(phone)
+        GameParticipation.objects.filter(pk=participation.pk).update(
+            email_normalized=email, phone_e164=phone
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_gameprize_probability'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='gameparticipation',
+            name='email_normalized',
+            field=models.CharField(editable=False, max_length=254, null=True, verbose_name='Email normalisé'),
+        ),
+        migrations.AddField(
+            model_name='gameparticipation',
+            name='phone_e164',
+            field=models.CharField(editable=False, max_length=20, null=True, verbose_name='Téléphone (E.164)'),
+        ),
+        migrations.RunPython(backfill_identity, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='gameparticipation',
+            name='email_normalized',
+            field=models.CharField(editable=False, max_length=254, null=True, unique=True, verbose_name='Email normalisé'),
+        ),
+        migrations.AlterField(
+            model_name='gameparticipation',
+            name='phone_e164',
+            field=models.CharField(editable=False, max_length=20, null=True, unique=True, verbose_name='Téléphone (E.164)'),
+        ),
+    ]
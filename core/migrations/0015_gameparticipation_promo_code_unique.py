@@ -0,0 +1,45 @@
+# Generated by Django 4.2.30 on 2026-10-19 04:34
+
+import secrets
+import string
+
+from django.db import migrations, models
+
+
+def normalize_promo_codes(apps, schema_editor):
+    """
+    Store promo codes uppercase, empty codes as NULL, and give a fresh code
+    to the (unlikely) later duplicates so the unique index can be created.
+    """
+    GameParticipation = apps.get_model('core', 'GameParticipation')
+    alphabet = string.ascii_uppercase + string.digits
+    seen = set()
+    for participation in GameParticipation.objects.order_by('created_at', 'pk').iterator():
+        code = (participation.promo_code or '').strip().upper() or None
+        if code is not None:
+            while code in seen:
+                code = 'AQUA' + ''.join(secrets.choice(alphabet) for _ in range(6))
+            seen.add(code)
+        if code != participation.promo_code:
+            GameParticipation.objects.filter(pk=participation.pk).update(promo_code=code)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_gameparticipation_identity'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='gameparticipation',
+            name='promo_code',
+            field=models.CharField(blank=True, help_text='Enregistré en majuscules - vide si aucun prix gagné', max_length=20, null=True, verbose_name='Code promo'),
+        ),
+        migrations.RunPython(normalize_promo_codes, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='gameparticipation',
+            name='promo_code',
+            field=models.CharField(blank=True, help_text='Enregistré en majuscules - vide si aucun prix gagné', max_length=20, null=True, unique=True, verbose_name='Code promo'),
+        ),
+    ]
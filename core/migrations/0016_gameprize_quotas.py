@@ -0,0 +1,38 @@
+# Generated by Django 4.2.30 on 2026-10-19 04:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_gameparticipation_promo_code_unique'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='gameprize',
+            name='awarded_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Gagnants (total)'),
+        ),
+        migrations.AddField(
+            model_name='gameprize',
+            name='awarded_date',
+            field=models.DateField(blank=True, editable=False, null=True, verbose_name='Jour du compteur'),
+        ),
+        migrations.AddField(
+            model_name='gameprize',
+            name='awarded_today',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Gagnants (jour)'),
+        ),
+        migrations.AddField(
+            model_name='gameprize',
+            name='daily_quota',
+            field=models.PositiveIntegerField(blank=True, help_text='Nombre maximum de gagnants par jour. Vide = illimité.', null=True, verbose_name='Quota journalier'),
+        ),
+        migrations.AddField(
+            model_name='gameprize',
+            name='total_quota',
+            field=models.PositiveIntegerField(blank=True, help_text='Nombre maximum de gagnants pour ce prix. Vide = illimité.', null=True, verbose_name='Quota total'),
+        ),
+    ]
@@ -0,0 +1,108 @@
+# Generated by Django 4.2.30 on 2026-10-19 04:46
+
+from collections import Counter
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+# Copie des indicateurs de core/rollups.py au moment de la migration :
+# elle ne dépend que des modèles historiques
+def quote_metrics(row):
+    yield 'quotes', '', 1
+    yield 'quotes.status', row['status'], 1
+    city = (row['city'] or '').strip()
+    if city:
+        yield 'quotes.city', city[:100], 1
+    if row['estimated_amount']:
+        yield 'quotes.amount', row['status'], int(row['estimated_amount'])
+
+
+def message_metrics(row):
+    yield 'messages', '', 1
+    yield 'messages.status', row['status'], 1
+
+
+def subscriber_metrics(row):
+    yield 'subscribers', '', 1
+    if row['is_active']:
+        yield 'subscribers.active', '', 1
+
+
+def participation_metrics(row):
+    yield 'game.participations', '', 1
+    yield 'game.prize', str(row['prize_id'] or ''), 1
+    if row['promo_code']:
+        yield 'game.codes', 'used' if row['has_used_prize'] else 'pending', 1
+    yield 'game.quiz_score', '', row['quiz_score']
+    if row['quiz_total']:
+        yield 'game.quizzes', '', 1
+        yield 'game.quiz_percent', '', round(row['quiz_score'] * 100 / row['quiz_total'])
+
+
+ROLLUPS = [
+    ('QuoteRequest', ('status', 'city', 'estimated_amount'), quote_metrics),
+    ('ContactMessage', ('status',), message_metrics),
+    ('Newsletter', ('is_active',), subscriber_metrics),
+    ('GameParticipation', ('prize_id', 'promo_code', 'has_used_prize', 'quiz_score', 'quiz_total'),
+     participation_metrics),
+]
+
+
+def backfill_rollups(apps, schema_editor):
+    """Compute the daily statistics of the existing submissions."""
+    DailyStat = apps.get_model('core', 'DailyStat')
+    counts = Counter()
+    for model_name, fields, metrics in ROLLUPS:
+        model = apps.get_model('core', model_name)
+        for row in model.objects.values('created_at', *fields).iterator():
+            if row['created_at']:
+                day = timezone.localdate(row['created_at'])
+                for metric, dimension, value in metrics(row):
+                    counts[(day, metric, dimension)] += value
+
+    QuoteRequest = apps.get_model('core', 'QuoteRequest')
+    links = QuoteRequest.installation_types.through.objects.values(
+        'quoterequest__created_at', 'installationtype_id'
+    )
+    for row in links.iterator():
+        day = timezone.localdate(row['quoterequest__created_at'])
+        counts[(day, 'quotes.type', str(row['installationtype_id']))] += 1
+
+    DailyStat.objects.bulk_create(
+        [
+            DailyStat(date=day, metric=metric, dimension=dimension, value=value)
+            for (day, metric, dimension), value in counts.items() if value
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_gameprize_quotas'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='Jour')),
+                ('metric', models.CharField(max_length=50, verbose_name='Indicateur')),
+                ('dimension', models.CharField(blank=True, default='', max_length=100, verbose_name='Dimension')),
+                ('value', models.BigIntegerField(default=0, verbose_name='Valeur')),
+            ],
+            options={
+                'verbose_name': 'Statistique journalière',
+                'verbose_name_plural': 'Statistiques journalières',
+                'ordering': ['-date', 'metric', 'dimension'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='dailystat',
+            constraint=models.UniqueConstraint(fields=('metric', 'date', 'dimension'), name='core_dailystat_unique'),
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.30 on 2026-10-19 05:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_dailystat'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RateLimitCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=300, verbose_name='Clé')),
+                ('window', models.BigIntegerField(verbose_name='Fenêtre')),
+                ('count', models.PositiveIntegerField(default=0, verbose_name='Requêtes')),
+                ('expires_at', models.DateTimeField(db_index=True, verbose_name='Expiration')),
+            ],
+            options={
+                'verbose_name': 'Compteur de limitation',
+                'verbose_name_plural': 'Compteurs de limitation',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='ratelimitcounter',
+            constraint=models.UniqueConstraint(fields=('key', 'window'), name='core_ratelimitcounter_unique'),
+        ),
+    ]
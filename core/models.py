@@ -1,7 +1,12 @@
 """
 Models for Aqua-Racine website management.
 """
+import re
+
+from django.core.exceptions import ValidationError
 from django.db import models
+from django.db.models import Case, F, Q, Value, When
+from django.utils import timezone
 from django.utils.text import slugify
 from django.core.validators import MinValueValidator, MaxValueValidator
 import uuid
@@ -824,9 +829,33 @@ class GamePrize(TimeStampedModel):
     )
     is_winning_prize = models.BooleanField(default=True, verbose_name="Est un prix gagnant",
                                            help_text="Décochez pour les cases 'Pas de chance'")
+    probability = models.PositiveIntegerField(
+        default=1,
+        verbose_name="Probabilité (poids)",
+        help_text="Poids relatif du prix : un prix de poids 20 sort deux fois plus souvent "
+                  "qu'un prix de poids 10. 0 = jamais tiré."
+    )
     is_active = models.BooleanField(default=True, verbose_name="Actif")
     order = models.PositiveIntegerField(default=0, verbose_name="Position sur la roue (0-7)")
 
+    # Stock du prix (vide = illimité)
+    total_quota = models.PositiveIntegerField(
+        null=True, blank=True,
+        verbose_name="Quota total",
+        help_text="Nombre maximum de gagnants pour ce prix. Vide = illimité."
+    )
+    daily_quota = models.PositiveIntegerField(
+        null=True, blank=True,
+        verbose_name="Quota journalier",
+        help_text="Nombre maximum de gagnants par jour. Vide = illimité."
+    )
+    # Compteurs mis à jour uniquement par claim() (UPDATE atomique)
+    awarded_count = models.PositiveIntegerField(default=0, editable=False, verbose_name="Gagnants (total)")
+    awarded_today = models.PositiveIntegerField(default=0, editable=False, verbose_name="Gagnants (jour)")
+    awarded_date = models.DateField(null=True, blank=True, editable=False, verbose_name="Jour du compteur")
+
+    QUOTA_COUNTER_FIELDS = ('awarded_count', 'awarded_today', 'awarded_date')
+
     class Meta:
         verbose_name = "Prix de la roue"
         verbose_name_plural = "Prix de la roue"
@@ -837,6 +866,49 @@ class GamePrize(TimeStampedModel):
             return f"{self.name} ({self.discount_percent}%)"
         return self.name
 
+    def save(self, *args, **kwargs):
+        # Ne jamais écraser les compteurs avec une valeur lue avant un tirage concurrent
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.QUOTA_COUNTER_FIELDS
+            ]
+        super().save(*args, **kwargs)
+
+    @property
+    def has_quota(self):
+        return self.total_quota is not None or self.daily_quota is not None
+
+    def is_exhausted(self, today=None):
+        """Whether the stock of the prize is used up (from the loaded counters)."""
+        today = today or timezone.localdate()
+        if self.total_quota is not None and self.awarded_count >= self.total_quota:
+            return True
+        if (self.daily_quota is not None and self.awarded_date == today
+                and self.awarded_today >= self.daily_quota):
+            return True
+        return False
+
+    def claim(self):
+        """
+        Take one unit of stock for a winner.
+
+        Single conditional UPDATE (row lock only): returns False when the
+        total or daily quota is reached. Prizes without quota are not counted.
+        """
+        if not self.has_quota:
+            return True
+        today = timezone.localdate()
+        return GamePrize.objects.filter(
+            Q(total_quota__isnull=True) | Q(awarded_count__lt=F('total_quota')),
+            Q(daily_quota__isnull=True) | ~Q(awarded_date=today) | Q(awarded_today__lt=F('daily_quota')),
+            pk=self.pk,
+        ).update(
+            awarded_count=F('awarded_count') + 1,
+            awarded_today=Case(When(awarded_date=today, then=F('awarded_today') + 1), default=Value(1)),
+            awarded_date=today,
+        ) == 1
+
     @property
     def display_name(self):
         """Name to display on the wheel."""
@@ -847,12 +919,47 @@ class GamePrize(TimeStampedModel):
         return self.name
 
 
+def normalize_email(email):
+    """Casefolded email used to detect duplicate participations."""
+    return (email or '').strip().casefold()
+
+
+def normalize_phone(phone):
+    """
+    Normalize an Ivorian phone number to E.164 (``+225`` + 10 digits).
+
+    Accepts local (``07 07 36 18 79``), ``00225`` and ``+225`` forms. Numbers
+    from other countries keep their own country code.
+    """
+    phone = (phone or '').strip()
+    digits = re.sub(r'\D', '', phone)
+    if not digits:
+        return ''
+    if digits.startswith('00'):
+        return '+' + digits[2:]
+    if phone.startswith('+'):
+        return '+' + digits
+    if digits.startswith('225') and len(digits) in (11, 13):
+        return '+' + digits
+    return '+225' + digits
+
+
 class GameParticipation(TimeStampedModel):
     """Track quiz and wheel game participations."""
     name = models.CharField(max_length=100, verbose_name="Nom complet")
     email = models.EmailField(verbose_name="Email")
     phone = models.CharField(max_length=20, verbose_name="Téléphone")
 
+    # Identité normalisée : index uniques = une seule participation par personne
+    email_normalized = models.CharField(
+        max_length=254, unique=True, null=True, editable=False,
+        verbose_name="Email normalisé"
+    )
+    phone_e164 = models.CharField(
+        max_length=20, unique=True, null=True, editable=False,
+        verbose_name="Téléphone (E.164)"
+    )
+
     quiz_score = models.PositiveIntegerField(default=0, verbose_name="Score au quiz")
     quiz_total = models.PositiveIntegerField(default=4, verbose_name="Nombre de questions")
 
@@ -863,7 +970,11 @@ class GameParticipation(TimeStampedModel):
         related_name='participations',
         verbose_name="Prix gagné"
     )
-    promo_code = models.CharField(max_length=20, blank=True, verbose_name="Code promo")
+    promo_code = models.CharField(
+        max_length=20, unique=True, null=True, blank=True,
+        verbose_name="Code promo",
+        help_text="Enregistré en majuscules - vide si aucun prix gagné"
+    )
 
     has_used_prize = models.BooleanField(default=False, verbose_name="Prix utilisé")
     ip_address = models.GenericIPAddressField(blank=True, null=True, verbose_name="Adresse IP")
@@ -877,11 +988,139 @@ class GameParticipation(TimeStampedModel):
         prize_display = self.get_prize_won_display() if self.prize_won else "En attente"
         return f"{self.name} - {prize_display} ({self.created_at.strftime('%d/%m/%Y')})"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_identity = (instance.__dict__.get('email'), instance.__dict__.get('phone'))
+        return instance
+
+    def get_identity(self):
+        """
+        Normalized (email, phone) to store on save.
+
+        Legacy duplicates kept with NULL columns by migration 0014 stay NULL
+        as long as their email/phone is not changed, so editing them does not
+        collide with the unique indexes.
+        """
+        loaded_email, loaded_phone = getattr(self, '_loaded_identity', (None, None))
+        email_normalized = self.email_normalized
+        if self._state.adding or email_normalized is not None or self.email != loaded_email:
+            email_normalized = normalize_email(self.email) or None
+        phone_e164 = self.phone_e164
+        if self._state.adding or phone_e164 is not None or self.phone != loaded_phone:
+            phone_e164 = normalize_phone(self.phone) or None
+        return email_normalized, phone_e164
+
+    def save(self, *args, **kwargs):
+        self.email_normalized, self.phone_e164 = self.get_identity()
+        self.promo_code = (self.promo_code or '').strip().upper() or None
+        super().save(*args, **kwargs)
+        self._loaded_identity = (self.email, self.phone)
+
+    def clean(self):
+        super().clean()
+        email_normalized, phone_e164 = self.get_identity()
+        condition = Q(pk__in=[])
+        if email_normalized:
+            condition |= Q(email_normalized=email_normalized)
+        if phone_e164:
+            condition |= Q(phone_e164=phone_e164)
+        if self.__class__.objects.filter(condition).exclude(pk=self.pk).exists():
+            raise ValidationError("Cet email ou ce téléphone a déjà participé au jeu.")
+
+    @classmethod
+    def identity_lookup(cls, email=None, phone=None):
+        """Participations matching the email or the phone (indexed columns)."""
+        condition = Q(pk__in=[])
+        email = normalize_email(email)
+        phone = normalize_phone(phone)
+        if email:
+            condition |= Q(email_normalized=email)
+        if phone:
+            condition |= Q(phone_e164=phone)
+        return cls.objects.filter(condition)
+
+    @classmethod
+    def redeem_promo_code(cls, code):
+        """
+        Mark an unused promo code as used.
+
+        Single conditional UPDATE: returns True only for the request that
+        actually redeemed the code.
+        """
+        code = (code or '').strip().upper()
+        if not code:
+            return False
+        redeemed = cls.objects.filter(promo_code=code, has_used_prize=False).update(
+            has_used_prize=True, updated_at=timezone.now()
+        ) == 1
+        if redeemed:
+            # UPDATE sans signal : mise à jour explicite des statistiques
+            from .rollups import apply, code_redeemed_deltas
+            created_at = cls.objects.filter(promo_code=code).values_list('created_at', flat=True).first()
+            apply(code_redeemed_deltas(created_at))
+        return redeemed
+
     @classmethod
     def has_already_played(cls, email=None, phone=None):
-        """Check if email or phone has already participated."""
-        if email and cls.objects.filter(email__iexact=email).exists():
-            return True
-        if phone and cls.objects.filter(phone=phone).exists():
-            return True
-        return False
+        """Check if email or phone has already participated (single query)."""
+        if not normalize_email(email) and not normalize_phone(phone):
+            return False
+        return cls.identity_lookup(email, phone).exists()
+
+
+class IdempotencyKey(models.Model):
+    """Stored response for an idempotent form submission (Idempotency-Key)."""
+    key = models.CharField(max_length=200, unique=True, verbose_name="Clé")
+    is_complete = models.BooleanField(default=False, verbose_name="Traitement terminé")
+    status_code = models.PositiveSmallIntegerField(blank=True, null=True, verbose_name="Code HTTP")
+    content_type = models.CharField(max_length=100, blank=True, verbose_name="Type de contenu")
+    location = models.CharField(max_length=500, blank=True, verbose_name="Redirection")
+    response_body = models.BinaryField(blank=True, default=b'', verbose_name="Réponse")
+    created_at = models.DateTimeField(verbose_name="Date de création")
+    expires_at = models.DateTimeField(db_index=True, verbose_name="Expiration")
+
+    class Meta:
+        verbose_name = "Clé d'idempotence"
+        verbose_name_plural = "Clés d'idempotence"
+
+    def __str__(self):
+        return self.key
+
+
+class DailyStat(models.Model):
+    """Daily rollup of a back-office metric (maintained by core/rollups.py)."""
+    date = models.DateField(verbose_name="Jour")
+    metric = models.CharField(max_length=50, verbose_name="Indicateur")
+    dimension = models.CharField(max_length=100, blank=True, default='', verbose_name="Dimension")
+    value = models.BigIntegerField(default=0, verbose_name="Valeur")
+
+    class Meta:
+        verbose_name = "Statistique journalière"
+        verbose_name_plural = "Statistiques journalières"
+        ordering = ['-date', 'metric', 'dimension']
+        constraints = [
+            models.UniqueConstraint(fields=['metric', 'date', 'dimension'], name='core_dailystat_unique'),
+        ]
+
+    def __str__(self):
+        dimension = f" [{self.dimension}]" if self.dimension else ""
+        return f"{self.date} {self.metric}{dimension} = {self.value}"
+
+
+class RateLimitCounter(models.Model):
+    """Shared request counter of one rate limit window (see core/throttling.py)."""
+    key = models.CharField(max_length=300, verbose_name="Clé")
+    window = models.BigIntegerField(verbose_name="Fenêtre")
+    count = models.PositiveIntegerField(default=0, verbose_name="Requêtes")
+    expires_at = models.DateTimeField(db_index=True, verbose_name="Expiration")
+
+    class Meta:
+        verbose_name = "Compteur de limitation"
+        verbose_name_plural = "Compteurs de limitation"
+        constraints = [
+            models.UniqueConstraint(fields=['key', 'window'], name='core_ratelimitcounter_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.key} [{self.window}] = {self.count}"
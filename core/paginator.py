@@ -0,0 +1,111 @@
+"""
+Approximate-count paginator for the large admin changelists.
+
+The admin paginates with an exact ``COUNT(*)``, whose cost grows with the
+table. ``ApproximateCountPaginator`` keeps it flat:
+
+- unfiltered list: row estimate from the backend statistics
+  (``pg_class.reltuples`` on PostgreSQL, ``sqlite_stat1`` after ``ANALYZE``
+  on SQLite), else an exact count cached for ``ADMIN_COUNT_CACHE_TIMEOUT``
+  seconds. Tables smaller than ``ADMIN_APPROX_COUNT_THRESHOLD`` rows are
+  always counted exactly;
+- filtered list (search, filters, dates): exact count interrupted after
+  ``ADMIN_COUNT_TIMEOUT_MS`` milliseconds, the table estimate being used
+  when it does not finish in time.
+
+Use it with ``show_full_result_count = False``, which drops the second
+count of the whole table.
+"""
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import OperationalError, connections, transaction
+from django.db.models import QuerySet
+from django.utils.functional import cached_property
+
+logger = logging.getLogger(__name__)
+
+
+def estimate_rows(model, using='default'):
+    """Row count of ``model``'s table from the backend statistics, None if unknown."""
+    connection = connections[using]
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(%s)", [table])
+            row = cursor.fetchone()
+            # -1 : table jamais analysée (PostgreSQL 14+)
+            return row[0] if row and row[0] >= 0 else None
+        if connection.vendor == 'sqlite':
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sqlite_stat1'")
+            if cursor.fetchone() is None:
+                return None
+            # Premier entier de "stat" : nombre de lignes de la table
+            cursor.execute("SELECT stat FROM sqlite_stat1 WHERE tbl = %s", [table])
+            counts = [int(stat.split()[0]) for stat, in cursor.fetchall() if stat]
+            return max(counts) if counts else None
+    return None
+
+
+def cached_count(model, using='default'):
+    """Exact row count of ``model``, cached for ``ADMIN_COUNT_CACHE_TIMEOUT`` seconds."""
+    return cache.get_or_set(
+        f'admin_count:{using}:{model._meta.label_lower}',
+        lambda: model._default_manager.using(using).count(),
+        settings.ADMIN_COUNT_CACHE_TIMEOUT,
+    )
+
+
+def timed_count(queryset, timeout_ms):
+    """Exact ``queryset.count()``, None if interrupted after ``timeout_ms``."""
+    connection = connections[queryset.db]
+    try:
+        if connection.vendor == 'postgresql':
+            with transaction.atomic(using=queryset.db):
+                with connection.cursor() as cursor:
+                    cursor.execute("SET LOCAL statement_timeout = %s", [int(timeout_ms)])
+                return queryset.count()
+        if connection.vendor == 'sqlite':
+            deadline = time.monotonic() + timeout_ms / 1000
+            connection.ensure_connection()
+            # Le gestionnaire de progression interrompt la requête après l'échéance
+            connection.connection.set_progress_handler(lambda: time.monotonic() > deadline, 10000)
+            try:
+                return queryset.count()
+            finally:
+                connection.connection.set_progress_handler(None, 0)
+        return queryset.count()
+    except OperationalError:
+        logger.info("Comptage %s interrompu après %d ms", queryset.model._meta.label, timeout_ms)
+        return None
+
+
+class ApproximateCountPaginator(Paginator):
+    """Paginator whose ``count`` stays cheap on large tables (admin changelists)."""
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not isinstance(queryset, QuerySet):
+            return super().count
+
+        threshold = settings.ADMIN_APPROX_COUNT_THRESHOLD
+        if queryset.query.where:
+            count = timed_count(queryset, settings.ADMIN_COUNT_TIMEOUT_MS)
+            if count is not None:
+                return count
+            return self.estimate(queryset)
+
+        estimate = self.estimate(queryset)
+        if estimate < threshold:
+            return queryset.count()
+        return estimate
+
+    def estimate(self, queryset):
+        estimate = estimate_rows(queryset.model, queryset.db)
+        if estimate is None:
+            estimate = cached_count(queryset.model, queryset.db)
+        return estimate
@@ -0,0 +1,352 @@
+"""
+Daily rollups of the back-office statistics.
+
+``DailyStat`` holds one row per (date, metric, dimension): the number of
+quotes, messages, subscribers and game participations created that day,
+broken down by status, city, prize... Admin dashboards sum a few hundred
+rollup rows instead of scanning the raw tables, so their cost does not grow
+with the number of submissions.
+
+Rollups are maintained incrementally by the signals of ``core/signals.py``
+(deltas applied after commit with a single upsert) and can be rebuilt from
+the raw tables with ``python manage.py rebuild_rollups``.
+
+``QuerySet.update()`` bypasses the signals: use ``tracked_update()``.
+An update that fails after the commit (e.g. locked database) is logged and
+dropped, never raised: the submission itself is saved, ``rebuild_rollups``
+repairs the statistics.
+"""
+import logging
+from collections import Counter
+from datetime import timedelta
+
+from django.apps import apps as django_apps
+from django.db import DatabaseError, connection, transaction
+from django.db.models import F, Q, Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# Lignes insérées par requête lors d'une reconstruction
+BATCH_SIZE = 1000
+
+
+# =============================================================================
+# DEFINITION DES INDICATEURS
+# =============================================================================
+# Chaque fonction reçoit les valeurs d'une ligne (dict) et produit des
+# tuples (indicateur, dimension, valeur) datés du jour de création.
+
+def quote_metrics(row):
+    yield 'quotes', '', 1
+    yield 'quotes.status', row['status'], 1
+    city = (row['city'] or '').strip()
+    if city:
+        yield 'quotes.city', city[:100], 1
+    if row['estimated_amount']:
+        yield 'quotes.amount', row['status'], int(row['estimated_amount'])
+
+
+def message_metrics(row):
+    yield 'messages', '', 1
+    yield 'messages.status', row['status'], 1
+
+
+def subscriber_metrics(row):
+    yield 'subscribers', '', 1
+    if row['is_active']:
+        yield 'subscribers.active', '', 1
+
+
+def participation_metrics(row):
+    yield 'game.participations', '', 1
+    yield 'game.prize', str(row['prize_id'] or ''), 1
+    if row['promo_code']:
+        yield 'game.codes', 'used' if row['has_used_prize'] else 'pending', 1
+    yield 'game.quiz_score', '', row['quiz_score']
+    if row['quiz_total']:
+        yield 'game.quizzes', '', 1
+        yield 'game.quiz_percent', '', round(row['quiz_score'] * 100 / row['quiz_total'])
+
+
+class Rollup:
+    """Rollup definition of one model."""
+
+    def __init__(self, model, fields, metrics, names):
+        self.model = model
+        self.fields = ('created_at',) + tuple(fields)
+        self.metrics = metrics
+        self.names = names
+
+    def get_model(self, apps=django_apps):
+        return apps.get_model(self.model)
+
+    def row(self, instance):
+        """Tracked values of a saved instance, None if some of them are deferred."""
+        values = instance.__dict__
+        if not all(field in values for field in self.fields):
+            return None
+        return {field: values[field] for field in self.fields}
+
+    def contributions(self, row):
+        """Counter of (date, metric, dimension) -> value for one row."""
+        counts = Counter()
+        if row and row['created_at']:
+            day = timezone.localdate(row['created_at'])
+            for metric, dimension, value in self.metrics(row):
+                counts[(day, metric, dimension)] += value
+        return counts
+
+
+# Types d'installation des devis (relation ManyToMany, suivie par m2m_changed)
+QUOTE_TYPE_METRIC = 'quotes.type'
+
+ROLLUPS = [
+    Rollup('core.QuoteRequest', ('status', 'city', 'estimated_amount'), quote_metrics,
+           names=('quotes', 'quotes.status', 'quotes.city', 'quotes.amount', QUOTE_TYPE_METRIC)),
+    Rollup('core.ContactMessage', ('status',), message_metrics,
+           names=('messages', 'messages.status')),
+    Rollup('core.Newsletter', ('is_active',), subscriber_metrics,
+           names=('subscribers', 'subscribers.active')),
+    Rollup('core.GameParticipation',
+           ('prize_id', 'promo_code', 'has_used_prize', 'quiz_score', 'quiz_total'),
+           participation_metrics,
+           names=('game.participations', 'game.prize', 'game.codes',
+                  'game.quiz_score', 'game.quizzes', 'game.quiz_percent')),
+]
+
+
+def get_rollup(model):
+    label = model._meta.label
+    for rollup in ROLLUPS:
+        if rollup.model == label:
+            return rollup
+    return None
+
+
+# =============================================================================
+# MISE A JOUR INCREMENTALE
+# =============================================================================
+
+def _upsert(deltas):
+    """Add ``deltas`` ({(date, metric, dimension): value}) to the rollups."""
+    from .models import DailyStat
+
+    rows = [(day, metric, dimension, value) for (day, metric, dimension), value in deltas.items() if value]
+    if not rows:
+        return
+
+    vendor = connection.vendor
+    if vendor not in ('sqlite', 'postgresql', 'mysql'):
+        for day, metric, dimension, value in rows:
+            with transaction.atomic():
+                updated = DailyStat.objects.filter(date=day, metric=metric, dimension=dimension).update(
+                    value=F('value') + value
+                )
+                if not updated:
+                    DailyStat.objects.create(date=day, metric=metric, dimension=dimension, value=value)
+        return
+
+    # Un seul INSERT ... ON CONFLICT pour toutes les lignes
+    qn = connection.ops.quote_name
+    table = qn(DailyStat._meta.db_table)
+    columns = ', '.join(qn(column) for column in ('date', 'metric', 'dimension', 'value'))
+    placeholders = ', '.join(['(%s, %s, %s, %s)'] * len(rows))
+    if vendor == 'mysql':
+        conflict = f"ON DUPLICATE KEY UPDATE {qn('value')} = {qn('value')} + VALUES({qn('value')})"
+    else:
+        conflict = (
+            f"ON CONFLICT ({qn('metric')}, {qn('date')}, {qn('dimension')}) "
+            f"DO UPDATE SET {qn('value')} = {table}.{qn('value')} + excluded.{qn('value')}"
+        )
+    params = []
+    for day, metric, dimension, value in rows:
+        params += [connection.ops.adapt_datefield_value(day), metric, dimension, value]
+    with connection.cursor() as cursor:
+        cursor.execute(f"INSERT INTO {table} ({columns}) VALUES {placeholders} {conflict}", params)
+
+
+def _upsert_after_commit(deltas):
+    # Exécuté après le commit : une erreur ici ferait échouer une requête
+    # dont les données sont déjà enregistrées
+    try:
+        _upsert(deltas)
+    except DatabaseError:
+        logger.exception("Statistiques journalières non mises à jour (%d lignes), "
+                         "lancer rebuild_rollups", len(deltas))
+
+
+def apply(deltas):
+    """Apply rollup deltas once the current transaction is committed."""
+    deltas = {key: value for key, value in deltas.items() if value}
+    if deltas:
+        transaction.on_commit(lambda: _upsert_after_commit(deltas))
+
+
+def diff(new, old):
+    """``new - old`` keeping negative values (unlike Counter subtraction)."""
+    delta = Counter(new)
+    delta.subtract(old)
+    return delta
+
+
+def code_redeemed_deltas(created_at):
+    """Deltas of a promo code going from pending to used."""
+    day = timezone.localdate(created_at)
+    return {(day, 'game.codes', 'used'): 1, (day, 'game.codes', 'pending'): -1}
+
+
+def quote_type_deltas(links, sign=1):
+    """Deltas of ``quotes.type`` for (quote created_at, installation type pk) links."""
+    deltas = Counter()
+    for created_at, type_id in links:
+        deltas[(timezone.localdate(created_at), QUOTE_TYPE_METRIC, str(type_id))] += sign
+    return deltas
+
+
+def tracked_update(queryset, **values):
+    """``queryset.update(**values)`` keeping the rollups in sync (bulk admin actions)."""
+    model = queryset.model
+    rollup = get_rollup(model)
+    with transaction.atomic():
+        before = list(queryset.values('pk', *rollup.fields))
+        pks = [row['pk'] for row in before]
+        updated = model.objects.filter(pk__in=pks).update(**values)
+        after = model.objects.filter(pk__in=pks).values('pk', *rollup.fields)
+        delta = Counter()
+        for row in after:
+            delta.update(rollup.contributions(row))
+        for row in before:
+            delta.subtract(rollup.contributions(row))
+        apply(delta)
+    return updated
+
+
+# =============================================================================
+# RECONSTRUCTION
+# =============================================================================
+
+def compute(rollup, since=None, apps=django_apps):
+    """Rollups of one model computed from its raw table (one pass)."""
+    model = rollup.get_model(apps)
+    queryset = model.objects.all()
+    if since:
+        queryset = queryset.filter(created_at__date__gte=since)
+    counts = Counter()
+    for row in queryset.values(*rollup.fields).iterator():
+        counts.update(rollup.contributions(row))
+
+    if rollup.model == 'core.QuoteRequest':
+        through = model.installation_types.through.objects.all()
+        if since:
+            through = through.filter(quoterequest__created_at__date__gte=since)
+        for row in through.values('quoterequest__created_at', 'installationtype_id').iterator():
+            day = timezone.localdate(row['quoterequest__created_at'])
+            counts[(day, QUOTE_TYPE_METRIC, str(row['installationtype_id']))] += 1
+    return counts
+
+
+def rebuild(models=None, since=None, apps=django_apps):
+    """
+    Recompute the rollups from the raw tables.
+
+    ``models``: model labels to rebuild (all by default); ``since``: first
+    day to rebuild (date). Returns the number of rollup rows written.
+    """
+    DailyStat = apps.get_model('core', 'DailyStat')
+    written = 0
+    for rollup in ROLLUPS:
+        if models and rollup.model not in models:
+            continue
+        counts = compute(rollup, since, apps)
+        with transaction.atomic():
+            stale = DailyStat.objects.filter(metric__in=rollup.names)
+            if since:
+                stale = stale.filter(date__gte=since)
+            stale.delete()
+            DailyStat.objects.bulk_create(
+                [
+                    DailyStat(date=day, metric=metric, dimension=dimension, value=value)
+                    for (day, metric, dimension), value in counts.items() if value
+                ],
+                batch_size=BATCH_SIZE,
+            )
+        written += sum(1 for value in counts.values() if value)
+    return written
+
+
+# =============================================================================
+# LECTURE
+# =============================================================================
+
+class RollupSummary:
+    """Totals per (metric, dimension) over the standard windows."""
+
+    WINDOWS = ('total', 'today', 'week', 'last_week', 'month')
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    def get(self, metric, dimension=None, window='total'):
+        """Sum of a metric (all dimensions, or one) over a window."""
+        if dimension is not None:
+            return self.rows.get((metric, dimension), {}).get(window, 0)
+        return sum(values[window] for (name, _), values in self.rows.items() if name == metric)
+
+    def by_dimension(self, metric, window='total'):
+        """{dimension: value} of a metric over a window, non-zero values only."""
+        return {
+            dimension: values[window]
+            for (name, dimension), values in self.rows.items()
+            if name == metric and values[window]
+        }
+
+
+def summary(metrics, today=None):
+    """
+    Read the rollups of ``metrics`` (one query).
+
+    Windows: ``today``, ``week`` (last 7 days), ``last_week`` (the 7 days
+    before), ``month`` (last 30 days) and ``total``.
+    """
+    from .models import DailyStat
+
+    today = today or timezone.localdate()
+    week = today - timedelta(days=6)
+    last_week = week - timedelta(days=7)
+    month = today - timedelta(days=29)
+    rows = (
+        DailyStat.objects.filter(metric__in=metrics)
+        .values('metric', 'dimension')
+        .annotate(
+            total=Sum('value'),
+            today=Sum('value', filter=Q(date=today)),
+            week=Sum('value', filter=Q(date__gte=week)),
+            last_week=Sum('value', filter=Q(date__gte=last_week, date__lt=week)),
+            month=Sum('value', filter=Q(date__gte=month)),
+        )
+        .order_by()
+    )
+    return RollupSummary({
+        (row['metric'], row['dimension']): {window: row[window] or 0 for window in RollupSummary.WINDOWS}
+        for row in rows
+    })
+
+
+def monthly(metrics, starts):
+    """{metric: [value per month]} for the given month starts (one query)."""
+    from .models import DailyStat
+
+    rows = (
+        DailyStat.objects.filter(metric__in=metrics, date__gte=timezone.localdate(starts[0]))
+        .annotate(month=TruncMonth('date'))
+        .values('metric', 'month')
+        .annotate(total=Sum('value'))
+        .order_by()
+    )
+    totals = {(row['metric'], row['month'].year, row['month'].month): row['total'] for row in rows}
+    return {
+        metric: [totals.get((metric, start.year, start.month), 0) for start in starts]
+        for metric in metrics
+    }
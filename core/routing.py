@@ -0,0 +1,144 @@
+"""
+Read-replica routing.
+
+With ``DATABASE_REPLICA_URLS`` set, the ``replica<n>`` databases serve the
+reads of the public GET requests (site pages, API); one replica is picked
+per request. Everything else uses ``default``:
+
+- writes, reads inside a transaction and reads after a write of the same
+  request;
+- form submissions (POST...) and the admin, for the whole request;
+- the requests of a client during ``DB_REPLICA_PIN_SECONDS`` after a form
+  submission (cookie), so that e.g. quote -> quote_success reads its own
+  writes;
+- cache rebuilds (``primary()``, see core/caching.py), so a lagging replica
+  is never cached for the whole timeout, and the database cache itself;
+- PostgreSQL replicas more than ``DB_REPLICA_MAX_LAG`` seconds behind;
+- anything outside a request (commands, shell, background threads).
+
+Local test with two SQLite files (the copy plays the replica):
+
+    cp db.sqlite3 replica.sqlite3
+    DATABASE_URL=sqlite:///db.sqlite3 DATABASE_REPLICA_URLS=sqlite:///replica.sqlite3 \\
+        python manage.py runserver
+"""
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+from django.urls import reverse
+
+PIN_COOKIE = 'db_primary'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# Intervalle entre deux mesures du retard d'un réplica (secondes)
+LAG_CHECK_INTERVAL = 5
+
+# Routage de la requête en cours : None hors requête (tout sur le primaire)
+_request_state = ContextVar('replica_request_state', default=None)
+# {alias: (mesuré à, retard en secondes)}, par processus
+_replica_lags = {}
+
+
+def replica_aliases():
+    return [alias for alias in settings.DATABASES if alias != DEFAULT_DB_ALIAS]
+
+
+def replica_lag(alias):
+    """Replication lag of ``alias`` in seconds (0 when not measurable)."""
+    connection = connections[alias]
+    if connection.vendor != 'postgresql':
+        return 0
+    now = time.monotonic()
+    checked_at, lag = _replica_lags.get(alias, (None, 0))
+    if checked_at is None or now - checked_at > LAG_CHECK_INTERVAL:
+        try:
+            with connection.cursor() as cursor:
+                # Réplica à jour (tout le WAL reçu est rejoué) : aucun retard,
+                # même si le primaire n'a rien écrit depuis longtemps
+                cursor.execute(
+                    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+                    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+                )
+                lag = float(cursor.fetchone()[0] or 0)
+        except DatabaseError:
+            lag = float('inf')
+        _replica_lags[alias] = (now, lag)
+    return lag
+
+
+def pick_replica():
+    """A replica within the lag tolerance, ``default`` if none is."""
+    aliases = [alias for alias in replica_aliases() if replica_lag(alias) <= settings.DB_REPLICA_MAX_LAG]
+    return random.choice(aliases) if aliases else DEFAULT_DB_ALIAS
+
+
+@contextmanager
+def primary():
+    """Send the queries of the block to the primary database."""
+    token = _request_state.set(None)
+    try:
+        yield
+    finally:
+        _request_state.reset(token)
+
+
+class ReplicaRouter:
+    """Reads of replica-eligible requests on a replica, everything else on ``default``."""
+
+    def db_for_read(self, model, **hints):
+        state = _request_state.get()
+        # Cache en base (CACHE_BACKEND=db) : verrous et valeurs lus sur le primaire
+        if model._meta.app_label == 'django_cache':
+            return DEFAULT_DB_ALIAS
+        if state is None or state['wrote'] or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        if state['alias'] is None:
+            # Un seul réplica par requête : lectures cohérentes entre elles
+            state['alias'] = pick_replica()
+        return state['alias']
+
+    def db_for_write(self, model, **hints):
+        state = _request_state.get()
+        if state is not None:
+            state['wrote'] = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Les réplicas reçoivent le schéma par la réplication
+        return db == DEFAULT_DB_ALIAS
+
+
+class ReplicaRoutingMiddleware:
+    """Decide for each request whether its reads may use a replica."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not self.allows_replica(request):
+            response = self.get_response(request)
+            if request.method not in SAFE_METHODS:
+                # Les requêtes suivantes du client lisent leurs propres écritures
+                response.set_cookie(PIN_COOKIE, '1', max_age=settings.DB_REPLICA_PIN_SECONDS,
+                                    httponly=True, samesite='Lax')
+            return response
+
+        token = _request_state.set({'wrote': False, 'alias': None})
+        try:
+            return self.get_response(request)
+        finally:
+            _request_state.reset(token)
+
+    def allows_replica(self, request):
+        return (
+            request.method in SAFE_METHODS
+            and PIN_COOKIE not in request.COOKIES
+            and not request.path.startswith(reverse('admin:index'))
+        )
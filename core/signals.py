@@ -0,0 +1,136 @@
+"""
+Signal handlers for Aqua-Racine.
+"""
+from collections import Counter
+
+from django.core.management import call_command
+from django.db.backends.signals import connection_created
+from django.db.models.signals import m2m_changed, post_delete, post_save, post_migrate, pre_delete, pre_save
+from django.dispatch import receiver
+
+from . import rollups
+from .caching import invalidate_model
+from .database import configure_connection
+from .game import remember_participant
+from .models import ContactMessage, GameParticipation, Newsletter, QuoteRequest
+
+
+@receiver(connection_created)
+def database_connected(sender, connection, **kwargs):
+    """Apply the connection pragmas (see core/database.py)."""
+    configure_connection(connection)
+
+
+@receiver(post_migrate)
+def create_cache_table(sender, using, **kwargs):
+    """
+    Create the table of the database cache (production default) after migrate.
+
+    Every deployment runs migrate, not always createcachetable; existing
+    tables are left untouched.
+    """
+    if sender.name == 'core':
+        call_command('createcachetable', database=using, verbosity=0)
+
+
+@receiver([post_save, post_delete])
+def cache_namespaces_changed(sender, **kwargs):
+    """
+    Invalidate the cache namespaces of the model (see core/caching.py).
+
+    Covers the view caches, the admin statistics, the wheel prize table
+    and the quiz bank.
+    """
+    if sender._meta.app_label == 'core':
+        invalidate_model(sender)
+
+
+@receiver(m2m_changed)
+def cache_relations_changed(sender, instance, action, model, **kwargs):
+    """Same for ManyToMany changes, on both sides of the relation."""
+    if action in ('post_add', 'post_remove', 'post_clear') and model._meta.app_label == 'core':
+        invalidate_model(type(instance))
+        invalidate_model(model)
+
+
+@receiver(post_save, sender=GameParticipation)
+def game_participation_saved(sender, instance, **kwargs):
+    """Add the player to the eligibility Bloom filter of this worker."""
+    remember_participant(instance)
+
+
+# =============================================================================
+# ROLLUPS (statistiques journalières)
+# =============================================================================
+
+def rollup_row(sender, instance):
+    """Tracked values of the row as currently stored in the database."""
+    fields = rollups.get_rollup(sender).fields
+    return sender.objects.filter(pk=instance.pk).values(*fields).first()
+
+
+@receiver(pre_save, sender=QuoteRequest)
+@receiver(pre_save, sender=ContactMessage)
+@receiver(pre_save, sender=Newsletter)
+@receiver(pre_save, sender=GameParticipation)
+def rollup_before_save(sender, instance, **kwargs):
+    """Remember the previous values (new rows need no query)."""
+    instance._rollup_row = None if instance._state.adding else rollup_row(sender, instance)
+
+
+@receiver(post_save, sender=QuoteRequest)
+@receiver(post_save, sender=ContactMessage)
+@receiver(post_save, sender=Newsletter)
+@receiver(post_save, sender=GameParticipation)
+def rollup_saved(sender, instance, created, **kwargs):
+    """Apply the difference between the previous and the saved values."""
+    rollup = rollups.get_rollup(sender)
+    row = rollup.row(instance) or rollup_row(sender, instance)
+    previous = Counter() if created else rollup.contributions(getattr(instance, '_rollup_row', None))
+    rollups.apply(rollups.diff(rollup.contributions(row), previous))
+
+
+@receiver(pre_delete, sender=QuoteRequest)
+@receiver(pre_delete, sender=ContactMessage)
+@receiver(pre_delete, sender=Newsletter)
+@receiver(pre_delete, sender=GameParticipation)
+def rollup_before_delete(sender, instance, **kwargs):
+    instance._rollup_row = rollup_row(sender, instance)
+    if sender is QuoteRequest:
+        # Les liens vers les types d'installation sont supprimés sans signal m2m_changed
+        instance._rollup_types = list(instance.installation_types.values_list('pk', flat=True))
+
+
+@receiver(post_delete, sender=QuoteRequest)
+@receiver(post_delete, sender=ContactMessage)
+@receiver(post_delete, sender=Newsletter)
+@receiver(post_delete, sender=GameParticipation)
+def rollup_deleted(sender, instance, **kwargs):
+    row = getattr(instance, '_rollup_row', None)
+    deltas = rollups.diff(Counter(), rollups.get_rollup(sender).contributions(row))
+    if row:
+        links = [(row['created_at'], type_id) for type_id in getattr(instance, '_rollup_types', ())]
+        deltas.update(rollups.quote_type_deltas(links, -1))
+    rollups.apply(deltas)
+
+
+def quote_type_links(instance, reverse, pks):
+    """(quote created_at, installation type pk) pairs touched by an m2m change."""
+    if not reverse:
+        return [(instance.created_at, pk) for pk in pks]
+    dates = QuoteRequest.objects.filter(pk__in=pks).values_list('created_at', flat=True)
+    return [(created_at, instance.pk) for created_at in dates]
+
+
+@receiver(m2m_changed, sender=QuoteRequest.installation_types.through)
+def quote_types_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """Count quotes per installation type."""
+    if action == 'pre_clear':
+        related = instance.quote_requests if reverse else instance.installation_types
+        instance._rollup_cleared = list(related.values_list('pk', flat=True))
+    elif action == 'post_clear':
+        links = quote_type_links(instance, reverse, getattr(instance, '_rollup_cleared', ()))
+        rollups.apply(rollups.quote_type_deltas(links, -1))
+    elif action in ('post_add', 'post_remove') and pk_set:
+        sign = 1 if action == 'post_add' else -1
+        rollups.apply(rollups.quote_type_deltas(quote_type_links(instance, reverse, pk_set), sign))
@@ -0,0 +1,202 @@
+"""
+Monte Carlo simulation of a wheel campaign.
+
+Simulates many campaigns of ``participants`` spins against the same prize
+table and alias sampling as ``spin_wheel()`` and reports, per prize, the
+expected number of winners with a 95% interval, plus the expected promo-code
+liability in FCFA.
+
+Prize quotas are applied like ``GamePrize.claim()``: a prize wins at most
+its remaining stock (total and daily) per campaign, the spins beyond it are
+drawn again among the prizes still in stock, and end on "Pas de chance"
+once every prize is out of stock.
+"""
+import math
+import secrets
+import time
+
+from django.utils import timezone
+
+from .game import HAS_NUMPY, PrizeTable, np
+from .models import GamePrize
+
+# Hypothèses de coût par défaut (FCFA)
+DEFAULT_AVERAGE_ORDER = 25000
+DEFAULT_DELIVERY_FEE = 2000
+DEFAULT_FREE_ITEM_VALUE = 5000
+
+# Nombre de tirages générés par bloc (limite la mémoire utilisée)
+CHUNK_SIZE = 1_000_000
+
+
+class SimulationError(Exception):
+    """Raised when a simulation cannot be run."""
+
+
+# Issue des tirages quand plus aucun prix n'a de stock (comme spin_wheel())
+OUT_OF_STOCK = {
+    'name': 'Pas de chance (stock épuisé)',
+    'prize_type': 'lost',
+    'discount_percent': 0,
+    'is_winning': False,
+    'color': '',
+}
+
+
+def get_campaign_table():
+    """
+    Prize table of a campaign: all the active prizes, including those out
+    of stock today, or the hardcoded fallback when none is configured.
+    """
+    prizes = list(GamePrize.objects.filter(is_active=True).order_by('order'))
+    table = PrizeTable(prizes, [prize.probability for prize in prizes])
+    if table:
+        return table
+    from .views import FALLBACK_PRIZE_TABLE
+    return FALLBACK_PRIZE_TABLE
+
+
+def remaining_stock(item, today=None):
+    """Units ``claim()`` can still award today, ``math.inf`` without quota."""
+    if not isinstance(item, GamePrize):
+        return math.inf
+    today = today or timezone.localdate()
+    stock = math.inf
+    if item.total_quota is not None:
+        stock = max(item.total_quota - item.awarded_count, 0)
+    if item.daily_quota is not None:
+        awarded_today = item.awarded_today if item.awarded_date == today else 0
+        stock = min(stock, max(item.daily_quota - awarded_today, 0))
+    return stock
+
+
+def describe_prize(item):
+    """Common description of a GamePrize or a fallback prize dict."""
+    if isinstance(item, GamePrize):
+        return {
+            'name': item.name,
+            'prize_type': item.prize_type,
+            'discount_percent': item.discount_percent,
+            'is_winning': item.is_winning_prize,
+            'color': item.color,
+        }
+    return {
+        'name': item['name'],
+        'prize_type': item['prize_type'],
+        'discount_percent': item['discount_percent'],
+        'is_winning': item['code'] != 'lost',
+        'color': '',
+    }
+
+
+def unit_cost(prize, average_order, delivery_fee, free_item_value):
+    """Cost in FCFA of one redeemed prize."""
+    if not prize['is_winning']:
+        return 0
+    if prize['prize_type'] == 'discount':
+        return average_order * prize['discount_percent'] / 100
+    if prize['prize_type'] == 'free_delivery':
+        return delivery_fee
+    if prize['prize_type'] == 'free_item':
+        return free_item_value
+    return 0
+
+
+def simulate_counts(table, participants, runs, rng, stock=None):
+    """
+    Win counts per prize for each simulated campaign, shape ``(runs, prizes + 1)``.
+
+    The last column counts the spins left without prize because every prize
+    reached its ``stock`` (units per prize, ``math.inf`` when unlimited).
+    """
+    n = len(table)
+    total = participants * runs
+    counts = np.zeros(runs * n, dtype=np.int64)
+    for start in range(0, total, CHUNK_SIZE):
+        size = min(CHUNK_SIZE, total - start)
+        picks = table.sample_many(size, rng)
+        campaign = np.arange(start, start + size) // participants
+        counts += np.bincount(campaign * n + picks, minlength=runs * n)
+    counts = counts.reshape(runs, n)
+    out_of_stock = np.zeros(runs, dtype=np.int64)
+
+    caps = np.array(stock if stock is not None else [math.inf] * n, dtype=float)
+    weights = np.array(table.weights, dtype=float)
+    while True:
+        # Tirages au-delà du stock : tirés à nouveau parmi les prix restants
+        excess = np.maximum(counts - caps, 0).astype(np.int64)
+        extra = excess.sum(axis=1)
+        if not extra.any():
+            break
+        counts -= excess
+        available = np.where(counts < caps, weights, 0.0)
+        totals = available.sum(axis=1)
+        empty = totals == 0
+        out_of_stock += np.where(empty, extra, 0)
+        extra[empty] = 0
+        pvals = available / np.where(empty, 1.0, totals)[:, None]
+        pvals[empty] = 1.0 / n
+        counts += rng.multinomial(extra, pvals)
+    return np.column_stack([counts, out_of_stock])
+
+
+def simulate_wheel(participants, runs=1000, average_order=DEFAULT_AVERAGE_ORDER,
+                   delivery_fee=DEFAULT_DELIVERY_FEE, free_item_value=DEFAULT_FREE_ITEM_VALUE,
+                   redemption_rate=1.0, seed=None):
+    """Run the simulation and return a report dictionary."""
+    if not HAS_NUMPY:
+        raise SimulationError("NumPy est requis pour la simulation (pip install numpy).")
+    if participants < 1 or runs < 1:
+        raise SimulationError("Le nombre de participants et de campagnes doit être positif.")
+
+    started = time.perf_counter()
+    table = get_campaign_table()
+    rng = np.random.default_rng(seed if seed is not None else secrets.randbits(128))
+
+    today = timezone.localdate()
+    stock = [remaining_stock(item, today) for item in table.items]
+    counts = simulate_counts(table, participants, runs, rng, stock)
+    prizes = [describe_prize(item) for item in table.items] + [OUT_OF_STOCK]
+    costs = np.array([
+        unit_cost(prize, average_order, delivery_fee, free_item_value) for prize in prizes
+    ]) * redemption_rate
+    liability = counts @ costs
+    winning = np.array([prize['is_winning'] for prize in prizes])
+    winners = counts[:, winning].sum(axis=1)
+
+    rows = []
+    for i, (prize, probability) in enumerate(zip(prizes, table.probabilities + [0])):
+        if prize is OUT_OF_STOCK and not counts[:, i].any():
+            continue
+        low, high = np.percentile(counts[:, i], [2.5, 97.5])
+        rows.append({
+            **prize,
+            'probability': probability * 100,
+            'stock': stock[i] if i < len(stock) and stock[i] != math.inf else None,
+            'expected': participants * probability,
+            'mean': float(counts[:, i].mean()),
+            'low': int(low),
+            'high': int(high),
+            'unit_cost': float(costs[i]),
+            'expected_cost': float(costs[i] * counts[:, i].mean()),
+        })
+
+    liability_low, liability_high = np.percentile(liability, [2.5, 97.5])
+    winners_low, winners_high = np.percentile(winners, [2.5, 97.5])
+    return {
+        'participants': participants,
+        'runs': runs,
+        'total_spins': participants * runs,
+        'prizes': rows,
+        'winners': {
+            'mean': float(winners.mean()),
+            'low': int(winners_low),
+            'high': int(winners_high),
+        },
+        'liability': {
+            'mean': float(liability.mean()),
+            'low': float(liability_low),
+            'high': float(liability_high),
+        },
+        'elapsed': time.perf_counter() - started,
+    }
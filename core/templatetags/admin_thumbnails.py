@@ -0,0 +1,12 @@
+"""Template tags of the admin image previews (see core/thumbnails.py)."""
+from django import template
+
+from ..thumbnails import thumbnail_url as get_thumbnail_url
+
+register = template.Library()
+
+
+@register.simple_tag
+def thumbnail_url(image, width, height):
+    """``{% thumbnail_url img.image 120 120 %}``: URL of the thumbnail at that size."""
+    return get_thumbnail_url(image, width, height)
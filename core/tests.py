@@ -0,0 +1,303 @@
+"""
+Tests for Aqua-Racine.
+"""
+import threading
+import uuid
+from unittest import mock
+
+from django.core.exceptions import ValidationError
+from django.db import OperationalError, connections
+from django.test import Client, RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+
+from .game import ParticipantFilter, make_quiz_token
+from .idempotency import make_full_key, reserve_key
+from . import rollups
+from .models import ContactMessage, DailyStat, GameParticipation, GamePrize, IdempotencyKey
+from .throttling import _limiters, check_rate, get_client_ip, get_limiter
+from .views import FALLBACK_QUIZ_BANK
+
+
+@override_settings(RATE_LIMIT_ENABLED=False)
+class SubmitQuizAndSpinConcurrencyTests(TransactionTestCase):
+    """Concurrent submissions of the same player (SubmitQuizAndSpin.play)."""
+
+    THREADS = 8
+
+    def setUp(self):
+        # Une chance sur deux : les envois concurrents gagnent et perdent
+        self.prize = GamePrize.objects.create(
+            name='10%', prize_type='discount', discount_percent=10, probability=50,
+            is_winning_prize=True, is_active=True, total_quota=100
+        )
+        GamePrize.objects.create(
+            name='Perdu', prize_type='lost', probability=50, is_winning_prize=False, is_active=True
+        )
+
+    def submit_concurrently(self, email, phone):
+        barrier = threading.Barrier(self.THREADS)
+        token = make_quiz_token(FALLBACK_QUIZ_BANK.sample())
+        statuses = []
+        lock = threading.Lock()
+
+        def submit():
+            client = Client(raise_request_exception=False)
+            barrier.wait()
+            try:
+                response = client.post(
+                    '/api/game/submit/',
+                    {'name': 'Awa', 'email': email, 'phone': phone, 'answers': {}, 'quiz_token': token},
+                    content_type='application/json',
+                    # Une clé par envoi : ce ne sont pas des rejeux du même formulaire
+                    HTTP_IDEMPOTENCY_KEY=uuid.uuid4().hex,
+                )
+                with lock:
+                    statuses.append(response.status_code)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=submit) for _ in range(self.THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return statuses
+
+    def assert_single_participation(self, email, statuses):
+        participations = GameParticipation.objects.filter(email_normalized=email)
+        self.assertEqual(participations.count(), 1)
+        winners = participations.filter(promo_code__isnull=False)
+        self.assertLessEqual(winners.count(), 1)
+        self.assertEqual(sorted(statuses), [200] + [400] * (self.THREADS - 1))
+        # Le stock consommé par les envois refusés est rendu (rollback)
+        self.prize.refresh_from_db()
+        self.assertEqual(self.prize.awarded_count, winners.count())
+        self.assertEqual(winners.exists(), participations.filter(prize=self.prize).exists())
+
+    def test_same_email_and_phone(self):
+        statuses = self.submit_concurrently('awa@example.com', '+2250700000001')
+        self.assert_single_participation('awa@example.com', statuses)
+
+    def test_same_email_written_differently(self):
+        statuses = self.submit_concurrently('Awa@Example.com ', '07 00 00 00 02')
+        self.assert_single_participation('awa@example.com', statuses)
+
+    def test_quiz_token_required(self):
+        response = Client().post(
+            '/api/game/submit/',
+            {'name': 'Awa', 'email': 'awa@example.com', 'phone': '0700000003', 'answers': {'1': 0}},
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(GameParticipation.objects.exists())
+
+
+class GameParticipationIdentityTests(TestCase):
+    """Legacy duplicates left with NULL identity columns by migration 0014."""
+
+    def setUp(self):
+        self.original = GameParticipation.objects.create(
+            name='Awa', email='awa@example.com', phone='0700000001'
+        )
+        self.duplicate = GameParticipation.objects.create(
+            name='Awa bis', email='awa2@example.com', phone='0700000002'
+        )
+        # État laissé par la migration : même email, colonnes normalisées vides
+        GameParticipation.objects.filter(pk=self.duplicate.pk).update(
+            email='Awa@Example.com', phone='07 00 00 00 01', email_normalized=None, phone_e164=None
+        )
+
+    def test_edit_legacy_duplicate(self):
+        duplicate = GameParticipation.objects.get(pk=self.duplicate.pk)
+        duplicate.name = 'Awa Koné'
+        duplicate.full_clean()
+        duplicate.save()
+        duplicate.refresh_from_db()
+        self.assertIsNone(duplicate.email_normalized)
+        self.assertIsNone(duplicate.phone_e164)
+
+    def test_change_email_of_legacy_duplicate(self):
+        duplicate = GameParticipation.objects.get(pk=self.duplicate.pk)
+        duplicate.email = 'awa.kone@example.com'
+        duplicate.full_clean()
+        duplicate.save()
+        duplicate.refresh_from_db()
+        self.assertEqual(duplicate.email_normalized, 'awa.kone@example.com')
+        self.assertIsNone(duplicate.phone_e164)
+
+    def test_new_duplicate_rejected(self):
+        participation = GameParticipation(name='Awa', email='AWA@example.com', phone='0700000009')
+        with self.assertRaises(ValidationError):
+            participation.full_clean()
+
+
+class ClientIpTests(SimpleTestCase):
+    """Client IP used by the rate limits (TRUSTED_PROXY_COUNT)."""
+
+    def setUp(self):
+        # Entrée de gauche falsifiée par le client, celle de droite ajoutée par le proxy
+        self.request = RequestFactory().get(
+            '/', HTTP_X_FORWARDED_FOR='6.6.6.6, 1.2.3.4', REMOTE_ADDR='10.0.0.1'
+        )
+
+    @override_settings(TRUSTED_PROXY_COUNT=0)
+    def test_without_proxy(self):
+        self.assertEqual(get_client_ip(self.request), '10.0.0.1')
+
+    @override_settings(TRUSTED_PROXY_COUNT=1)
+    def test_behind_one_proxy(self):
+        self.assertEqual(get_client_ip(self.request), '1.2.3.4')
+
+    @override_settings(TRUSTED_PROXY_COUNT=3)
+    def test_fewer_entries_than_proxies(self):
+        self.assertEqual(get_client_ip(self.request), '10.0.0.1')
+
+
+@override_settings(RATE_LIMIT_ENABLED=True, RATE_LIMITS={'test': '3/min'})
+class RateLimitTests(TestCase):
+    """Shared limits (core/throttling.py)."""
+
+    def setUp(self):
+        _limiters.clear()
+        self.addCleanup(_limiters.clear)
+        self.factory = RequestFactory()
+
+    def post(self, ip):
+        return self.factory.post('/', REMOTE_ADDR=ip)
+
+    def test_database_counter_stops_at_capacity(self):
+        limiter = get_limiter('test')
+        results = [limiter._count_in_database('ratelimit:test:k', 100, 0.5)[1] for _ in range(5)]
+        self.assertEqual(results, [1, 1, 1, None, None])
+
+    def test_refused_identity_keeps_ip_budget(self):
+        for i in range(3):
+            self.assertFalse(check_rate('test', self.post(f'10.0.0.{i}'), {'email': 'awa@example.com'}))
+        self.assertTrue(check_rate('test', self.post('10.0.1.1'), {'email': 'awa@example.com'}))
+        allowed = [
+            not check_rate('test', self.post('10.0.1.1'), {'email': f'awa{i}@example.com'}) for i in range(3)
+        ]
+        self.assertEqual(allowed, [True, True, True])
+
+
+class RollupTests(TestCase):
+    """Daily statistics maintained after commit and rebuilt (core/rollups.py)."""
+
+    def stats(self):
+        return {(stat.date, stat.metric, stat.dimension): stat.value for stat in DailyStat.objects.all()}
+
+    def test_upsert_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            ContactMessage.objects.create(name='Awa', email='awa@example.com', message='Bonjour')
+        with self.captureOnCommitCallbacks(execute=True):
+            message = ContactMessage.objects.create(name='Koffi', email='koffi@example.com', message='Bonjour')
+        with self.captureOnCommitCallbacks(execute=True):
+            message.status = 'replied'
+            message.save()
+        summary = rollups.summary(['messages', 'messages.status'])
+        self.assertEqual(summary.get('messages'), 2)
+        self.assertEqual(summary.by_dimension('messages.status'), {'new': 1, 'replied': 1})
+
+    def test_rebuild_matches_incremental(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            for i in range(3):
+                ContactMessage.objects.create(name='Awa', email=f'awa{i}@example.com', message='Bonjour')
+        incremental = self.stats()
+        DailyStat.objects.all().delete()
+        rollups.rebuild()
+        self.assertEqual(self.stats(), incremental)
+
+    def test_upsert_failure_is_logged(self):
+        with mock.patch.object(rollups, '_upsert', side_effect=OperationalError('database is locked')):
+            with self.assertLogs('core.rollups', level='ERROR'):
+                with self.captureOnCommitCallbacks(execute=True):
+                    ContactMessage.objects.create(name='Awa', email='awa@example.com', message='Bonjour')
+        self.assertEqual(ContactMessage.objects.count(), 1)
+        self.assertFalse(DailyStat.objects.exists())
+
+
+@override_settings(RATE_LIMIT_ENABLED=False)
+class IdempotencyTests(TestCase):
+    """Idempotent submissions of the game form (core/idempotency.py)."""
+
+    def setUp(self):
+        GamePrize.objects.create(
+            name='Perdu', prize_type='lost', probability=100, is_winning_prize=False, is_active=True
+        )
+        self.key = uuid.uuid4().hex
+
+    def payload(self, email='awa@example.com', **extra):
+        data = {'name': 'Awa', 'email': email, 'phone': '0700000001', 'answers': {},
+                'quiz_token': make_quiz_token(FALLBACK_QUIZ_BANK.sample())}
+        data.update(extra)
+        return data
+
+    def submit(self, data, ip='10.0.0.1'):
+        return Client(REMOTE_ADDR=ip).post(
+            '/api/game/submit/', data, content_type='application/json', HTTP_IDEMPOTENCY_KEY=self.key
+        )
+
+    def test_replay_stored_response(self):
+        data = self.payload()
+        first = self.submit(data)
+        second = self.submit(data)
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second['Idempotent-Replayed'], 'true')
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(GameParticipation.objects.count(), 1)
+
+    def test_key_of_another_client_is_not_replayed(self):
+        self.submit(self.payload())
+        other = self.submit(self.payload(email='koffi@example.com', phone='0700000002'), ip='10.0.0.2')
+        self.assertEqual(other.status_code, 200)
+        self.assertFalse(other.has_header('Idempotent-Replayed'))
+        self.assertEqual(GameParticipation.objects.count(), 2)
+
+    def test_concurrent_reservation(self):
+        data = self.payload()
+        request = RequestFactory().post(
+            '/api/game/submit/', data, content_type='application/json', REMOTE_ADDR='10.0.0.1'
+        )
+        full_key = make_full_key('game-submit', request, self.key)
+        record, is_owner = reserve_key(full_key)
+        self.assertTrue(is_owner)
+        self.assertFalse(reserve_key(full_key)[1])
+        response = self.submit(data)
+        self.assertEqual(response.status_code, 409)
+        self.assertFalse(GameParticipation.objects.exists())
+
+    def test_key_released_on_error(self):
+        data = self.payload()
+        refused = self.submit(dict(data, quiz_token=''))
+        self.assertEqual(refused.status_code, 400)
+        self.assertFalse(IdempotencyKey.objects.exists())
+        retried = self.submit(data)
+        self.assertEqual(retried.status_code, 200)
+        self.assertFalse(retried.has_header('Idempotent-Replayed'))
+        self.assertEqual(GameParticipation.objects.count(), 1)
+
+
+class ParticipantFilterTests(TestCase):
+    """Bloom filter of the players (core/game.py)."""
+
+    def create(self, pk, email):
+        return GameParticipation.objects.create(pk=pk, name='Awa', email=email, phone=f'070000{pk:04d}')
+
+    def test_late_commit_below_last_pk(self):
+        self.create(1, 'awa@example.com')
+        self.create(3, 'koffi@example.com')
+        participant_filter = ParticipantFilter(1000)
+        participant_filter.refresh()
+        self.assertEqual(participant_filter.last_pk, 3)
+        self.assertFalse(participant_filter.might_contain('ama@example.com', None))
+        # pk 2 réservé avant pk 3 mais validé après
+        self.create(2, 'ama@example.com')
+        participant_filter.refresh()
+        self.assertTrue(participant_filter.might_contain('ama@example.com', None))
+
+    def test_counters(self):
+        participant_filter = ParticipantFilter(1000)
+        participant_filter.count('checks', 'db_skipped')
+        participant_filter.count('checks', 'db_confirmed')
+        metrics = participant_filter.metrics()
+        self.assertEqual((metrics['checks'], metrics['db_skipped'], metrics['db_confirmed']), (2, 1, 1))
@@ -0,0 +1,351 @@
+"""
+Rate limiting for the public write endpoints of Aqua-Racine.
+
+Token buckets keyed by client IP and by normalized identity (email, phone).
+Each worker keeps its own buckets as a fast path: a worker only sees part of
+the traffic, so when its local bucket is empty the shared limit is exceeded
+too and the request is refused without touching the cache. Otherwise the
+shared limit has the final word: a sliding window approximated by one
+counter per fixed window, the previous window weighted by the part of it
+still covered. Counters live in the Django cache when its ``incr`` is
+atomic (Redis, Memcached, local memory), otherwise (database and file
+caches) in ``RateLimitCounter`` rows, incremented by a conditional UPDATE.
+
+A request is counted against the IP bucket and the identity buckets: all
+local buckets are checked before any token is taken, and the tokens already
+taken are given back when a shared limit refuses the request.
+
+The client IP is the ``X-Forwarded-For`` entry appended by the nearest of
+the ``TRUSTED_PROXY_COUNT`` proxies, ``REMOTE_ADDR`` without proxy: the
+entries on the left are set by the client and cannot be trusted.
+
+Rates are configured per scope in ``settings.RATE_LIMITS``
+(``"requests/period"``, period in s, m, h or d).
+"""
+import math
+import random
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone as dt_timezone
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.cache.backends.memcached import BaseMemcachedCache
+from django.core.cache.backends.redis import RedisCache
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.http import HttpResponse, JsonResponse
+from django.utils import timezone
+from rest_framework.exceptions import Throttled
+from rest_framework.throttling import BaseThrottle
+
+from .models import RateLimitCounter, normalize_email, normalize_phone
+from .routing import primary
+
+RATE_LIMIT_MESSAGE = "Trop de requêtes. Veuillez réessayer dans quelques instants."
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+# Nombre maximum de compartiments gardés en mémoire par worker
+LOCAL_BUCKETS_MAX = 10000
+
+# Caches dont incr() est atomique (les autres font get + set)
+ATOMIC_INCR_BACKENDS = (LocMemCache, BaseMemcachedCache, RedisCache)
+
+
+def get_client_ip(request):
+    """Get client IP address from request (see ``TRUSTED_PROXY_COUNT``)."""
+    proxies = getattr(settings, 'TRUSTED_PROXY_COUNT', 0)
+    x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
+    if proxies and x_forwarded_for:
+        ips = [ip.strip() for ip in x_forwarded_for.split(',') if ip.strip()]
+        # Chaque proxy ajoute à droite l'adresse de son pair : seules les
+        # entrées ajoutées par nos proxies sont fiables
+        if len(ips) >= proxies:
+            return ips[-proxies]
+    return request.META.get('REMOTE_ADDR')
+
+
+def parse_rate(rate):
+    """``"10/min"`` -> ``(10, 60)``: bucket capacity and refill period in seconds."""
+    count, period = rate.split('/')
+    return int(count), PERIODS[period.strip()[0]]
+
+
+class TokenBucket:
+    """In-process token bucket (one per key)."""
+
+    __slots__ = ('tokens', 'updated_at')
+
+    def __init__(self, capacity, now):
+        self.tokens = float(capacity)
+        self.updated_at = now
+
+    def peek(self, capacity, refill_rate, now):
+        """Seconds to wait for the next token (0: one is available)."""
+        tokens = min(capacity, self.tokens + (now - self.updated_at) * refill_rate)
+        return 0 if tokens >= 1 else (1 - tokens) / refill_rate
+
+    def take(self, capacity, refill_rate, now):
+        """Take one token; return 0 or the seconds to wait for the next one."""
+        self.tokens = min(capacity, self.tokens + (now - self.updated_at) * refill_rate)
+        self.updated_at = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0
+        return (1 - self.tokens) / refill_rate
+
+    def give_back(self, capacity):
+        self.tokens = min(capacity, self.tokens + 1)
+
+
+class RateLimiter:
+    """Token buckets for one scope, local fast path plus shared cache."""
+
+    def __init__(self, scope):
+        self.scope = scope
+        self.capacity, self.period = parse_rate(settings.RATE_LIMITS[scope])
+        self.refill_rate = self.capacity / self.period
+        self.buckets = OrderedDict()
+        self.lock = threading.Lock()
+
+    def _bucket(self, key, now):
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            bucket = self.buckets[key] = TokenBucket(self.capacity, now)
+            if len(self.buckets) > LOCAL_BUCKETS_MAX:
+                self.buckets.popitem(last=False)
+        else:
+            self.buckets.move_to_end(key)
+        return bucket
+
+    def peek(self, key, now):
+        """Seconds to wait according to the local bucket of ``key``, nothing taken."""
+        with self.lock:
+            bucket = self.buckets.get(key)
+            return bucket.peek(self.capacity, self.refill_rate, now) if bucket else 0
+
+    def _take_local(self, key, now):
+        with self.lock:
+            return self._bucket(key, now).take(self.capacity, self.refill_rate, now)
+
+    def _give_back_local(self, key):
+        with self.lock:
+            bucket = self.buckets.get(key)
+            if bucket is not None:
+                bucket.give_back(self.capacity)
+
+    def _take_shared(self, key, now):
+        window, elapsed = divmod(now, self.period)
+        window = int(window)
+        weight = 1 - elapsed / self.period
+        counter_key = f'ratelimit:{self.scope}:{key}'
+        if isinstance(caches[DEFAULT_CACHE_ALIAS], ATOMIC_INCR_BACKENDS):
+            previous, count = self._count_in_cache(counter_key, window, weight)
+        else:
+            previous, count = self._count_in_database(counter_key, window, weight)
+        if count is not None:
+            return 0
+        # Refusée : attente jusqu'à ce que la fenêtre précédente pèse assez peu
+        excess = previous * weight + math.floor(self.capacity - previous * weight) + 1 - self.capacity
+        if previous:
+            return min(self.period * excess / previous, self.period)
+        return self.period - elapsed
+
+    def _count_in_cache(self, counter_key, window, weight):
+        """Count the request with cache.incr; ``(previous, count)``, count None if refused."""
+        cache_key = f'{counter_key}:{window}'
+        try:
+            count = cache.incr(cache_key)
+        except ValueError:
+            # Premier appel de la fenêtre (ou un autre worker vient de la créer)
+            if cache.add(cache_key, 1, int(self.period) * 2 + 1):
+                count = 1
+            else:
+                count = cache.incr(cache_key)
+        previous = cache.get(f'{counter_key}:{window - 1}', 0)
+        if previous * weight + count <= self.capacity:
+            return previous, count
+        # Refusée : elle ne consomme pas le quota
+        try:
+            cache.decr(cache_key)
+        except ValueError:
+            pass
+        return previous, None
+
+    def _count_in_database(self, counter_key, window, weight):
+        """Count the request with a conditional UPDATE; ``(previous, count)``, count None if refused."""
+        with primary():
+            now = timezone.now()
+            if random.random() < 0.01:
+                RateLimitCounter.objects.filter(expires_at__lt=now).delete()
+            previous = RateLimitCounter.objects.filter(
+                key=counter_key, window=window - 1
+            ).values_list('count', flat=True).first() or 0
+            # Requêtes encore permises dans la fenêtre en cours
+            limit = math.floor(self.capacity - previous * weight)
+            if limit < 1:
+                return previous, None
+            counters = RateLimitCounter.objects.filter(key=counter_key, window=window, count__lt=limit)
+            if counters.update(count=F('count') + 1):
+                return previous, 1
+            expires_at = datetime.fromtimestamp((window + 2) * self.period, dt_timezone.utc)
+            try:
+                with transaction.atomic():
+                    RateLimitCounter.objects.create(
+                        key=counter_key, window=window, count=1, expires_at=expires_at
+                    )
+                return previous, 1
+            except IntegrityError:
+                # Fenêtre créée entre-temps (ou déjà pleine)
+                return previous, 1 if counters.update(count=F('count') + 1) else None
+
+    def _give_back_shared(self, key, now):
+        window = int(now // self.period)
+        counter_key = f'ratelimit:{self.scope}:{key}'
+        if isinstance(caches[DEFAULT_CACHE_ALIAS], ATOMIC_INCR_BACKENDS):
+            try:
+                cache.decr(f'{counter_key}:{window}')
+            except ValueError:
+                pass
+        else:
+            with primary():
+                RateLimitCounter.objects.filter(key=counter_key, window=window, count__gt=0).update(
+                    count=F('count') - 1
+                )
+
+    def hit(self, key, now=None):
+        """Count a request for ``key``; return 0 if allowed, else seconds to wait."""
+        now = now or time.time()
+        wait = self._take_local(key, now)
+        if wait:
+            return wait
+        wait = self._take_shared(key, now)
+        if wait:
+            self._give_back_local(key)
+        return wait
+
+    def give_back(self, key, now):
+        """Undo a successful ``hit(key, now)`` (request refused by another bucket)."""
+        self._give_back_local(key)
+        self._give_back_shared(key, now)
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(scope):
+    limiter = _limiters.get(scope)
+    if limiter is None:
+        with _limiters_lock:
+            limiter = _limiters.setdefault(scope, RateLimiter(scope))
+    return limiter
+
+
+def get_identity_keys(data):
+    """Normalized email and phone found in the submitted data."""
+    keys = []
+    email = normalize_email(data.get('email'))
+    phone = normalize_phone(data.get('phone'))
+    if email:
+        keys.append('email:' + email)
+    if phone:
+        keys.append('phone:' + phone)
+    return keys
+
+
+def check_rate(scope, request, data=None):
+    """
+    Count a request against the IP bucket and the identity buckets of ``scope``.
+
+    Returns 0 if allowed, else the number of seconds before the next request.
+    """
+    if not getattr(settings, 'RATE_LIMIT_ENABLED', True):
+        return 0
+    limiter = get_limiter(scope)
+    keys = ['ip:' + (get_client_ip(request) or 'unknown')]
+    if data is not None:
+        keys += get_identity_keys(data)
+    now = time.time()
+    # Tous les compartiments locaux sont vérifiés avant de prendre un jeton
+    wait = max(limiter.peek(key, now) for key in keys)
+    if wait:
+        return wait
+    taken = []
+    for key in keys:
+        wait = limiter.hit(key, now)
+        if wait:
+            # Refusée par une limite partagée : les jetons déjà pris sont rendus
+            for taken_key in taken:
+                limiter.give_back(taken_key, now)
+            return wait
+        taken.append(key)
+    return 0
+
+
+# =============================================================================
+# DRF
+# =============================================================================
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    DRF throttle using the view's ``throttle_scope``.
+
+    Keyed by client IP and, for write requests, by the normalized email and
+    phone of the payload.
+    """
+
+    def allow_request(self, request, view):
+        scope = getattr(view, 'throttle_scope', None)
+        if not scope:
+            return True
+        data = request.data if request.method not in ('GET', 'HEAD', 'OPTIONS') else None
+        self.wait_seconds = check_rate(scope, request, data)
+        return not self.wait_seconds
+
+    def wait(self):
+        return self.wait_seconds
+
+
+class RateLimitedMixin:
+    """APIView mixin: token bucket throttling with a French 429 message."""
+    throttle_classes = [TokenBucketThrottle]
+
+    def throttled(self, request, wait):
+        raise Throttled(wait, detail=RATE_LIMIT_MESSAGE)
+
+
+# =============================================================================
+# DJANGO VIEWS
+# =============================================================================
+
+def rate_limit(scope):
+    """
+    View decorator for the plain Django form views.
+
+    Use with ``method_decorator(rate_limit('scope'), name='dispatch')``.
+    Only POST requests are counted.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def _wrapped_view(request, *args, **kwargs):
+            if request.method != 'POST':
+                return view_func(request, *args, **kwargs)
+
+            wait = check_rate(scope, request, request.POST)
+            if not wait:
+                return view_func(request, *args, **kwargs)
+
+            if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
+                response = JsonResponse({'success': False, 'message': RATE_LIMIT_MESSAGE}, status=429)
+            else:
+                response = HttpResponse(RATE_LIMIT_MESSAGE, status=429, content_type='text/plain; charset=utf-8')
+            response['Retry-After'] = str(int(wait) + 1)
+            return response
+
+        return _wrapped_view
+    return decorator
@@ -0,0 +1,100 @@
+"""
+Thumbnails of the admin image previews.
+
+Previews used to load the original uploads (often several megabytes) at
+50 px. ``preview()`` now points to a thumbnail at the exact preview size,
+stored under ``MEDIA_ROOT/<THUMBNAIL_DIR>/<width>x<height>/``:
+
+- when it already exists, the ``<img>`` targets the media file directly;
+- otherwise it targets ``/admin/thumbnail/<w>x<h>/<name>``, which generates
+  the thumbnail on first request (one process at a time thanks to a file
+  lock) and redirects to it.
+
+Generated thumbnails are never modified: a new upload gets a new file name,
+hence a new thumbnail. Deleting the directory clears them.
+"""
+import os
+import tempfile
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.urls import reverse
+from django.utils._os import safe_join
+from django.utils.html import format_html
+from PIL import Image, ImageOps
+
+try:
+    import fcntl
+except ImportError:  # Windows : pas de verrou, la génération reste atomique
+    fcntl = None
+
+# Taille maximale acceptée par la vue de génération (px)
+MAX_SIZE = 800
+
+
+def thumbnail_name(name, width, height):
+    """Relative path (under MEDIA_ROOT) of the thumbnail of ``name``."""
+    root, ext = os.path.splitext(name)
+    # JPEG pour les photos, PNG pour le reste (transparence)
+    ext = '.jpg' if ext.lower() in ('.jpg', '.jpeg') else '.png'
+    return f'{settings.THUMBNAIL_DIR}/{width}x{height}/{root}{ext}'
+
+
+def thumbnail_path(name, width, height):
+    return safe_join(settings.MEDIA_ROOT, thumbnail_name(name, width, height))
+
+
+def thumbnail_url(image, width, height):
+    """URL of the thumbnail of an image field file, generated on first request."""
+    if os.path.exists(thumbnail_path(image.name, width, height)):
+        return default_storage.url(thumbnail_name(image.name, width, height))
+    return reverse('admin_thumbnail', kwargs={'width': width, 'height': height, 'name': image.name})
+
+
+def generate_thumbnail(name, width, height):
+    """Create the thumbnail of ``name`` unless another process just did; return its path."""
+    path = thumbnail_path(name, width, height)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Un verrou par taille : les générations concurrentes attendent la première
+    lock_path = safe_join(settings.MEDIA_ROOT, settings.THUMBNAIL_DIR, f'{width}x{height}', '.lock')
+    with open(lock_path, 'w') as lock:
+        if fcntl:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            if os.path.exists(path):
+                return path
+            mode = 'RGB' if path.endswith('.jpg') else 'RGBA'
+            with default_storage.open(name, 'rb') as source:
+                image = Image.open(source)
+                # JPEG : décodage directement à une résolution réduite
+                image.draft('RGB', (width * 2, height * 2))
+                image = ImageOps.exif_transpose(image).convert(mode)
+                image = ImageOps.fit(image, (width, height), Image.LANCZOS)
+            # Écriture dans un fichier temporaire puis renommage : jamais de fichier partiel
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as output:
+                    if mode == 'RGB':
+                        image.save(output, 'JPEG', quality=82, optimize=True)
+                    else:
+                        image.save(output, 'PNG', optimize=True)
+                os.replace(tmp, path)
+            finally:
+                # Échec de l'encodage : pas de fichier temporaire laissé
+                if os.path.exists(tmp):
+                    os.remove(tmp)
+        finally:
+            if fcntl:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+    return path
+
+
+def preview(image, width, height, radius='4px', alt=''):
+    """``<img>`` tag of an admin preview, "-" when there is no image."""
+    if not image:
+        return "-"
+    return format_html(
+        '<img src="{}" width="{}" height="{}" alt="{}" loading="lazy" decoding="async" '
+        'style="object-fit:cover;border-radius:{};"/>',
+        thumbnail_url(image, width, height), width, height, alt, radius
+    )
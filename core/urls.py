@@ -12,6 +12,7 @@ from .views import (
     InstallationTypeViewSet, QuoteRequestCreateView,
     ContactMessageCreateView, NewsletterSubscribeView,
     CheckGameEligibility, GetQuizQuestions, SubmitQuizAndSpin, GetWheelSegments,
+    GetGameBoot, StartGame,
     ValidatePromoCode, MarkPromoCodeUsed
 )
 
@@ -46,6 +47,8 @@ urlpatterns = [
     path('game/questions/', GetQuizQuestions.as_view(), name='game-questions'),
     path('game/submit/', SubmitQuizAndSpin.as_view(), name='game-submit'),
     path('game/wheel-segments/', GetWheelSegments.as_view(), name='game-wheel-segments'),
+    path('game/boot/', GetGameBoot.as_view(), name='game-boot'),
+    path('game/start/', StartGame.as_view(), name='game-start'),
 
     # Promo code endpoints
     path('promo/validate/', ValidatePromoCode.as_view(), name='promo-validate'),
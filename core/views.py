@@ -25,12 +25,14 @@ from django.contrib import messages
 from django.contrib.auth.tokens import default_token_generator
 from django.utils.http import urlsafe_base64_encode, urlsafe_base64_decode
 from django.utils.encoding import force_bytes, force_str
-from django.http import JsonResponse
+from django.http import JsonResponse, HttpResponseNotModified
+from django.utils.cache import patch_cache_control
 from django.views import View
 from django.views.generic import TemplateView, ListView, DetailView, FormView
 from django.urls import reverse_lazy
 from django import forms
 from django.utils import timezone
+from django.db import IntegrityError, transaction
 from datetime import timedelta
 
 from .models import (
@@ -41,9 +43,11 @@ from .models import (
     FishSpecies, CropType, BasinType, HydroSystemType, TrainingType,
     QuizQuestion, GamePrize, GameParticipation
 )
+import hashlib
 import json
-import random
+import secrets
 import string
+import uuid
 from .serializers import (
     SiteSettingsSerializer, HeroSlideSerializer, ServiceSerializer,
     ProductCategorySerializer, ProductListSerializer, ProductDetailSerializer,
@@ -54,6 +58,13 @@ from .serializers import (
     QuoteRequestDetailSerializer, ContactMessageCreateSerializer,
     NewsletterSerializer, FullSiteDataSerializer
 )
+from .caching import hot_cached
+from .idempotency import idempotent
+from .throttling import RateLimitedMixin, get_client_ip, rate_limit
+from .game import (
+    QUIZ_SIZE, PrizeTable, QuizBank, InvalidQuizToken, drop_prize, get_prize_table,
+    get_quiz_bank, get_wheel_segments, has_already_played, make_quiz_token, read_quiz_token
+)
 
 
 class SiteSettingsView(APIView):
@@ -74,6 +85,11 @@ class FullSiteDataView(APIView):
     permission_classes = [AllowAny]
 
     def get(self, request):
+        # Sérialisé une fois par version du namespace "site-data" (core/caching.py)
+        return Response(hot_cached('site-data', ['site-data'], self.build_site_data))
+
+    @staticmethod
+    def build_site_data():
         data = {
             'settings': SiteSettings.get_settings(),
             'hero_slides': HeroSlide.objects.filter(is_active=True),
@@ -90,8 +106,7 @@ class FullSiteDataView(APIView):
             'faqs': FAQ.objects.filter(is_active=True),
             'installation_types': InstallationType.objects.filter(is_active=True),
         }
-        serializer = FullSiteDataSerializer(data)
-        return Response(serializer.data)
+        return dict(FullSiteDataSerializer(data).data)
 
 
 class HeroSlideViewSet(viewsets.ReadOnlyModelViewSet):
@@ -253,10 +268,12 @@ class InstallationTypeViewSet(viewsets.ReadOnlyModelViewSet):
     permission_classes = [AllowAny]
 
 
-class QuoteRequestCreateView(generics.CreateAPIView):
+@method_decorator(idempotent('api-quote-request'), name='dispatch')
+class QuoteRequestCreateView(RateLimitedMixin, generics.CreateAPIView):
     """Create a new quote request."""
     serializer_class = QuoteRequestCreateSerializer
     permission_classes = [AllowAny]
+    throttle_scope = 'forms'
 
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
@@ -305,10 +322,11 @@ class QuoteRequestCreateView(generics.CreateAPIView):
         )
 
 
-class ContactMessageCreateView(generics.CreateAPIView):
+class ContactMessageCreateView(RateLimitedMixin, generics.CreateAPIView):
     """Create a new contact message."""
     serializer_class = ContactMessageCreateSerializer
     permission_classes = [AllowAny]
+    throttle_scope = 'forms'
 
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
@@ -339,10 +357,11 @@ class ContactMessageCreateView(generics.CreateAPIView):
         )
 
 
-class NewsletterSubscribeView(generics.CreateAPIView):
+class NewsletterSubscribeView(RateLimitedMixin, generics.CreateAPIView):
     """Subscribe to newsletter."""
     serializer_class = NewsletterSerializer
     permission_classes = [AllowAny]
+    throttle_scope = 'forms'
 
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
@@ -364,9 +383,13 @@ class BaseContextMixin:
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['settings'] = SiteSettings.get_settings()
-        context['phone_numbers'] = PhoneNumber.objects.filter(is_active=True)
-        context['installation_types'] = InstallationType.objects.filter(is_active=True)
+        context.update(hot_cached('site-context', ['site'], lambda: {
+            'settings': SiteSettings.get_settings(),
+            'phone_numbers': list(PhoneNumber.objects.filter(is_active=True)),
+            'installation_types': list(InstallationType.objects.filter(is_active=True)),
+        }))
+        # Jeton anti-doublon pour les formulaires (voir core.idempotency)
+        context['idempotency_key'] = uuid.uuid4().hex
         return context
 
 
@@ -376,18 +399,24 @@ class HomePageView(BaseContextMixin, TemplateView):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['hero_slides'] = HeroSlide.objects.filter(is_active=True)
-        context['services'] = Service.objects.filter(is_active=True)
-        # Afficher tous les produits actifs (vedettes d'abord, puis les autres)
-        context['products'] = Product.objects.filter(is_active=True).order_by('-is_featured', '-created_at')[:8]
-        context['team_members'] = TeamMember.objects.filter(is_active=True)[:3]
-        context['gallery_images'] = GalleryImage.objects.filter(is_active=True)[:6]
-        context['advantages'] = Advantage.objects.filter(is_active=True)[:4]
-        context['testimonials'] = Testimonial.objects.filter(is_active=True)
-        context['system_models'] = SystemModel.objects.filter(is_active=True)[:6]
-        context['awards'] = Award.objects.filter(is_active=True)
+        context.update(hot_cached('home', ['home'], self.build_home_content))
         return context
 
+    @staticmethod
+    def build_home_content():
+        return {
+            'hero_slides': list(HeroSlide.objects.filter(is_active=True)),
+            'services': list(Service.objects.filter(is_active=True)),
+            # Afficher tous les produits actifs (vedettes d'abord, puis les autres)
+            'products': list(Product.objects.filter(is_active=True).order_by('-is_featured', '-created_at')[:8]),
+            'team_members': list(TeamMember.objects.filter(is_active=True)[:3]),
+            'gallery_images': list(GalleryImage.objects.filter(is_active=True)[:6]),
+            'advantages': list(Advantage.objects.filter(is_active=True)[:4]),
+            'testimonials': list(Testimonial.objects.filter(is_active=True)),
+            'system_models': list(SystemModel.objects.filter(is_active=True)[:6]),
+            'awards': list(Award.objects.filter(is_active=True)),
+        }
+
 
 class ProductListView(BaseContextMixin, ListView):
     """Product list page view."""
@@ -404,7 +433,9 @@ class ProductListView(BaseContextMixin, ListView):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['categories'] = ProductCategory.objects.filter(is_active=True)
+        context['categories'] = hot_cached(
+            'product-categories', ['catalog'], lambda: list(ProductCategory.objects.filter(is_active=True))
+        )
         context['current_category'] = self.request.GET.get('category')
         return context
 
@@ -443,7 +474,7 @@ class BlogListView(BaseContextMixin, ListView):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['blog_categories'] = BlogCategory.objects.all()
+        context['blog_categories'] = hot_cached('blog-categories', ['blog'], lambda: list(BlogCategory.objects.all()))
         context['recent_posts'] = BlogPost.objects.filter(is_published=True)[:5]
         return context
 
@@ -484,6 +515,8 @@ class OrderSuccessView(BaseContextMixin, TemplateView):
     template_name = 'pages/order_success.html'
 
 
+@method_decorator(rate_limit('forms'), name='dispatch')
+@method_decorator(idempotent('quote-form'), name='dispatch')
 class SubmitQuoteView(View):
     """Handle quote form submission."""
 
@@ -557,6 +590,8 @@ class SubmitQuoteView(View):
         )
 
 
+@method_decorator(rate_limit('forms'), name='dispatch')
+@method_decorator(idempotent('contact-form'), name='dispatch')
 class SubmitContactView(View):
     """Handle contact form submission."""
 
@@ -622,6 +657,7 @@ Ce message a été envoyé depuis le formulaire de contact du site web.
             return redirect('home')
 
 
+@method_decorator(rate_limit('forms'), name='dispatch')
 class NewsletterSubscribeFormView(View):
     """Handle newsletter subscription form."""
 
@@ -724,11 +760,13 @@ class QuoteFormView(BaseContextMixin, TemplateView):
         context['quote_description'] = type_info['description']
 
         # Options dynamiques pour les formulaires
-        context['fish_species'] = FishSpecies.objects.filter(is_active=True)
-        context['crop_types'] = CropType.objects.filter(is_active=True)
-        context['basin_types'] = BasinType.objects.filter(is_active=True)
-        context['hydro_system_types'] = HydroSystemType.objects.filter(is_active=True)
-        context['training_types'] = TrainingType.objects.filter(is_active=True)
+        context.update(hot_cached('quote-options', ['quote-options'], lambda: {
+            'fish_species': list(FishSpecies.objects.filter(is_active=True)),
+            'crop_types': list(CropType.objects.filter(is_active=True)),
+            'basin_types': list(BasinType.objects.filter(is_active=True)),
+            'hydro_system_types': list(HydroSystemType.objects.filter(is_active=True)),
+            'training_types': list(TrainingType.objects.filter(is_active=True)),
+        }))
 
         return context
 
@@ -897,39 +935,58 @@ QUIZ_QUESTIONS = [
 
 # Prizes with probabilities (50% win, 50% lose)
 PRIZES = [
-    {'code': '10_percent', 'name': '10% de réduction', 'probability': 20},
-    {'code': '15_percent', 'name': '15% de réduction', 'probability': 10},
-    {'code': 'free_delivery', 'name': 'Livraison gratuite', 'probability': 15},
-    {'code': 'free_guide', 'name': 'Guide PDF gratuit', 'probability': 5},
-    {'code': 'lost', 'name': 'Pas de chance', 'probability': 50},
+    {'code': '10_percent', 'name': '10% de réduction', 'probability': 20, 'prize_type': 'discount', 'discount_percent': 10},
+    {'code': '15_percent', 'name': '15% de réduction', 'probability': 10, 'prize_type': 'discount', 'discount_percent': 15},
+    {'code': 'free_delivery', 'name': 'Livraison gratuite', 'probability': 15, 'prize_type': 'free_delivery', 'discount_percent': 0},
+    {'code': 'free_guide', 'name': 'Guide PDF gratuit', 'probability': 5, 'prize_type': 'free_item', 'discount_percent': 0},
+    {'code': 'lost', 'name': 'Pas de chance', 'probability': 50, 'prize_type': 'lost', 'discount_percent': 0},
+]
+FALLBACK_PRIZE_TABLE = PrizeTable(PRIZES, [prize['probability'] for prize in PRIZES])
+FALLBACK_QUIZ_BANK = QuizBank(QUIZ_QUESTIONS)
+
+# Default wheel segments when no prize is configured
+DEFAULT_WHEEL_SEGMENTS = [
+    {'label': '10%', 'color': '#4caf50', 'icon': '🎁', 'prize_type': 'discount', 'is_winning': True},
+    {'label': 'Pas de chance', 'color': '#f44336', 'icon': '😔', 'prize_type': 'lost', 'is_winning': False},
+    {'label': '15%', 'color': '#2196f3', 'icon': '🎁', 'prize_type': 'discount', 'is_winning': True},
+    {'label': 'Pas de chance', 'color': '#ff9800', 'icon': '😔', 'prize_type': 'lost', 'is_winning': False},
+    {'label': 'Livraison', 'color': '#9c27b0', 'icon': '🚚', 'prize_type': 'free_delivery', 'is_winning': True},
+    {'label': 'Pas de chance', 'color': '#e91e63', 'icon': '😔', 'prize_type': 'lost', 'is_winning': False},
+    {'label': '20%', 'color': '#00bcd4', 'icon': '🎁', 'prize_type': 'discount', 'is_winning': True},
+    {'label': 'Pas de chance', 'color': '#795548', 'icon': '😔', 'prize_type': 'lost', 'is_winning': False},
 ]
 
 
+PROMO_CODE_ALPHABET = string.ascii_uppercase + string.digits
+
+
 def generate_promo_code():
-    """Generate a unique promo code."""
+    """
+    Generate a random promo code.
+
+    Uniqueness is enforced by the unique index on GameParticipation.promo_code:
+    callers retry with a new code on IntegrityError (36^6 codes, so collisions
+    are very rare).
+    """
     prefix = "AQUA"
-    suffix = ''.join(random.choices(string.ascii_uppercase + string.digits, k=6))
+    suffix = ''.join(secrets.choice(PROMO_CODE_ALPHABET) for _ in range(6))
     return f"{prefix}{suffix}"
 
 
-def get_client_ip(request):
-    """Get client IP address from request."""
-    x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
-    if x_forwarded_for:
-        ip = x_forwarded_for.split(',')[0]
-    else:
-        ip = request.META.get('REMOTE_ADDR')
-    return ip
-
-
 def spin_wheel():
-    """Spin the wheel and return a prize from database (alternating win/lose pattern)."""
-    # Try to get prizes from database
-    db_prizes = list(GamePrize.objects.filter(is_active=True).order_by('order'))
+    """
+    Spin the wheel: weighted draw from the cached prize table.
 
-    if db_prizes:
-        # Select a random prize
-        prize = random.choice(db_prizes)
+    Prizes with a quota are claimed with an atomic UPDATE; an exhausted prize
+    is dropped from the table and the wheel is spun again.
+    """
+    table = get_prize_table()
+
+    while table:
+        prize = table.sample()
+        if not prize.claim():
+            table = drop_prize(table, prize)
+            continue
         return {
             'id': prize.pk,
             'code': prize.prize_type,
@@ -939,93 +996,128 @@ def spin_wheel():
             'applies_to_fresh_only': prize.applies_to_fresh_products_only,
             'color': prize.color,
             'icon': prize.icon,
+            'instance': prize,
         }
 
+    # Every prize is out of stock
+    if table.dropped:
+        return {'code': 'lost', 'name': 'Pas de chance', 'is_winning': False}
+
     # Fallback to hardcoded prizes
-    rand = random.randint(1, 100)
-    cumulative = 0
-    for prize in PRIZES:
-        cumulative += prize['probability']
-        if rand <= cumulative:
-            return {'code': prize['code'], 'name': prize['name'], 'is_winning': prize['code'] != 'lost'}
-    return {'code': 'lost', 'name': 'Pas de chance', 'is_winning': False}
+    prize = FALLBACK_PRIZE_TABLE.sample()
+    return {'code': prize['code'], 'name': prize['name'], 'is_winning': prize['code'] != 'lost'}
+
+
+def check_eligibility(request):
+    """Eligibility answer for the email and phone posted by the game popup."""
+    email = request.data.get('email', '').strip().lower()
+    phone = request.data.get('phone', '').strip()
+
+    if not email or not phone:
+        return {
+            'eligible': False,
+            'message': 'Email et téléphone requis'
+        }
+
+    if has_already_played(email=email, phone=phone):
+        return {
+            'eligible': False,
+            'message': 'Vous avez déjà participé au jeu. Une seule participation par personne est autorisée.'
+        }
+
+    return {
+        'eligible': True,
+        'message': 'Vous pouvez participer !'
+    }
 
 
 @method_decorator(csrf_exempt, name='dispatch')
-class CheckGameEligibility(APIView):
+class CheckGameEligibility(RateLimitedMixin, APIView):
     """Check if user can play the game."""
     permission_classes = [AllowAny]
     authentication_classes = []
+    throttle_scope = 'game-check'
 
     def post(self, request):
-        email = request.data.get('email', '').strip().lower()
-        phone = request.data.get('phone', '').strip()
-
-        if not email or not phone:
-            return Response({
-                'eligible': False,
-                'message': 'Email et téléphone requis'
-            })
-
-        if GameParticipation.has_already_played(email=email, phone=phone):
-            return Response({
-                'eligible': False,
-                'message': 'Vous avez déjà participé au jeu. Une seule participation par personne est autorisée.'
-            })
-
-        return Response({
-            'eligible': True,
-            'message': 'Vous pouvez participer !'
-        })
+        return Response(check_eligibility(request))
 
 
 @method_decorator(csrf_exempt, name='dispatch')
 class GetQuizQuestions(APIView):
-    """Get random quiz questions from database."""
+    """Get random quiz questions from the cached quiz bank."""
     permission_classes = [AllowAny]
     authentication_classes = []
 
     def get(self, request):
-        # Get active questions from database
-        db_questions = list(QuizQuestion.objects.filter(is_active=True))
-
-        # Fallback to hardcoded questions if no questions in DB
-        if not db_questions:
-            questions = random.sample(QUIZ_QUESTIONS, min(4, len(QUIZ_QUESTIONS)))
-            client_questions = []
-            for q in questions:
-                client_questions.append({
-                    'id': q['id'],
-                    'question': q['question'],
-                    'options': q['options']
-                })
-            return Response({
-                'questions': client_questions,
-                'total': len(client_questions)
-            })
-
-        # Select 4 random questions from database
-        selected = random.sample(db_questions, min(4, len(db_questions)))
-
-        client_questions = []
-        for q in selected:
-            client_questions.append({
-                'id': q.pk,
-                'question': q.question,
-                'options': q.options
-            })
+        # Active questions from the cached bank, fallback to hardcoded questions
+        bank = get_quiz_bank() or FALLBACK_QUIZ_BANK
+        client_questions = bank.sample()
 
         return Response({
             'questions': client_questions,
-            'total': len(client_questions)
+            'total': len(client_questions),
+            'quiz_token': make_quiz_token(client_questions),
         })
 
 
 @method_decorator(csrf_exempt, name='dispatch')
-class SubmitQuizAndSpin(APIView):
+@method_decorator(idempotent('game-submit'), name='dispatch')
+class SubmitQuizAndSpin(RateLimitedMixin, APIView):
     """Submit quiz answers and spin the wheel."""
     permission_classes = [AllowAny]
     authentication_classes = []
+    throttle_scope = 'game-submit'
+
+    # Nouveaux essais si le code promo tiré existe déjà
+    MAX_ATTEMPTS = 3
+
+    def play(self, name, email, phone, score, total, ip_address):
+        """
+        Spin the wheel and store the participation as one atomic unit.
+
+        The prize table is loaded (or revalidated) before the transaction,
+        which then only writes: the conditional UPDATE that claims a prize
+        with a quota (none for prizes without one) and the INSERT of the
+        participation. The unique indexes on the player's identity and the
+        promo code are the duplicate checks: a rejected INSERT rolls back the
+        stock claimed by the spin.
+
+        Around it, a submission also runs the idempotency key INSERT and
+        UPDATE (core/idempotency.py) and the DailyStat upserts of the
+        rollups (core/signals.py): 8 to 9 statements on a warm worker. A
+        cold worker first loads the eligibility filter, the quiz bank and
+        the prize table (see core/warmup.py).
+
+        Returns ``(participation, prize_data)``, or ``(None, None)`` when the
+        player has already participated.
+        """
+        # Lecture hors transaction : une transaction SQLite qui lit puis écrit
+        # échoue ("database is locked") si un autre écrivain a validé entre-temps
+        get_prize_table()
+        for attempt in range(self.MAX_ATTEMPTS):
+            try:
+                with transaction.atomic():
+                    prize_data = spin_wheel()
+                    is_winning = prize_data.get('is_winning', prize_data.get('code') != 'lost')
+                    participation = GameParticipation.objects.create(
+                        name=name,
+                        email=email,
+                        phone=phone,
+                        quiz_score=score,
+                        quiz_total=total,
+                        # GamePrize instance comes straight from the prize table
+                        prize=prize_data.get('instance'),
+                        promo_code=generate_promo_code() if is_winning else '',
+                        ip_address=ip_address
+                    )
+                return participation, prize_data
+            except IntegrityError:
+                # Same email/phone inserted concurrently, or (very rarely) the
+                # promo code is already taken: retry with a new code
+                if GameParticipation.has_already_played(email=email, phone=phone):
+                    return None, None
+                if attempt == self.MAX_ATTEMPTS - 1:
+                    raise
 
     def post(self, request):
         name = request.data.get('name', '').strip()
@@ -1041,65 +1133,40 @@ class SubmitQuizAndSpin(APIView):
             }, status=400)
 
         # Check if already played
-        if GameParticipation.has_already_played(email=email, phone=phone):
+        if has_already_played(email=email, phone=phone):
             return Response({
                 'success': False,
                 'message': 'Vous avez déjà participé au jeu.'
             }, status=400)
 
-        # Calculate quiz score - check database first, fallback to hardcoded
-        score = 0
-        total = 0
-
-        # Try to get questions from database
-        db_questions = {str(q.pk): q for q in QuizQuestion.objects.filter(is_active=True)}
+        # Calculate quiz score from the cached bank (no DB query)
+        bank = get_quiz_bank() or FALLBACK_QUIZ_BANK
+        if not isinstance(answers, dict):
+            answers = {}
+        # Grade exactly the questions that were served (signed token required)
+        try:
+            served_ids = read_quiz_token(request.data.get('quiz_token') or '')
+        except InvalidQuizToken:
+            return Response({
+                'success': False,
+                'message': 'Le quiz a expiré, veuillez recommencer.'
+            }, status=400)
+        score, total = bank.grade(answers, served_ids)
 
-        if db_questions:
-            # Use database questions
-            for q_id, selected_idx in answers.items():
-                if q_id in db_questions:
-                    total += 1
-                    if selected_idx == db_questions[q_id].correct_index:
-                        score += 1
-        else:
-            # Fallback to hardcoded questions
-            for q in QUIZ_QUESTIONS:
-                q_id = str(q['id'])
-                if q_id in answers:
-                    total += 1
-                    if answers[q_id] == q['correct']:
-                        score += 1
-
-        # Spin the wheel
-        prize_data = spin_wheel()
-        promo_code = ''
+        quiz_total_final = total if total > 0 else 4
+        participation, prize_data = self.play(
+            name, email, phone, score, quiz_total_final, get_client_ip(request)
+        )
+        if participation is None:
+            return Response({
+                'success': False,
+                'message': 'Vous avez déjà participé au jeu.'
+            }, status=400)
 
         is_winning = prize_data.get('is_winning', prize_data.get('code') != 'lost')
-        if is_winning:
-            promo_code = generate_promo_code()
-
-        # Get GamePrize instance if available
-        prize_instance = None
-        if 'id' in prize_data:
-            try:
-                prize_instance = GamePrize.objects.get(pk=prize_data['id'])
-            except GamePrize.DoesNotExist:
-                pass
-
-        # Save participation
-        participation = GameParticipation.objects.create(
-            name=name,
-            email=email,
-            phone=phone,
-            quiz_score=score,
-            quiz_total=total if total > 0 else 4,
-            prize=prize_instance,
-            promo_code=promo_code,
-            ip_address=get_client_ip(request)
-        )
+        promo_code = participation.promo_code or ''
 
         # Calculate score message
-        quiz_total_final = total if total > 0 else 4
         if score == quiz_total_final:
             score_message = f"Parfait {name} ! Score parfait de {score}/{quiz_total_final} ! 🎉"
         elif score >= quiz_total_final * 0.75:
@@ -1125,47 +1192,81 @@ class SubmitQuizAndSpin(APIView):
         })
 
 
+def get_segments_payload():
+    """Wheel segments from the cache, fallback to default segments."""
+    segments = get_wheel_segments() or DEFAULT_WHEEL_SEGMENTS
+    return {'segments': segments, 'total': len(segments)}
+
+
+def cached_response(request, payload):
+    """
+    Response with an ETag and a public Cache-Control header.
+
+    Returns 304 Not Modified when the client already has this payload.
+    """
+    body = json.dumps(payload, sort_keys=True, ensure_ascii=False)
+    etag = '"%s"' % hashlib.md5(body.encode('utf-8')).hexdigest()
+    if etag in request.headers.get('If-None-Match', ''):
+        response = HttpResponseNotModified()
+    else:
+        response = Response(payload)
+    response['ETag'] = etag
+    patch_cache_control(response, public=True, max_age=settings.GAME_HTTP_CACHE_MAX_AGE)
+    return response
+
+
 @method_decorator(csrf_exempt, name='dispatch')
 class GetWheelSegments(APIView):
-    """Get wheel segments from database for display."""
+    """Get wheel segments for display (cached, with HTTP caching)."""
     permission_classes = [AllowAny]
     authentication_classes = []
 
     def get(self, request):
-        # Try to get prizes from database (alternating win/lose)
-        db_prizes = list(GamePrize.objects.filter(is_active=True).order_by('order'))
-
-        if db_prizes:
-            segments = []
-            for prize in db_prizes:
-                segments.append({
-                    'label': prize.display_name,
-                    'color': prize.color,
-                    'icon': prize.icon,
-                    'prize_type': prize.prize_type,
-                    'is_winning': prize.is_winning_prize,
-                })
-            return Response({'segments': segments, 'total': len(segments)})
-
-        # Fallback to default segments
-        default_segments = [
-            {'label': '10%', 'color': '#4caf50', 'icon': '🎁', 'prize_type': 'discount', 'is_winning': True},
-            {'label': 'Pas de chance', 'color': '#f44336', 'icon': '😔', 'prize_type': 'lost', 'is_winning': False},
-            {'label': '15%', 'color': '#2196f3', 'icon': '🎁', 'prize_type': 'discount', 'is_winning': True},
-            {'label': 'Pas de chance', 'color': '#ff9800', 'icon': '😔', 'prize_type': 'lost', 'is_winning': False},
-            {'label': 'Livraison', 'color': '#9c27b0', 'icon': '🚚', 'prize_type': 'free_delivery', 'is_winning': True},
-            {'label': 'Pas de chance', 'color': '#e91e63', 'icon': '😔', 'prize_type': 'lost', 'is_winning': False},
-            {'label': '20%', 'color': '#00bcd4', 'icon': '🎁', 'prize_type': 'discount', 'is_winning': True},
-            {'label': 'Pas de chance', 'color': '#795548', 'icon': '😔', 'prize_type': 'lost', 'is_winning': False},
-        ]
-        return Response({'segments': default_segments, 'total': len(default_segments)})
+        return cached_response(request, get_segments_payload())
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class GetGameBoot(APIView):
+    """Static game data for the popup: wheel segments and quiz length (cached)."""
+    permission_classes = [AllowAny]
+    authentication_classes = []
+
+    def get(self, request):
+        bank = get_quiz_bank() or FALLBACK_QUIZ_BANK
+        payload = get_segments_payload()
+        payload['quiz'] = {'question_count': min(QUIZ_SIZE, len(bank))}
+        return cached_response(request, payload)
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class StartGame(RateLimitedMixin, APIView):
+    """Check eligibility and serve the quiz questions in a single request."""
+    permission_classes = [AllowAny]
+    authentication_classes = []
+    throttle_scope = 'game-check'
+
+    def post(self, request):
+        eligibility = check_eligibility(request)
+        if not eligibility['eligible']:
+            return Response(eligibility)
+
+        bank = get_quiz_bank() or FALLBACK_QUIZ_BANK
+        client_questions = bank.sample()
+
+        return Response({
+            **eligibility,
+            'questions': client_questions,
+            'total': len(client_questions),
+            'quiz_token': make_quiz_token(client_questions),
+        })
 
 
 @method_decorator(csrf_exempt, name='dispatch')
-class ValidatePromoCode(APIView):
+class ValidatePromoCode(RateLimitedMixin, APIView):
     """Validate a promo code and return discount info."""
     permission_classes = [AllowAny]
     authentication_classes = []
+    throttle_scope = 'promo'
 
     def post(self, request):
         code = request.data.get('code', '').strip().upper()
@@ -1178,8 +1279,8 @@ class ValidatePromoCode(APIView):
 
         # Search for the promo code in GameParticipation
         try:
-            participation = GameParticipation.objects.get(
-                promo_code__iexact=code,
+            participation = GameParticipation.objects.select_related('prize').get(
+                promo_code=code,
                 has_used_prize=False
             )
 
@@ -1213,10 +1314,11 @@ class ValidatePromoCode(APIView):
 
 
 @method_decorator(csrf_exempt, name='dispatch')
-class MarkPromoCodeUsed(APIView):
+class MarkPromoCodeUsed(RateLimitedMixin, APIView):
     """Mark a promo code as used after order confirmation."""
     permission_classes = [AllowAny]
     authentication_classes = []
+    throttle_scope = 'promo'
 
     def post(self, request):
         code = request.data.get('code', '').strip().upper()
@@ -1224,21 +1326,14 @@ class MarkPromoCodeUsed(APIView):
         if not code:
             return Response({'success': False, 'message': 'Code requis'})
 
-        try:
-            participation = GameParticipation.objects.get(
-                promo_code__iexact=code,
-                has_used_prize=False
-            )
-            participation.has_used_prize = True
-            participation.save()
-
+        # Conditional UPDATE: only one concurrent checkout can redeem the code
+        if GameParticipation.redeem_promo_code(code):
             return Response({
                 'success': True,
                 'message': 'Code promo marqué comme utilisé'
             })
 
-        except GameParticipation.DoesNotExist:
-            return Response({
-                'success': False,
-                'message': 'Code non trouvé ou déjà utilisé'
-            })
+        return Response({
+            'success': False,
+            'message': 'Code non trouvé ou déjà utilisé'
+        })
@@ -0,0 +1,62 @@
+"""
+Process warm-up for gunicorn (see gunicorn.conf.py).
+
+``warm_master()`` runs once in the master after the application is
+preloaded: the URL resolver (hence every view module) and the compiled
+page templates are then shared by all workers through copy-on-write.
+
+``warm_worker()`` runs in each worker after fork and fills what belongs to
+the worker (database connection, local cache tier, prize table, quiz bank,
+participant Bloom filter), so that the first requests of a new or recycled
+worker do not pay for them. Warm-up failures are logged, never raised.
+"""
+import logging
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.db import connections
+from django.template.loader import get_template
+from django.test import RequestFactory
+from django.urls import get_resolver, resolve
+
+logger = logging.getLogger(__name__)
+
+# Pages rendues par chaque worker au démarrage (caches de la page d'accueil et de l'API)
+WARM_URLS = ['/', '/api/site-data/', '/api/game/wheel-segments/']
+
+
+def warm_master():
+    """Import the views and compile the page templates, without touching the database."""
+    started = time.perf_counter()
+    get_resolver().reverse_dict
+    templates = sorted((settings.BASE_DIR / 'templates' / 'pages').glob('*.html'))
+    for path in templates:
+        get_template(f'pages/{path.name}')
+    # Une connexion ouverte avant le fork serait partagée par tous les workers
+    connections.close_all()
+    logger.info("Préchargement : %d gabarits en %.0f ms", len(templates), (time.perf_counter() - started) * 1000)
+
+
+def warm_worker():
+    """Fill the caches of this worker."""
+    from .game import get_participant_filter, get_prize_table, get_quiz_bank
+
+    started = time.perf_counter()
+    factory = RequestFactory()
+    for url in WARM_URLS:
+        try:
+            request = factory.get(url)
+            request.user = AnonymousUser()
+            response = resolve(url).func(request)
+            if hasattr(response, 'render'):
+                response.render()
+        except Exception:
+            logger.exception("Préchauffage de %s en échec", url)
+
+    for warm in (get_prize_table, get_quiz_bank, get_participant_filter):
+        try:
+            warm()
+        except Exception:
+            logger.exception("Préchauffage de %s en échec", warm.__name__)
+    logger.info("Worker préchauffé en %.0f ms", (time.perf_counter() - started) * 1000)
@@ -0,0 +1,111 @@
+"""
+Gunicorn configuration for Aqua-Racine.
+
+    gunicorn aquaracine.wsgi:application -c gunicorn.conf.py
+
+Workers and threads are derived from the CPUs and the memory available to
+the container (cgroup limits included) and can be overridden with
+WEB_CONCURRENCY / GUNICORN_THREADS. Threaded workers (gthread) keep
+serving while a request waits on SMTP or the database.
+
+The application is preloaded in the master: Django, the models, the URL
+resolver and the compiled page templates are imported once and shared by
+the workers (copy-on-write). Each worker then warms its own caches before
+accepting requests, and is recycled after MAX_REQUESTS requests (with
+jitter, so they do not all restart together).
+"""
+import math
+import os
+
+# Mémoire estimée d'un worker Django (Mo), master compris dans la marge
+WORKER_MEMORY_MB = int(os.environ.get('GUNICORN_WORKER_MEMORY_MB', 150))
+RESERVED_MEMORY_MB = 100
+
+
+def cpu_count():
+    """CPUs usable by this process, cgroup quota included."""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    try:
+        with open('/sys/fs/cgroup/cpu.max') as f:
+            quota, period = f.read().split()
+        if quota != 'max':
+            cpus = min(cpus, math.ceil(int(quota) / int(period)))
+    except (OSError, ValueError):
+        pass
+    return max(1, cpus)
+
+
+def memory_limit_mb():
+    """Memory available to the container in MB (cgroup limit, else physical memory)."""
+    for path in ('/sys/fs/cgroup/memory.max', '/sys/fs/cgroup/memory/memory.limit_in_bytes'):
+        try:
+            with open(path) as f:
+                value = f.read().strip()
+        except OSError:
+            continue
+        # "max" ou valeur énorme : pas de limite
+        if value.isdigit() and int(value) < 1 << 50:
+            return int(value) // (1024 * 1024)
+    try:
+        return os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES') // (1024 * 1024)
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def default_workers():
+    """2 x CPUs + 1, within the memory of the container."""
+    workers = 2 * cpu_count() + 1
+    memory = memory_limit_mb()
+    if memory:
+        workers = min(workers, (memory - RESERVED_MEMORY_MB) // WORKER_MEMORY_MB)
+    return max(1, workers)
+
+
+# =============================================================================
+# SERVEUR
+# =============================================================================
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+workers = int(os.environ.get('WEB_CONCURRENCY', default_workers()))
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', 2))
+
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'True').lower() == 'true'
+
+# Recyclage des workers (fuites mémoire, fragmentation)
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 1000))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', 100))
+
+# Requête bloquée au-delà de timeout ; arrêt propre en graceful_timeout
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+
+# Battement de coeur des workers en mémoire plutôt que sur disque
+if os.path.isdir('/dev/shm'):
+    worker_tmp_dir = '/dev/shm'
+
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG', '-')
+errorlog = '-'
+loglevel = os.environ.get('GUNICORN_LOG_LEVEL', 'info')
+
+
+# =============================================================================
+# HOOKS
+# =============================================================================
+
+def when_ready(server):
+    """Master, application preloaded: warm what the workers share."""
+    if server.cfg.preload_app:
+        from core.warmup import warm_master
+        warm_master()
+    server.log.info("Workers: %d x %d threads", server.cfg.workers, server.cfg.threads)
+
+
+def post_worker_init(worker):
+    """Worker forked and initialized: warm its own caches before serving."""
+    from core.warmup import warm_worker
+    warm_worker()
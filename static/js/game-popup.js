@@ -31,6 +31,7 @@
         currentStep: 'registration', // registration, quiz, score, wheel, result
         currentQuestionIndex: 0,
         questions: [],
+        quizToken: '',
         answers: {},
         userData: {},
         quizScore: 0,
@@ -38,6 +39,7 @@
         scoreMessage: '',
         prize: null,
         promoCode: '',
+        submissionKey: '',
     };
 
     // DOM Elements
@@ -246,6 +248,7 @@
     function showPopup() {
         overlay.classList.add('active');
         document.body.style.overflow = 'hidden';
+        loadBootData();
     }
 
     /**
@@ -314,12 +317,14 @@
 
         // Save user data
         state.userData = { name, email, phone };
+        // One key per game: a retried submit returns the same result
+        state.submissionKey = newSubmissionKey();
 
         setLoading(true);
 
         try {
-            // Check eligibility
-            const eligibilityResponse = await fetch(`${CONFIG.apiBase}/game/check-eligibility/`, {
+            // Check eligibility and get quiz questions in one request
+            const startResponse = await fetch(`${CONFIG.apiBase}/game/start/`, {
                 method: 'POST',
                 headers: {
                     'Content-Type': 'application/json',
@@ -327,19 +332,16 @@
                 body: JSON.stringify({ email, phone }),
             });
 
-            const eligibilityData = await eligibilityResponse.json();
+            const startData = await startResponse.json();
 
-            if (!eligibilityData.eligible) {
-                showError(eligibilityData.message);
+            if (!startData.eligible) {
+                showError(startData.message || startData.detail);
                 setLoading(false);
                 return;
             }
 
-            // Get quiz questions
-            const questionsResponse = await fetch(`${CONFIG.apiBase}/game/questions/`);
-            const questionsData = await questionsResponse.json();
-
-            state.questions = questionsData.questions;
+            state.questions = startData.questions;
+            state.quizToken = startData.quiz_token || '';
             state.currentQuestionIndex = 0;
             state.answers = {};
 
@@ -356,6 +358,16 @@
         setLoading(false);
     }
 
+    /**
+     * Generate a unique key for the game submission
+     */
+    function newSubmissionKey() {
+        if (window.crypto && crypto.randomUUID) {
+            return crypto.randomUUID();
+        }
+        return Date.now().toString(36) + Math.random().toString(36).slice(2);
+    }
+
     /**
      * Render current question
      */
@@ -441,17 +453,19 @@
                 method: 'POST',
                 headers: {
                     'Content-Type': 'application/json',
+                    'Idempotency-Key': state.submissionKey,
                 },
                 body: JSON.stringify({
                     ...state.userData,
                     answers: state.answers,
+                    quiz_token: state.quizToken,
                 }),
             });
 
             const data = await response.json();
 
             if (!data.success) {
-                showError(data.message);
+                showError(data.message || data.detail);
                 setLoading(false);
                 return;
             }
@@ -507,22 +521,24 @@
     function handleGoToWheel() {
         showSection('wheel');
         updateSteps('wheel');
-        loadWheelSegments();
         drawWheel();
     }
 
     /**
-     * Load wheel segments from API
+     * Load wheel segments and quiz length (cached by the browser)
      */
-    async function loadWheelSegments() {
+    async function loadBootData() {
         try {
-            const response = await fetch(`${CONFIG.apiBase}/game/wheel-segments/`);
+            const response = await fetch(`${CONFIG.apiBase}/game/boot/`);
             const data = await response.json();
             if (data.segments && data.segments.length > 0) {
                 WHEEL_SEGMENTS = data.segments;
             }
+            if (data.quiz && data.quiz.question_count) {
+                state.quizTotal = data.quiz.question_count;
+            }
         } catch (error) {
-            console.error('Error loading wheel segments:', error);
+            console.error('Error loading game data:', error);
             // Keep default segments
         }
     }